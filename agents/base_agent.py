@@ -1,16 +1,42 @@
 """
 Base agent interface that all implementations must follow.
 """
+import time
+import queue
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional, Union
-from common.schema import UserMessage, AgentResponse, AgentMetrics
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Union, Iterable, Iterator
+from common.schema import UserMessage, AgentResponse, AgentMetrics, BatchItem, BatchResult, BatchResponse
+from common.deadline import Deadline
+from common import metrics
+
+# Sessions processed in parallel by process_many() unless told otherwise
+DEFAULT_BATCH_CONCURRENCY = 8
 
 
 class BaseAgent(ABC):
     """
     Abstract base class for all agent implementations.
+    
+    The process() of every subclass is instrumented to feed the live metrics
+    registry (common.metrics), labelled with the class's metrics_framework.
     """
     
+    # Framework label of live metrics, defaults to the class name; wrappers
+    # set None so only the wrapped agent records the request, and record
+    # requests they answer themselves with metrics.record_agent_request
+    metrics_framework: Optional[str] = None
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        process = cls.__dict__.get("process")
+        if process is None or getattr(process, "__isabstractmethod__", False):
+            return
+        framework = cls.__dict__.get("metrics_framework", cls.__name__)
+        if framework is not None:
+            cls.process = metrics.instrument_process(process, framework)
+    
     @abstractmethod
     def initialize(self) -> None:
         """
@@ -19,12 +45,14 @@ class BaseAgent(ABC):
         pass
     
     @abstractmethod
-    def process(self, user_message: UserMessage) -> AgentResponse:
+    def process(self, user_message: UserMessage, deadline: Optional[Deadline] = None) -> AgentResponse:
         """
         Process a user message and return a response.
         
         Args:
             user_message: The user message to process
+            deadline: Optional time budget for the request; when it passes the
+                agent stops early with its best partial answer
             
         Returns:
             Agent's response
@@ -47,3 +75,111 @@ class BaseAgent(ABC):
             AgentMetrics object with performance data
         """
         pass
+    
+    def fork(self) -> "BaseAgent":
+        """
+        Create an independent agent with the same configuration for another session.
+        
+        The default builds a new instance from the model name and shares this
+        agent's LLM client. Agents whose constructor takes other arguments
+        override this.
+        
+        Returns:
+            A new initialized agent with its own conversation state and metrics
+        """
+        llm = getattr(self, "llm", None)
+        clone = type(self)(model=llm.model if llm is not None else None)
+        if llm is not None:
+            clone.llm = llm
+        clone.initialize()
+        return clone
+    
+    def iter_process_many(self,
+                          items: Iterable[BatchItem],
+                          concurrency: int = DEFAULT_BATCH_CONCURRENCY) -> Iterator[BatchResult]:
+        """
+        Process many messages and yield results as they complete.
+        
+        Each session runs on its own fork(), its messages in input order;
+        up to concurrency sessions run at a time. A failing item is reported
+        in its result and does not stop the rest of its session or the batch.
+        Frameworks with native batching can override this method.
+        
+        Args:
+            items: Messages to process, grouped into conversations by session_id
+            concurrency: Maximum number of sessions processed in parallel
+            
+        Yields:
+            One BatchResult per item, in completion order
+        """
+        sessions: Dict[str, List[Any]] = OrderedDict()
+        count = 0
+        for index, item in enumerate(items):
+            sessions.setdefault(item.session_id, []).append((index, item))
+            count += 1
+        
+        completed: "queue.Queue[BatchResult]" = queue.Queue()
+        executor = ThreadPoolExecutor(max_workers=max(1, concurrency))
+        try:
+            for session_items in sessions.values():
+                executor.submit(self._run_batch_session, session_items, completed.put)
+            for _ in range(count):
+                yield completed.get()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def process_many(self,
+                     items: Iterable[BatchItem],
+                     concurrency: int = DEFAULT_BATCH_CONCURRENCY) -> BatchResponse:
+        """
+        Process many messages and return the results in input order.
+        
+        Args:
+            items: Messages to process, grouped into conversations by session_id
+            concurrency: Maximum number of sessions processed in parallel
+            
+        Returns:
+            BatchResponse with per-item results and aggregate throughput
+        """
+        start_time = time.perf_counter()
+        results = sorted(self.iter_process_many(items, concurrency), key=lambda r: r.index)
+        total_time = time.perf_counter() - start_time
+        failed = sum(1 for r in results if r.error is not None)
+        return BatchResponse(
+            results=results,
+            succeeded=len(results) - failed,
+            failed=failed,
+            total_time=total_time,
+            throughput=len(results) / total_time if total_time > 0 else 0.0
+        )
+    
+    def _run_batch_session(self, session_items: List[Any], emit) -> None:
+        """
+        Process the messages of one batch session in order on a fork.
+        
+        Args:
+            session_items: (index, BatchItem) pairs of the session
+            emit: Callable receiving each BatchResult
+        """
+        try:
+            agent = self.fork()
+        except Exception as e:
+            for index, item in session_items:
+                emit(BatchResult(index=index, session_id=item.session_id, error=f"fork failed: {e}"))
+            return
+        
+        for index, item in session_items:
+            errors_before = agent.get_metrics().error_count
+            start_time = time.perf_counter()
+            try:
+                deadline = Deadline(item.timeout) if item.timeout is not None else None
+                response = agent.process(item.message, deadline)
+            except Exception as e:
+                emit(BatchResult(index=index, session_id=item.session_id, error=str(e),
+                                 latency=time.perf_counter() - start_time))
+                continue
+            latency = time.perf_counter() - start_time
+            # Agents report most failures as an error response and a counted error
+            error = response.content if agent.get_metrics().error_count > errors_before else None
+            emit(BatchResult(index=index, session_id=item.session_id, response=response,
+                             error=error, latency=latency))
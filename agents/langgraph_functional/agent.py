@@ -1,26 +1,31 @@
 """
 LangGraph (functional API) implementation of the agent.
 """
-import json
 import time
+import uuid
+import operator
 from typing import Dict, Any, List, Optional, Union, TypedDict, Annotated
 
 from common.schema import UserMessage, AgentResponse, AgentMetrics, ToolCall
 from common.tools import execute_tool
 from common.llm import LLMClient
+from common.deadline import Deadline, DeadlineExceeded
+from common.scheduler import AdmissionRejected
+from common import tracing
+from common import codec
 from agents.base_agent import BaseAgent
 
 from langgraph.graph import StateGraph, END
-from langgraph.prebuilt import create_react_agent
+from langgraph.checkpoint.memory import MemorySaver
 
 
-# Define state for the graph
+MAX_ITERATIONS = 10
+
+
+# Define state for the graph; messages returned by nodes are appended by
+# the reducer, so nodes only return the messages they add
 class AgentState(TypedDict):
-    messages: List[Dict[str, Any]]
-    tool_calls: List[Dict[str, Any]]
-    current_tool_call: Optional[Dict[str, Any]]
-    current_tool_result: Optional[Dict[str, Any]]
-    response: Optional[str]
+    messages: Annotated[List[Dict[str, Any]], operator.add]
 
 
 class LangGraphFunctionalAgent(BaseAgent):
@@ -28,6 +33,8 @@ class LangGraphFunctionalAgent(BaseAgent):
     Implementation of an agent using LangGraph's functional API.
     """
     
+    metrics_framework = "langgraph_functional"
+    
     def __init__(self, model: str = None):
         """
         Initialize the agent.
@@ -104,122 +111,230 @@ class LangGraphFunctionalAgent(BaseAgent):
             }
         ]
         
-        # Set up the LangGraph agent
-        self._setup_graph()
-        
         # Metrics
         self.total_tokens = 0
         self.start_time = time.time()
+        self.request_count = 0
         self.tool_calls_count = 0
         self.error_count = 0
+        self.deadline_exceeded_count = 0
+        
+        # Deadline of the turn being processed, read by the graph nodes
+        self._deadline = None
+        
+        # Set up the LangGraph agent
+        self._setup_graph()
+        self.thread_id = str(uuid.uuid4())
         
     def _setup_graph(self):
         """
         Set up the LangGraph agent.
-        """
-        # Define available tools
-        tools = {
-            "get_weather": lambda params: execute_tool("get_weather", params),
-            "search_knowledge_base": lambda params: execute_tool("search_knowledge_base", params),
-            "calculate": lambda params: execute_tool("calculate", params)
-        }
-        
-        # Create the agent
-        self.agent = create_react_agent(
-            llm=self.llm,
-            tools=tools,
-            system_prompt=self.system_prompt
-        )
         
+        The session history is kept by the checkpointer under the session's
+        thread_id, so each turn only sends the messages it adds.
+        """
         # Define the state graph
         builder = StateGraph(AgentState)
+        builder.add_node("agent", self._run_agent)
+        builder.add_node("tools", self._run_tools)
+        builder.set_entry_point("agent")
         
-        # Add the agent node
-        builder.add_node("agent", self.agent)
+        # Define edges: run tools while the model asks for them
+        builder.add_conditional_edges("agent", self._next_step, {"tools": "tools", END: END})
+        builder.add_edge("tools", "agent")
         
-        # Define edges
-        builder.add_edge("agent", END)
+        self.checkpointer = MemorySaver()
+        self.graph = builder.compile(checkpointer=self.checkpointer)
+    
+    def _run_agent(self, state: AgentState) -> Dict[str, Any]:
+        """
+        Graph node calling the LLM on the thread's history.
         
-        # Compile the graph
-        self.graph = builder.compile()
+        Args:
+            state: Current graph state
+            
+        Returns:
+            State update holding the assistant message
+        """
+        deadline = self._deadline
+        if deadline and deadline.expired():
+            raise DeadlineExceeded(f"Deadline of {deadline.budget}s exceeded")
+        response = self.llm.complete(
+            messages=state["messages"],
+            tools=self.tool_definitions,
+            timeout=deadline.timeout() if deadline else None
+        )
+        # A final answer that arrives late is still returned; a call that
+        # failed on the timeout or asks for more tools is not
+        if deadline and deadline.expired() and (
+            isinstance(response, dict) or getattr(response.choices[0].message, "tool_calls", None)
+        ):
+            raise DeadlineExceeded(f"Deadline of {deadline.budget}s exceeded")
+        if hasattr(response, "usage") and response.usage:
+            self.total_tokens += response.usage.total_tokens
         
-    def initialize(self) -> None:
+        assistant_message = response.choices[0].message
+        message = {"role": "assistant", "content": assistant_message.content}
+        if getattr(assistant_message, "tool_calls", None):
+            message["tool_calls"] = [
+                {
+                    "id": tc.id,
+                    "type": "function",
+                    "function": {"name": tc.function.name, "arguments": tc.function.arguments}
+                }
+                for tc in assistant_message.tool_calls
+            ]
+        return {"messages": [message]}
+    
+    def _run_tools(self, state: AgentState) -> Dict[str, Any]:
         """
-        Initialize the agent.
+        Graph node executing the tool calls of the last assistant message.
+        
+        Args:
+            state: Current graph state
+            
+        Returns:
+            State update holding one tool message per call
+        """
+        deadline = self._deadline
+        results = []
+        for tc in state["messages"][-1]["tool_calls"]:
+            if deadline and deadline.expired():
+                result = {"error": "Deadline exceeded", "result": None}
+            else:
+                result = execute_tool(
+                    tc["function"]["name"], codec.loads(tc["function"]["arguments"]),
+                    timeout=deadline.remaining() if deadline else None
+                )
+            results.append({"role": "tool", "tool_call_id": tc["id"], "content": codec.dumps(result)})
+        return {"messages": results}
+    
+    @staticmethod
+    def _next_step(state: AgentState) -> str:
         """
+        Route to the tools node while the last message has tool calls.
+        
+        Args:
+            state: Current graph state
+            
+        Returns:
+            "tools" or END
+        """
+        return "tools" if state["messages"][-1].get("tool_calls") else END
+    
+    def _start_thread(self) -> None:
+        """
+        Start a new conversation thread, dropping the previous one.
+        """
+        self.checkpointer.delete_thread(self.thread_id)
+        self.thread_id = str(uuid.uuid4())
+        # Messages not yet stored on the graph side; wrappers such as the
+        # router append exchanges they answer themselves here, and the
+        # next turn sends them with the user message
         self.messages = [
             {"role": "system", "content": self.system_prompt}
         ]
     
-    def process(self, user_message: UserMessage) -> AgentResponse:
+    def initialize(self) -> None:
+        """
+        Initialize the agent.
+        """
+        self._start_thread()
+    
+    def process(self, user_message: UserMessage, deadline: Optional[Deadline] = None) -> AgentResponse:
         """
         Process a user message and return a response.
         
         Args:
             user_message: The user message to process
+            deadline: Optional time budget; LLM and tool calls get the time
+                that is left and no new step starts once it has passed
             
         Returns:
             Agent's response
         """
-        # Add user message to history
-        self.messages.append({"role": "user", "content": user_message.content})
-        
-        # Run the graph
-        try:
-            # Initialize graph state
-            state = AgentState(
-                messages=self.messages.copy(),
-                tool_calls=[],
-                current_tool_call=None,
-                current_tool_result=None,
-                response=None
-            )
+        with tracing.span("agent.process", framework="langgraph_functional"):
+            self.request_count += 1
+            # Add user message to the messages the graph has not seen yet
+            self.messages.append({"role": "user", "content": user_message.content})
             
-            # Execute the graph
-            result = self.graph.invoke(state)
-            
-            # Extract final messages
-            final_messages = result["messages"]
-            self.messages = final_messages
+            if deadline and deadline.expired():
+                self.deadline_exceeded_count += 1
+                return AgentResponse(
+                    content="I ran out of time before I could answer.",
+                    tool_calls=[]
+                )
+        
+            # Run the graph
+            try:
+                # Send only the new messages; the checkpointer holds the
+                # rest of the thread. Updates carry just what each node
+                # added, so this turn's messages need no slicing
+                new_messages, self.messages = self.messages, []
+                self._deadline = deadline
+                config = {
+                    "configurable": {"thread_id": self.thread_id},
+                    "recursion_limit": 2 * MAX_ITERATIONS + 1
+                }
+                turn_messages = []
+                # The span measures LangGraph overhead around the nested
+                # llm.complete and tool.execute spans
+                with tracing.span("langgraph.invoke", messages=len(new_messages)):
+                    # Checkpoint once per turn instead of after every step
+                    for update in self.graph.stream({"messages": new_messages}, config,
+                                                    stream_mode="updates", durability="exit"):
+                        for node_update in update.values():
+                            turn_messages.extend(node_update["messages"])
             
-            # Extract tool calls
-            tool_calls_list = []
-            for msg in final_messages:
-                if msg.get("role") == "assistant" and "tool_calls" in msg:
-                    for tc in msg["tool_calls"]:
+                # Extract tool calls
+                tool_calls_list = []
+                for msg in turn_messages:
+                    for tc in msg.get("tool_calls") or []:
                         self.tool_calls_count += 1
                         tool_calls_list.append(ToolCall(
                             tool_name=tc["function"]["name"],
-                            tool_input=json.loads(tc["function"]["arguments"])
+                            tool_input=codec.loads(tc["function"]["arguments"])
                         ))
             
-            # Find the final assistant message
-            final_content = ""
-            for msg in reversed(final_messages):
-                if msg.get("role") == "assistant" and msg.get("content"):
-                    final_content = msg["content"]
-                    break
+                # Find the final assistant message
+                final_content = ""
+                for msg in reversed(turn_messages):
+                    if msg["role"] == "assistant" and msg.get("content"):
+                        final_content = msg["content"]
+                        break
             
-            return AgentResponse(
-                content=final_content,
-                tool_calls=tool_calls_list
-            )
+                return AgentResponse(
+                    content=final_content,
+                    tool_calls=tool_calls_list
+                )
             
-        except Exception as e:
-            self.error_count += 1
-            print(f"Error in LangGraph agent processing: {e}")
-            return AgentResponse(
-                content=f"Error: {str(e)}",
-                tool_calls=[]
-            )
+            except AdmissionRejected:
+                # Shed by the LLM scheduler: the caller decides whether to retry
+                raise
+            
+            except DeadlineExceeded:
+                self.deadline_exceeded_count += 1
+                return AgentResponse(
+                    content="I ran out of time before I could answer.",
+                    tool_calls=[]
+                )
+            
+            except Exception as e:
+                self.error_count += 1
+                print(f"Error in LangGraph agent processing: {e}")
+                return AgentResponse(
+                    content=f"Error: {str(e)}",
+                    tool_calls=[]
+                )
+            
+            finally:
+                self._deadline = None
     
     def reset(self) -> None:
         """
         Reset the agent's state.
         """
-        self.messages = [
-            {"role": "system", "content": self.system_prompt}
-        ]
+        self._start_thread()
         
     def get_metrics(self) -> AgentMetrics:
         """
@@ -234,6 +349,8 @@ class LangGraphFunctionalAgent(BaseAgent):
             total_tokens=self.total_tokens,
             execution_time=execution_time,
             tool_calls_count=self.tool_calls_count,
-            success_rate=1.0 if self.error_count == 0 else (1.0 - (self.error_count / self.tool_calls_count if self.tool_calls_count > 0 else 1.0)),
-            error_count=self.error_count
+            request_count=self.request_count,
+            success_rate=1.0 - self.error_count / self.request_count if self.request_count else 1.0,
+            error_count=self.error_count,
+            deadline_exceeded_count=self.deadline_exceeded_count
         )
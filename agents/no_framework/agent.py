@@ -1,21 +1,42 @@
 """
 No framework baseline implementation of the agent.
 """
-import json
+import os
 import time
 from typing import Dict, Any, List, Optional, Union
 
 from common.schema import UserMessage, AgentResponse, AgentMetrics, ToolCall
-from common.tools import execute_tool
+from common.tools import TOOLS, execute_tool, tool_definitions
+from common.result_shaping import ResultShaper, EXPAND_RESULT_TOOL, get_shape
 from common.llm import LLMClient
+from common.deadline import Deadline, DeadlineExceeded
+from common.tool_selection import ToolSelector, recent_user_text
+from common.scheduler import AdmissionRejected
+from common.loop_guard import ToolCallTracker, ITERATION_BUDGET, STOP_HINT, query_class
+from common import tracing
+from common import codec
 from agents.base_agent import BaseAgent
 
 
+# Opening of the answer when a turn is cut short, by stop reason: with
+# partial results and without any
+STOP_MESSAGES = {
+    "deadline": ("I ran out of time before finishing.",
+                 "I ran out of time before I could answer."),
+    "repeated_calls": ("I stopped because I kept repeating the same tool calls.",
+                       "I stopped because I kept repeating the same tool calls without finding an answer."),
+    "iteration_cap": ("I reached the step limit for this request before finishing.",
+                      "I reached the step limit for this request before I could answer."),
+}
+
+
 class NoFrameworkAgent(BaseAgent):
     """
     Implementation of an agent using no framework, just raw LLM calls.
     """
     
+    metrics_framework = "no_framework"
+    
     def __init__(self, model: str = None):
         """
         Initialize the agent.
@@ -31,72 +52,35 @@ class NoFrameworkAgent(BaseAgent):
         - get_weather: Get the current weather for a location
         - search_knowledge_base: Search a knowledge base for information
         - calculate: Evaluate a mathematical expression
+        - expand_result: Get the full content of a truncated tool result
         
         Use these tools when needed to provide accurate and helpful responses.
         """
-        self.tool_definitions = [
-            {
-                "type": "function",
-                "function": {
-                    "name": "get_weather",
-                    "description": "Get the current weather for a location",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "location": {
-                                "type": "string",
-                                "description": "The location to get weather for"
-                            }
-                        },
-                        "required": ["location"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "search_knowledge_base",
-                    "description": "Search a knowledge base for information",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "query": {
-                                "type": "string",
-                                "description": "The search query"
-                            },
-                            "max_results": {
-                                "type": "integer",
-                                "description": "Maximum number of results to return"
-                            }
-                        },
-                        "required": ["query"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "calculate",
-                    "description": "Evaluate a mathematical expression",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "expression": {
-                                "type": "string",
-                                "description": "The expression to evaluate"
-                            }
-                        },
-                        "required": ["expression"]
-                    }
-                }
-            }
-        ]
+        self.tool_definitions = tool_definitions() + [EXPAND_RESULT_TOOL]
+        
+        # Offer only the most relevant tools per call when AGENT_TOOL_TOP_K is set
+        top_k = int(os.getenv("AGENT_TOOL_TOP_K", "0"))
+        self.tool_selector = (
+            ToolSelector(self.tool_definitions, k=top_k, pinned=[EXPAND_RESULT_TOOL["function"]["name"]])
+            if top_k > 0 else None
+        )
+        
+        # Shapes tool results before they enter the prompt
+        self.shaper = ResultShaper()
+        
+        # Iteration caps per query class, learned across sessions
+        self.iteration_budget = ITERATION_BUDGET
         
         # Metrics
         self.total_tokens = 0
         self.start_time = time.time()
+        self.request_count = 0
         self.tool_calls_count = 0
         self.error_count = 0
+        self.deadline_exceeded_count = 0
+        self.iterations_saved = 0
+        self.iteration_cap_truncations = 0
+        self.repeated_tool_calls = 0
         
     def initialize(self) -> None:
         """
@@ -105,90 +89,205 @@ class NoFrameworkAgent(BaseAgent):
         self.messages = [
             {"role": "system", "content": self.system_prompt}
         ]
+        self.shaper.reset()
     
-    def process(self, user_message: UserMessage) -> AgentResponse:
+    def process(self, user_message: UserMessage, deadline: Optional[Deadline] = None) -> AgentResponse:
         """
         Process a user message and return a response.
         
         Args:
             user_message: The user message to process
+            deadline: Optional time budget; LLM and tool calls get the time
+                that is left and the loop stops early with a partial answer
             
         Returns:
             Agent's response
         """
-        # Add user message to history
-        self.messages.append({"role": "user", "content": user_message.content})
-        
-        # Process the conversation
-        MAX_ITERATIONS = 10
-        iteration = 0
-        final_content = ""
-        tool_calls = []
-        
-        while iteration < MAX_ITERATIONS:
-            try:
-                # Get LLM response
-                response = self.llm.complete(
-                    messages=self.messages,
-                    tools=self.tool_definitions
-                )
-                
-                # Update token count from response if available
-                if hasattr(response, "usage") and response.usage:
-                    self.total_tokens += response.usage.total_tokens
-                
-                # Extract assistant message
-                assistant_message = response.choices[0].message
-                
-                # Add to conversation history
-                self.messages.append(assistant_message)
-                
-                # Check if tool calls are required
-                if hasattr(assistant_message, "tool_calls") and assistant_message.tool_calls:
-                    self.tool_calls_count += len(assistant_message.tool_calls)
-                    
-                    # Process each tool call
-                    for tool_call in assistant_message.tool_calls:
-                        function_name = tool_call.function.name
-                        function_args = json.loads(tool_call.function.arguments)
+        with tracing.span("agent.process", framework="no_framework") as turn_span:
+            self.request_count += 1
+            # Add user message to history
+            self.messages.append({"role": "user", "content": user_message.content})
+            turn_start = len(self.messages)
+            
+            # Process the conversation
+            MAX_ITERATIONS = 10
+            iteration = 0
+            iteration_cap = MAX_ITERATIONS
+            turn_class = None
+            tracker = ToolCallTracker()
+            answered = False
+            stopped_early = False
+            final_content = ""
+            tool_calls = []
+            selection_text = recent_user_text(self.messages) if self.tool_selector is not None else None
+            
+            while iteration < iteration_cap:
+                try:
+                    with tracing.span("agent.iteration", iteration=iteration):
+                        if self.tool_selector is not None:
+                            tools = self.tool_selector.select(
+                                selection_text, used={call.tool_name for call in tool_calls}
+                            )
+                        else:
+                            tools = self.tool_definitions
+                        
+                        # Get LLM response within the time left
+                        response = self.llm.complete(
+                            messages=self.messages,
+                            tools=tools,
+                            timeout=deadline.timeout() if deadline else None
+                        )
+                        # A final answer that arrives late is still returned; a call
+                        # that failed on the timeout or asks for more tools is not
+                        if deadline and deadline.expired() and (
+                            isinstance(response, dict) or getattr(response.choices[0].message, "tool_calls", None)
+                        ):
+                            raise DeadlineExceeded(f"Deadline of {deadline.budget}s exceeded")
+                        
+                        # Update token count from response if available
+                        if hasattr(response, "usage") and response.usage:
+                            self.total_tokens += response.usage.total_tokens
+                        
+                        # Extract assistant message
+                        assistant_message = response.choices[0].message
                         
-                        # Record the tool call
-                        tool_calls.append(ToolCall(
-                            tool_name=function_name,
-                            tool_input=function_args
-                        ))
+                        # The model ignored the stop hint: answer with what we have
+                        if tracker.hinted and getattr(assistant_message, "tool_calls", None):
+                            final_content = self._partial_answer(turn_start, "repeated_calls")
+                            self.messages.append({"role": "assistant", "content": final_content})
+                            stopped_early = True
+                            break
                         
-                        # Execute the tool
-                        tool_result = execute_tool(function_name, function_args)
+                        # Add to conversation history
+                        self.messages.append(assistant_message)
                         
-                        # Add tool result to conversation
-                        self.messages.append({
-                            "role": "tool",
-                            "tool_call_id": tool_call.id,
-                            "content": json.dumps(tool_result)
-                        })
+                        # Check if tool calls are required
+                        if hasattr(assistant_message, "tool_calls") and assistant_message.tool_calls:
+                            self.tool_calls_count += len(assistant_message.tool_calls)
+                            
+                            # Process each tool call
+                            for tool_call in assistant_message.tool_calls:
+                                function_name = tool_call.function.name
+                                function_args = codec.loads(tool_call.function.arguments)
+                                
+                                # Record the tool call
+                                tool_calls.append(ToolCall(
+                                    tool_name=function_name,
+                                    tool_input=function_args
+                                ))
+                                
+                                # Execute the tool, skipping it once the deadline has passed
+                                # and reusing the result of an identical earlier call
+                                previous = tracker.previous(function_name, function_args)
+                                if deadline and deadline.expired():
+                                    content = codec.dumps({"error": "Deadline exceeded", "result": None})
+                                elif previous is not None:
+                                    self.repeated_tool_calls += 1
+                                    content = previous
+                                elif function_name == "expand_result":
+                                    content = codec.dumps(self.shaper.expand_call(function_args))
+                                else:
+                                    tool_result = execute_tool(
+                                        function_name, function_args,
+                                        timeout=deadline.remaining() if deadline else None
+                                    )
+                                    content = self.shaper.shape(
+                                        tool_call.id, tool_result, get_shape(TOOLS.get(function_name))
+                                    )
+                                
+                                # Add shaped tool result to conversation
+                                tracker.record(function_name, function_args, content)
+                                self.messages.append({
+                                    "role": "tool",
+                                    "tool_call_id": tool_call.id,
+                                    "content": content
+                                })
+                            
+                            # The first tool calls decide the query class and its cap
+                            if turn_class is None:
+                                turn_class = query_class(tc.function.name for tc in assistant_message.tool_calls)
+                                iteration_cap = self.iteration_budget.cap_for(turn_class)
+                            
+                            if tracker.stop_hint_due:
+                                self.messages.append({"role": "system", "content": STOP_HINT})
+                                tracker.hinted = True
+                            
+                            # Continue to next iteration
+                            iteration += 1
+                            continue
                     
-                    # Continue to next iteration
-                    iteration += 1
-                    continue
+                    # If no tool calls, we're done
+                    final_content = assistant_message.content
+                    answered = True
+                    break
                 
-                # If no tool calls, we're done
-                final_content = assistant_message.content
-                break
+                except DeadlineExceeded:
+                    self.deadline_exceeded_count += 1
+                    turn_span.set_attribute("deadline_exceeded", True)
+                    final_content = self._partial_answer(turn_start, "deadline")
+                    self.messages.append({"role": "assistant", "content": final_content})
+                    break
+                    
+                except AdmissionRejected:
+                    # Shed by the LLM scheduler: the caller decides whether to retry
+                    raise
+                    
+                except Exception as e:
+                    self.error_count += 1
+                    print(f"Error in agent processing: {e}")
+                    final_content = f"Error: {str(e)}"
+                    break
                 
-            except Exception as e:
-                self.error_count += 1
-                print(f"Error in agent processing: {e}")
-                final_content = f"Error: {str(e)}"
-                break
+                iteration += 1
+            
+            llm_calls = iteration if iteration >= iteration_cap else iteration + 1
+            truncated = iteration >= iteration_cap
+            if truncated:
+                # Out of iterations: answer with what we have
+                final_content = self._partial_answer(turn_start, "iteration_cap")
+                self.messages.append({"role": "assistant", "content": final_content})
+                self.iteration_cap_truncations += 1
+            if stopped_early:
+                # The model kept repeating a call after the stop hint, so it
+                # would have used the rest of the turn's cap
+                self.iterations_saved += iteration_cap - llm_calls
+            if answered or truncated:
+                self.iteration_budget.observe(turn_class or "chat", llm_calls, truncated=truncated)
+            
+            turn_span.set_attribute("iterations", llm_calls)
+            turn_span.set_attribute("repeated_tool_calls", tracker.repeats)
+            turn_span.set_attribute("tool_calls", len(tool_calls))
             
-            iteration += 1
+            # Return the final response
+            return AgentResponse(
+                content=final_content,
+                tool_calls=tool_calls
+            )
+    
+    def _partial_answer(self, turn_start: int, reason: str) -> str:
+        """
+        Build the best answer available when a turn is cut short.
         
-        # Return the final response
-        return AgentResponse(
-            content=final_content,
-            tool_calls=tool_calls
-        )
+        Args:
+            turn_start: Index of the first message after the user message
+            reason: Why the turn stopped, a key of STOP_MESSAGES
+            
+        Returns:
+            The latest assistant text of the turn, or the tool results gathered so far
+        """
+        turn_messages = self.messages[turn_start:]
+        for message in reversed(turn_messages):
+            content = message.get("content") if isinstance(message, dict) else getattr(message, "content", None)
+            role = message.get("role") if isinstance(message, dict) else getattr(message, "role", None)
+            if role == "assistant" and content:
+                return content
+        
+        results = [m["content"] for m in turn_messages
+                   if isinstance(m, dict) and m.get("role") == "tool" and codec.loads(m["content"])["error"] is None]
+        partial, nothing = STOP_MESSAGES[reason]
+        if results:
+            return partial + " Partial results: " + " ".join(results)
+        return nothing
     
     def reset(self) -> None:
         """
@@ -197,6 +296,7 @@ class NoFrameworkAgent(BaseAgent):
         self.messages = [
             {"role": "system", "content": self.system_prompt}
         ]
+        self.shaper.reset()
         
     def get_metrics(self) -> AgentMetrics:
         """
@@ -211,6 +311,10 @@ class NoFrameworkAgent(BaseAgent):
             total_tokens=self.total_tokens,
             execution_time=execution_time,
             tool_calls_count=self.tool_calls_count,
-            success_rate=1.0 if self.error_count == 0 else (1.0 - (self.error_count / self.tool_calls_count if self.tool_calls_count > 0 else 1.0)),
-            error_count=self.error_count
+            request_count=self.request_count,
+            success_rate=1.0 - self.error_count / self.request_count if self.request_count else 1.0,
+            error_count=self.error_count,
+            deadline_exceeded_count=self.deadline_exceeded_count,
+            iterations_saved=self.iterations_saved,
+            iteration_cap_truncations=self.iteration_cap_truncations
         )
@@ -0,0 +1,229 @@
+"""
+Deterministic fast-path router in front of any agent.
+
+FastPathRouterAgent answers trivial queries without the LLM. Each route is
+an anchored pattern matching the whole message, such as pure arithmetic
+or a weather lookup for a single city, so only unambiguous queries are
+routed. The router calls the tool through common.tools and phrases the
+answer from a template. Anything else, including tool errors, falls back
+to the wrapped agent.
+"""
+import re
+import time
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+from common.schema import UserMessage, AgentResponse, AgentMetrics, ToolCall
+from common.deadline import Deadline
+from common.tools import execute_tool
+from common import metrics
+from agents.base_agent import BaseAgent
+
+_POLITE = r"(?:(?:hey|hi|ok|okay|please)[,!]?\s+)?(?:(?:can|could) you\s+)?(?:please\s+)?"
+_EXPRESSION = r"(?P<expression>[\d\s.()+\-*/^]*\d[\d\s.()]*[+\-*/^][\d\s.()+\-*/^]*\d[\d\s.)]*)"
+
+ARITHMETIC = re.compile(
+    rf"^{_POLITE}(?:calculate|compute|evaluate|what(?:'s| is))\s+{_EXPRESSION}\s*[?.!]?$",
+    re.IGNORECASE,
+)
+PERCENT_OF = re.compile(
+    rf"^{_POLITE}(?:calculate|compute|what(?:'s| is))\s+(?P<percent>\d+(?:\.\d+)?)\s*%\s*of\s+"
+    r"(?P<amount>\d+(?:\.\d+)?)\s*[?.!]?$",
+    re.IGNORECASE,
+)
+WEATHER = re.compile(
+    rf"^{_POLITE}(?:(?:what(?:'s| is)|how(?:'s| is)) the weather(?: like)?|weather|tell me the weather)"
+    r" in (?P<location>[A-Za-z][A-Za-z .'-]*?)(?: (?:right now|today|now))?\s*[?.!]?$",
+    re.IGNORECASE,
+)
+
+# Words that qualify a weather question beyond "current weather in <place>"
+# ("in Boston tomorrow", "in Boston in Celsius"); such questions go to the agent
+_WEATHER_QUALIFIERS = frozenset("""
+in at on for and or with tomorrow yesterday tonight morning afternoon evening night week weekend
+next last this forecast celsius fahrenheit degrees monday tuesday wednesday thursday friday saturday sunday
+""".split())
+
+
+def _format_number(value: Any) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    return str(value)
+
+
+def route_arithmetic(text: str) -> Optional[Tuple[ToolCall, Callable[[Dict[str, Any]], str]]]:
+    """
+    Route pure arithmetic ("Can you calculate 345 * 892?", "What's 25% of 840?").
+    """
+    percent = PERCENT_OF.match(text)
+    if percent:
+        expression = f"{percent.group('percent')} / 100 * {percent.group('amount')}"
+        label = f"{percent.group('percent')}% of {percent.group('amount')}"
+    else:
+        match = ARITHMETIC.match(text)
+        if not match:
+            return None
+        label = " ".join(match.group("expression").split())
+        expression = label.replace("^", "**")
+
+    def answer(result: Dict[str, Any]) -> str:
+        return f"{label} = {_format_number(result['result'])}"
+
+    return ToolCall(tool_name="calculate", tool_input={"expression": expression}), answer
+
+
+def route_weather(text: str) -> Optional[Tuple[ToolCall, Callable[[Dict[str, Any]], str]]]:
+    """
+    Route a weather lookup for a single place ("What's the weather like in Boston?").
+    """
+    match = WEATHER.match(text)
+    if not match or _WEATHER_QUALIFIERS.intersection(match.group("location").lower().split()):
+        return None
+
+    def answer(result: Dict[str, Any]) -> str:
+        return (f"The weather in {result['location']} is {result['conditions']} at {result['temperature']}°F, "
+                f"with {result['humidity']}% humidity and wind at {result['wind_speed']} mph.")
+
+    return ToolCall(tool_name="get_weather", tool_input={"location": match.group("location").strip()}), answer
+
+
+# Routes tried in order; each returns (tool call, answer template) or None
+ROUTES = [route_arithmetic, route_weather]
+
+
+def match_route(text: str, routes: Optional[List[Callable]] = None):
+    """
+    Find the fast path for a message.
+
+    Args:
+        text: The user message
+        routes: Routes to try, defaults to ROUTES
+
+    Returns:
+        (tool call, answer template) of the first matching route, or None
+    """
+    text = text.strip()
+    for route in routes or ROUTES:
+        matched = route(text)
+        if matched is not None:
+            return matched
+    return None
+
+
+class FastPathRouterAgent(BaseAgent):
+    """
+    Agent wrapper answering trivial queries directly through the tools.
+    """
+
+    # The wrapped agent records live metrics
+    metrics_framework = None
+
+    def __init__(self, agent: BaseAgent, routes: Optional[List[Callable]] = None):
+        """
+        Initialize the router.
+
+        Args:
+            agent: The agent handling everything that is not routed
+            routes: Routes to try, defaults to ROUTES
+        """
+        self.agent = agent
+        self.routes = routes or ROUTES
+        self.routed = 0
+        self.fallbacks = 0
+        self.route_time = 0.0
+
+    def initialize(self) -> None:
+        """
+        Initialize the wrapped agent.
+        """
+        self.agent.initialize()
+
+    def try_route(self, text: str) -> Optional[AgentResponse]:
+        """
+        Answer a message on the fast path if a route matches and its tool succeeds.
+
+        Args:
+            text: The user message
+
+        Returns:
+            The templated response, or None to fall back to the agent
+        """
+        start_time = time.perf_counter()
+        try:
+            matched = match_route(text, self.routes)
+            if matched is None:
+                return None
+            tool_call, answer = matched
+            outcome = execute_tool(tool_call.tool_name, tool_call.tool_input)
+            result = outcome["result"]
+            if outcome["error"] is not None or (isinstance(result, dict) and result.get("error")):
+                return None
+            return AgentResponse(content=answer(result), tool_calls=[tool_call])
+        finally:
+            self.route_time += time.perf_counter() - start_time
+
+    def process(self, user_message: UserMessage, deadline: Optional[Deadline] = None) -> AgentResponse:
+        """
+        Answer on the fast path when possible, else run the wrapped agent.
+
+        Args:
+            user_message: The user message to process
+            deadline: Optional time budget passed to the wrapped agent
+
+        Returns:
+            Agent's response
+        """
+        start_time = time.perf_counter()
+        response = self.try_route(user_message.content)
+        if response is None:
+            self.fallbacks += 1
+            return self.agent.process(user_message, deadline)
+
+        self.routed += 1
+        metrics.record_agent_request(self, "fast_path", time.perf_counter() - start_time)
+        # Keep the exchange in the wrapped agent's history for later turns
+        messages = getattr(self.agent, "messages", None)
+        if isinstance(messages, list):
+            messages.append({"role": "user", "content": user_message.content})
+            messages.append({"role": "assistant", "content": response.content})
+        return response
+
+    def reset(self) -> None:
+        """
+        Reset the wrapped agent.
+        """
+        self.agent.reset()
+
+    def fork(self) -> "FastPathRouterAgent":
+        """
+        Create a router with the same routes over a fork of the wrapped agent.
+
+        Returns:
+            A new router for another session
+        """
+        return FastPathRouterAgent(self.agent.fork(), self.routes)
+
+    def get_metrics(self) -> AgentMetrics:
+        """
+        Get metrics of the wrapped agent; routing counts come from stats().
+
+        Returns:
+            AgentMetrics object with performance data
+        """
+        return self.agent.get_metrics()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get routing metrics.
+
+        Returns:
+            Dict with routed and fallback counts, the routed share and time spent routing
+        """
+        total = self.routed + self.fallbacks
+        return {
+            "routed": self.routed,
+            "fallbacks": self.fallbacks,
+            "routed_share": self.routed / total if total else 0.0,
+            "route_time": self.route_time,
+        }
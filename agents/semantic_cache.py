@@ -0,0 +1,283 @@
+"""
+Semantic near-duplicate answer cache in front of any agent.
+
+SemanticCacheAgent wraps a BaseAgent. The first message of a session is
+embedded locally and looked up in a shared in-memory vector index. A near
+neighbour above the similarity threshold whose numbers and symbols (such
+as arithmetic operators) match exactly is answered from the cache without
+running the agent. Later turns depend on the conversation so far and
+always go to the wrapped agent.
+
+Freshness follows the tools an answer used. By default an answer expires
+with the shortest ttl of its tools' cache policies; answers relying on a
+tool with the "never" policy are not cached.
+"""
+import time
+import threading
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from common.schema import UserMessage, AgentResponse, AgentMetrics
+from common.deadline import Deadline
+from common.embedding import DEFAULT_DIM, embed, match_key
+from common.tool_cache import get_policy
+from common.tools import TOOLS
+from common import metrics
+from agents.base_agent import BaseAgent
+
+
+class SemanticAnswerCache:
+    """
+    Thread-safe vector index of answered first messages, shared across sessions.
+    """
+
+    def __init__(self,
+                 threshold: float = 0.9,
+                 default_ttl: Optional[float] = 3600.0,
+                 tool_ttls: Optional[Dict[str, Optional[float]]] = None,
+                 max_entries: int = 10000,
+                 dim: int = DEFAULT_DIM):
+        """
+        Initialize the cache.
+
+        Args:
+            threshold: Minimum cosine similarity of a hit
+            default_ttl: Lifetime of answers that used no tools, None for no expiry
+            tool_ttls: Per-tool lifetime overriding the tool's cache policy,
+                None for no expiry
+            max_entries: Maximum cached answers, oldest are replaced first
+            dim: Embedding dimension
+        """
+        self.threshold = threshold
+        self.default_ttl = default_ttl
+        self.tool_ttls = tool_ttls or {}
+        self.max_entries = max_entries
+        self.dim = dim
+        # Preallocated rows; the first len(self._entries) are in use
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._expires = np.zeros(0, dtype=np.float64)
+        self._entries: List[Optional[Dict[str, Any]]] = []
+        self._next_slot = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.latency_saved = 0.0
+
+    def ttl_for(self, response: AgentResponse) -> Optional[float]:
+        """
+        Compute how long an answer stays fresh from the tools it used.
+
+        Args:
+            response: The agent's response
+
+        Returns:
+            Lifetime in seconds, None for no expiry, or 0 if it must not be cached
+        """
+        ttls = [self.default_ttl] if not response.tool_calls else []
+        for call in response.tool_calls:
+            if call.tool_name in self.tool_ttls:
+                ttls.append(self.tool_ttls[call.tool_name])
+                continue
+            policy = get_policy(TOOLS[call.tool_name]) if call.tool_name in TOOLS else None
+            if policy is None or policy.kind == "never":
+                return 0
+            ttls.append(policy.ttl if policy.kind == "ttl" else None)
+        bounded = [t for t in ttls if t is not None]
+        return min(bounded) if bounded else None
+
+    def lookup(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Find a fresh cached answer for a near-duplicate query.
+
+        Args:
+            query: The user message
+
+        Returns:
+            The cache entry (response, latency, query), or None on a miss
+        """
+        vector = embed(query, self.dim)
+        query_key = match_key(query)
+        with self._lock:
+            if not vector.any() or not self._entries:
+                self.misses += 1
+                return None
+            size = len(self._entries)
+            scores = self._vectors[:size] @ vector
+            scores[self._expires[:size] <= time.monotonic()] = -1.0
+            # Check the best few candidates; numbers and operators must match exactly
+            k = min(5, len(scores))
+            for slot in np.argsort(-scores)[:k]:
+                if scores[slot] < self.threshold:
+                    break
+                entry = self._entries[slot]
+                if entry["match_key"] == query_key:
+                    self.hits += 1
+                    self.latency_saved += entry["latency"]
+                    return entry
+            self.misses += 1
+            return None
+
+    def store(self, query: str, response: AgentResponse, latency: float) -> bool:
+        """
+        Cache the answer to a first message.
+
+        Args:
+            query: The user message
+            response: The agent's response
+            latency: Seconds the agent took, credited as saved on each hit
+
+        Returns:
+            True if the answer was cached
+        """
+        ttl = self.ttl_for(response)
+        vector = embed(query, self.dim)
+        if ttl == 0 or not vector.any():
+            return False
+
+        expires = np.inf if ttl is None else time.monotonic() + ttl
+        entry = {"query": query, "response": response, "latency": latency, "match_key": match_key(query)}
+        with self._lock:
+            size = len(self._entries)
+            if size < self.max_entries:
+                if size == len(self._vectors):
+                    self._grow()
+                self._vectors[size] = vector
+                self._expires[size] = expires
+                self._entries.append(entry)
+            else:
+                # Reuse an expired slot if there is one, else the oldest slot
+                expired = np.flatnonzero(self._expires[:size] <= time.monotonic())
+                slot = int(expired[0]) if len(expired) else self._next_slot
+                self._next_slot = (slot + 1) % self.max_entries
+                self._vectors[slot] = vector
+                self._expires[slot] = expires
+                self._entries[slot] = entry
+        return True
+
+    def _grow(self) -> None:
+        """
+        Double the preallocated rows, up to max_entries, so inserts copy the
+        matrix only a logarithmic number of times. Called with the lock held.
+        """
+        capacity = min(self.max_entries, max(16, 2 * len(self._vectors)))
+        vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        vectors[:len(self._vectors)] = self._vectors
+        expires = np.zeros(capacity, dtype=np.float64)
+        expires[:len(self._expires)] = self._expires
+        self._vectors, self._expires = vectors, expires
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache metrics.
+
+        Returns:
+            Dict with hits, misses, hit_rate, latency_saved (seconds) and entries
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "latency_saved": self.latency_saved,
+                "entries": len(self._entries),
+            }
+
+
+class SemanticCacheAgent(BaseAgent):
+    """
+    Agent wrapper answering near-duplicate first messages from a semantic cache.
+    """
+
+    # The wrapped agent records live metrics
+    metrics_framework = None
+
+    def __init__(self, agent: BaseAgent, cache: Optional[SemanticAnswerCache] = None):
+        """
+        Initialize the wrapper.
+
+        Args:
+            agent: The agent answering cache misses
+            cache: Cache to use; share one instance across sessions
+        """
+        self.agent = agent
+        self.cache = cache or SemanticAnswerCache()
+        self.turns = 0
+
+    def initialize(self) -> None:
+        """
+        Initialize the wrapped agent.
+        """
+        self.agent.initialize()
+        self.turns = 0
+
+    def process(self, user_message: UserMessage, deadline: Optional[Deadline] = None) -> AgentResponse:
+        """
+        Answer from the cache on a near-duplicate first message, else run the agent.
+
+        Args:
+            user_message: The user message to process
+            deadline: Optional time budget passed to the wrapped agent
+
+        Returns:
+            Agent's response
+        """
+        first_turn = self.turns == 0
+        self.turns += 1
+
+        if first_turn:
+            start_time = time.perf_counter()
+            entry = self.cache.lookup(user_message.content)
+            if entry is not None:
+                response = entry["response"].model_copy(deep=True)
+                self._record_exchange(user_message.content, response.content)
+                metrics.record_agent_request(self, "cache_hit", time.perf_counter() - start_time)
+                return response
+
+        before = self.agent.get_metrics()
+        start_time = time.perf_counter()
+        response = self.agent.process(user_message, deadline)
+        latency = time.perf_counter() - start_time
+        after = self.agent.get_metrics()
+
+        failed = (after.error_count > before.error_count
+                  or after.deadline_exceeded_count > before.deadline_exceeded_count)
+        if first_turn and not failed:
+            self.cache.store(user_message.content, response, latency)
+        return response
+
+    def _record_exchange(self, question: str, answer: str) -> None:
+        """
+        Add a cached exchange to the wrapped agent's history so later turns keep context.
+        """
+        messages = getattr(self.agent, "messages", None)
+        if isinstance(messages, list):
+            messages.append({"role": "user", "content": question})
+            messages.append({"role": "assistant", "content": answer})
+
+    def reset(self) -> None:
+        """
+        Reset the wrapped agent; the next message is a first message again.
+        """
+        self.agent.reset()
+        self.turns = 0
+
+    def fork(self) -> "SemanticCacheAgent":
+        """
+        Create a wrapper sharing this cache over a fork of the wrapped agent.
+
+        Returns:
+            A new wrapper for another session
+        """
+        return SemanticCacheAgent(self.agent.fork(), self.cache)
+
+    def get_metrics(self) -> AgentMetrics:
+        """
+        Get metrics of the wrapped agent; cache metrics come from cache.stats().
+
+        Returns:
+            AgentMetrics object with performance data
+        """
+        return self.agent.get_metrics()
@@ -0,0 +1,139 @@
+"""
+JSON codec used on the hot path (tool arguments, tool results, cache keys,
+RPC frames, result files).
+
+The orjson backend is used when installed and the stdlib json module
+otherwise; set AGENT_JSON_CODEC=json to force the stdlib. Both backends
+write compact UTF-8 JSON that decodes to the same values, but the text is
+only identical within one backend: float exponents differ (1e+20 vs 1e20)
+and json writes NaN and Infinity where orjson writes null. Cache keys and
+fingerprints therefore agree across processes using the same backend.
+Values json cannot encode natively are converted by to_jsonable():
+datetimes and dates become ISO strings, sets become lists, pydantic models
+and dataclasses become dicts (as orjson encodes dataclasses), numpy scalars
+and arrays become numbers and lists, and anything else becomes str(value).
+"""
+import os
+import json
+import datetime
+import dataclasses
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def to_jsonable(value: Any) -> Any:
+    """
+    Convert a value json cannot encode into one it can.
+
+    Args:
+        value: The value
+
+    Returns:
+        A JSON-compatible replacement
+    """
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if hasattr(value, "tolist"):
+        # numpy scalars and arrays
+        return value.tolist()
+    return str(value)
+
+
+class JsonCodec:
+    """
+    Encoder and decoder over one backend.
+    """
+
+    def __init__(self, backend: str = "auto"):
+        """
+        Initialize the codec.
+
+        Args:
+            backend: "orjson", "json", or "auto" for orjson when installed
+        """
+        if backend == "auto":
+            backend = "orjson" if orjson is not None else "json"
+        if backend == "orjson" and orjson is None:
+            raise ValueError("The orjson backend requires the orjson package")
+        if backend not in ("orjson", "json"):
+            raise ValueError(f"Unknown JSON backend: {backend}")
+        self.backend = backend
+
+    def dumpb(self, value: Any, sort_keys: bool = False, strict: bool = False) -> bytes:
+        """
+        Encode a value as compact UTF-8 JSON bytes.
+
+        Args:
+            value: The value
+            sort_keys: Whether to sort object keys, e.g. for cache keys
+            strict: Raise TypeError for non-JSON types instead of converting them
+
+        Returns:
+            The encoded bytes
+        """
+        if self.backend == "orjson":
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            if sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            try:
+                return orjson.dumps(value, default=None if strict else to_jsonable, option=option)
+            except orjson.JSONEncodeError:
+                # e.g. integers beyond 64 bits, which the stdlib handles
+                pass
+        return self._stdlib_dumps(value, sort_keys, strict).encode()
+
+    def dumps(self, value: Any, sort_keys: bool = False, strict: bool = False) -> str:
+        """
+        Encode a value as compact JSON text.
+
+        Args:
+            value: The value
+            sort_keys: Whether to sort object keys, e.g. for cache keys
+            strict: Raise TypeError for non-JSON types instead of converting them
+
+        Returns:
+            The encoded text
+        """
+        if self.backend == "orjson":
+            return self.dumpb(value, sort_keys, strict).decode()
+        return self._stdlib_dumps(value, sort_keys, strict)
+
+    def loads(self, data: Union[str, bytes, bytearray]) -> Any:
+        """
+        Decode JSON text or bytes.
+
+        Args:
+            data: The encoded value
+
+        Returns:
+            The decoded value
+
+        Raises:
+            ValueError: If data is not valid JSON (both backends raise a subclass)
+        """
+        if self.backend == "orjson":
+            return orjson.loads(data)
+        return json.loads(data)
+
+    @staticmethod
+    def _stdlib_dumps(value: Any, sort_keys: bool, strict: bool = False) -> str:
+        return json.dumps(value, separators=(",", ":"), sort_keys=sort_keys,
+                          ensure_ascii=False, default=None if strict else to_jsonable)
+
+
+# Codec shared by the process
+CODEC = JsonCodec(os.getenv("AGENT_JSON_CODEC", "auto"))
+
+dumps = CODEC.dumps
+dumpb = CODEC.dumpb
+loads = CODEC.loads
@@ -0,0 +1,68 @@
+"""
+Request deadlines shared by the agent loop, LLM calls and tool calls.
+
+A Deadline is created once per request and passed down; every blocking
+step asks it for the time that is left, so timeouts shrink as the request
+progresses instead of each step getting a fixed budget.
+"""
+import time
+from typing import Optional
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's time budget is used up."""
+
+
+class Deadline:
+    """
+    Absolute point in time by which a request must finish.
+    """
+
+    def __init__(self, seconds: float):
+        """
+        Initialize the deadline.
+
+        Args:
+            seconds: Time budget from now in seconds
+        """
+        self.budget = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """
+        Get the time left.
+
+        Returns:
+            Seconds until the deadline, 0 once it has passed
+        """
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        """
+        Check whether the deadline has passed.
+
+        Returns:
+            True once no time is left
+        """
+        return self.remaining() <= 0.0
+
+    def timeout(self, cap: Optional[float] = None) -> float:
+        """
+        Get the timeout for the next blocking step.
+
+        Args:
+            cap: The step's own timeout, if it has one
+
+        Returns:
+            The time left, limited to cap
+
+        Raises:
+            DeadlineExceeded: If no time is left
+        """
+        remaining = self.remaining()
+        if remaining <= 0.0:
+            raise DeadlineExceeded(f"Deadline of {self.budget}s exceeded")
+        return remaining if cap is None else min(remaining, cap)
+
+    def __repr__(self) -> str:
+        return f"Deadline(budget={self.budget!r}, remaining={self.remaining():.3f})"
@@ -0,0 +1,82 @@
+"""
+Local text embeddings for near-duplicate detection.
+
+Embeddings are hashed bags of normalized content words (the hashing
+trick), so paraphrases such as "weather in Boston?" and "what's Boston's
+weather like" map to the same vector without a model or network call.
+They are meant for matching reworded queries, not for semantic search.
+"""
+import re
+import zlib
+from typing import List, Tuple
+
+import numpy as np
+
+DEFAULT_DIM = 512
+
+_WORD = re.compile(r"[a-z]+|\d+(?:\.\d+)?")
+# Numbers and symbols such as operators, "%" or "$"; sentence punctuation is ignored
+_EXACT = re.compile(r"\d+(?:\.\d+)?|[^\w\s?!.,;:'\"]")
+
+STOPWORDS = frozenset("""
+a an and are be can could do does for from give how i in is it its like me my of on
+please right s show tell that the there this to up what whats what's will with would you
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into normalized content words.
+
+    Args:
+        text: The text
+
+    Returns:
+        Lowercased words without stopwords or possessive and plural "s"
+    """
+    words = []
+    for word in _WORD.findall(text.lower().replace("'s", "")):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return words
+
+
+def match_key(text: str) -> Tuple[str, ...]:
+    """
+    Extract the parts of a text that must match exactly between near-duplicates.
+
+    The embedding drops symbols, so "calculate 2*3" and "calculate 2+3"
+    embed alike. Numbers are kept but count as one word of the bag, so in a
+    longer query a changed number barely moves the vector. Match keys
+    differ in both cases.
+
+    Args:
+        text: The text
+
+    Returns:
+        The numbers and non-word symbols (e.g. arithmetic operators) in order
+    """
+    return tuple(_EXACT.findall(text))
+
+
+def embed(text: str, dim: int = DEFAULT_DIM) -> np.ndarray:
+    """
+    Embed text as an L2-normalized hashed bag of words.
+
+    Args:
+        text: The text
+        dim: Number of hash buckets
+
+    Returns:
+        float32 vector of length dim; all zeros for text without content words
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    for word in tokenize(text):
+        h = zlib.crc32(word.encode())
+        # The sign bit keeps colliding words from adding up
+        vector[h % dim] += 1.0 if (h >> 31) & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
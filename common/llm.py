@@ -3,10 +3,17 @@ Common LLM client wrapper to ensure consistent access across frameworks.
 """
 import os
 import json
+import time
 from typing import Dict, Any, List, Optional, Union
 from dotenv import load_dotenv
 import litellm
 
+from common import tracing
+from common import metrics
+from common import scheduler
+from common.deadline import Deadline, DeadlineExceeded
+from common.offline_llm import OFFLINE_MODEL, offline_completion
+
 # Load environment variables
 load_dotenv()
 
@@ -36,40 +43,79 @@ class LLMClient:
         
     def complete(self, 
                 messages: List[Dict[str, Any]], 
-                tools: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+                tools: Optional[List[Dict[str, Any]]] = None,
+                timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         Complete a conversation with the LLM.
         
         Args:
             messages: List of messages in the conversation
             tools: List of tools available to the LLM
+            timeout: Request timeout in seconds, e.g. the time left before a deadline
             
         Returns:
             LLM response
+
+        Raises:
+            AdmissionRejected: If the LLM scheduler sheds the call
+            DeadlineExceeded: If the timeout passes while waiting for an LLM slot
         """
-        try:
-            response = litellm.completion(
-                model=self.model,
-                messages=messages,
-                temperature=self.temperature,
-                tools=tools,
-                tool_choice="auto" if tools else None
-            )
-            return response
-        except Exception as e:
-            print(f"Error calling LLM: {e}")
-            # Return a minimal error response
-            return {
-                "choices": [
-                    {
-                        "message": {
-                            "role": "assistant",
-                            "content": f"Error: Unable to get a response from the LLM. {str(e)}"
+        with tracing.span("llm.complete", model=self.model, messages=len(messages)) as span:
+            start_time = time.perf_counter()
+            ticket = None
+            try:
+                # Wait for an LLM slot of the current tenant when calls are scheduled
+                deadline = Deadline(timeout) if timeout is not None else None
+                ticket = scheduler.acquire_llm_slot(deadline)
+                if ticket is not None:
+                    span.set_attribute("queue_time", ticket.queue_time)
+                    timeout = deadline.timeout() if deadline is not None else None
+                    start_time = time.perf_counter()
+                if self.model == OFFLINE_MODEL:
+                    response = offline_completion(messages, tools, timeout=timeout)
+                else:
+                    response = litellm.completion(
+                        model=self.model,
+                        messages=messages,
+                        temperature=self.temperature,
+                        tools=tools,
+                        tool_choice="auto" if tools else None,
+                        timeout=timeout
+                    )
+                usage = getattr(response, "usage", None)
+                if usage:
+                    span.set_attribute("prompt_tokens", usage.prompt_tokens)
+                    span.set_attribute("completion_tokens", usage.completion_tokens)
+                metrics.record_llm_call(self.model, time.perf_counter() - start_time, False,
+                                        usage.prompt_tokens if usage else 0,
+                                        usage.completion_tokens if usage else 0)
+                return response
+            except (scheduler.AdmissionRejected, DeadlineExceeded) as e:
+                # Shed or expired before the provider was called: let the
+                # caller see it instead of an LLM error response
+                span.set_attribute("error", str(e))
+                status = "rejected" if isinstance(e, scheduler.AdmissionRejected) else "deadline_exceeded"
+                metrics.record_llm_call(self.model, time.perf_counter() - start_time, True, status=status)
+                raise
+            except Exception as e:
+                print(f"Error calling LLM: {e}")
+                span.set_attribute("error", str(e))
+                metrics.record_llm_call(self.model, time.perf_counter() - start_time, True)
+                # Return a minimal error response
+                return {
+                    "choices": [
+                        {
+                            "message": {
+                                "role": "assistant",
+                                "content": f"Error: Unable to get a response from the LLM. {str(e)}"
+                            }
                         }
-                    }
-                ],
-                "error": str(e)
-            }
+                    ],
+                    "error": str(e)
+                }
+            finally:
+                if ticket is not None:
+                    ticket.release()
 
     def stream_complete(self, 
                        messages: List[Dict[str, Any]], 
@@ -85,6 +131,11 @@ class LLMClient:
             Generator yielding LLM response chunks
         """
         try:
+            if self.model == OFFLINE_MODEL:
+                # Stream the offline completion as a single chunk
+                message = offline_completion(messages, tools).choices[0].message
+                return iter([{"choices": [{"delta": message.model_dump()}]}])
+            
             response = litellm.completion(
                 model=self.model,
                 messages=messages,
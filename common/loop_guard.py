@@ -0,0 +1,160 @@
+"""
+Loop detection and adaptive iteration budgets for agent loops.
+
+ToolCallTracker watches one turn: a tool call repeating an earlier
+(tool, canonical arguments) pair reuses the earlier result instead of
+executing again, and after a few repeats the agent is told to stop calling
+tools. IterationBudget learns, across sessions, how many iterations each
+query class needs and caps new turns of that class accordingly. Turns cut
+off by a cap are recorded above it, so a class whose queries keep hitting
+the cap gets a larger one.
+"""
+import threading
+from collections import deque
+from typing import Dict, Any, Optional, Tuple, Deque
+
+from common.tool_cache import canonical_key
+
+# Repeated calls in a turn after which the stop hint is injected
+LOOP_HINT_AFTER = 2
+
+STOP_HINT = (
+    "You are repeating tool calls with identical arguments and already have their results. "
+    "Do not call any more tools; answer the user with the information you have."
+)
+
+
+class ToolCallTracker:
+    """
+    Remembers the tool calls of one turn to detect repeats.
+    """
+
+    def __init__(self, hint_after: int = LOOP_HINT_AFTER):
+        """
+        Initialize the tracker.
+
+        Args:
+            hint_after: Number of repeats after which stop_hint_due turns True
+        """
+        self.hint_after = hint_after
+        self.repeats = 0
+        self.hinted = False
+        self._results: Dict[Tuple[str, str], str] = {}
+
+    def previous(self, tool_name: str, tool_input: Dict[str, Any]) -> Optional[str]:
+        """
+        Look up the result of an identical earlier call and count the repeat.
+
+        Args:
+            tool_name: The tool name
+            tool_input: The tool arguments
+
+        Returns:
+            The earlier tool message content, or None if the call is new
+        """
+        key = canonical_key(tool_input)
+        content = self._results.get((tool_name, key)) if key is not None else None
+        if content is not None:
+            self.repeats += 1
+        return content
+
+    def record(self, tool_name: str, tool_input: Dict[str, Any], content: str) -> None:
+        """
+        Remember the result of a call.
+
+        Args:
+            tool_name: The tool name
+            tool_input: The tool arguments
+            content: The tool message content
+        """
+        key = canonical_key(tool_input)
+        if key is not None:
+            self._results[(tool_name, key)] = content
+
+    @property
+    def stop_hint_due(self) -> bool:
+        """
+        Whether the stop hint should be injected now.
+        """
+        return not self.hinted and self.repeats >= self.hint_after
+
+
+def query_class(tool_names) -> str:
+    """
+    Name the class of a turn from the tools of its first iteration.
+
+    Args:
+        tool_names: Tools called in the first iteration
+
+    Returns:
+        e.g. "calculate+get_weather", or "chat" for no tools
+    """
+    names = sorted(set(tool_names))
+    return "+".join(names) if names else "chat"
+
+
+class IterationBudget:
+    """
+    Per query class iteration caps learned from finished and truncated turns.
+    """
+
+    def __init__(self, max_iterations: int = 10, min_samples: int = 5, slack: int = 1, window: int = 100):
+        """
+        Initialize the budget.
+
+        Args:
+            max_iterations: Cap of classes without enough observations
+            min_samples: Observations needed before a class gets its own cap
+            slack: Iterations allowed above the most a class has needed
+            window: Number of recent observations kept per class
+        """
+        self.max_iterations = max_iterations
+        self.min_samples = min_samples
+        self.slack = slack
+        self.window = window
+        self._observed: Dict[str, Deque[int]] = {}
+        self._lock = threading.Lock()
+
+    def cap_for(self, name: Optional[str]) -> int:
+        """
+        Get the iteration cap of a query class.
+
+        Args:
+            name: The query class, None while it is not known yet
+
+        Returns:
+            The cap, never above max_iterations
+        """
+        with self._lock:
+            observed = self._observed.get(name) if name is not None else None
+            if not observed or len(observed) < self.min_samples:
+                return self.max_iterations
+            return min(self.max_iterations, max(observed) + self.slack)
+
+    def observe(self, name: str, iterations: int, truncated: bool = False) -> None:
+        """
+        Record the iterations a turn of a class needed.
+
+        Args:
+            name: The query class
+            iterations: LLM round-trips of the turn
+            truncated: Whether the turn was cut off by its cap; it needed
+                more, so it is recorded as iterations + slack
+        """
+        if truncated:
+            iterations += self.slack
+        with self._lock:
+            self._observed.setdefault(name, deque(maxlen=self.window)).append(iterations)
+
+    def caps(self) -> Dict[str, int]:
+        """
+        Get the current caps of all observed classes.
+
+        Returns:
+            Dict of query class to iteration cap
+        """
+        return {name: self.cap_for(name) for name in list(self._observed)}
+
+
+# Budget shared by all agents of the process
+ITERATION_BUDGET = IterationBudget()
@@ -0,0 +1,496 @@
+"""
+Live metrics registry exported in the Prometheus text format.
+
+Counters, gauges and histograms are keyed by label values and updated
+under a per-metric lock, so recording costs a dict lookup and an addition.
+LLMClient, execute_tool and every BaseAgent subclass record into REGISTRY:
+
+- agent_requests_total{framework,model,status} and
+  agent_request_duration_seconds{framework,model}, agent_requests_in_flight;
+  requests answered by a wrapper without the wrapped agent are recorded
+  with the wrapped agent's labels and status "fast_path" or "cache_hit"
+- llm_requests_total{model,status}, llm_request_duration_seconds{model},
+  llm_tokens_total{model,kind}
+- tool_calls_total{tool,status}, tool_call_duration_seconds{tool}
+
+Expose the registry with serve_metrics(port) (GET /metrics), with
+dump_metrics(path), or on the serving app's /metrics route. Recording is
+skipped when the AGENT_METRICS environment variable is "0".
+"""
+import os
+import time
+import bisect
+import threading
+import contextvars
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple, Sequence, Callable
+
+# Latency buckets in seconds, from cached tool calls to slow LLM turns
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    """
+    Base of all metric types: a name, help text and label names.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """
+        Initialize the metric.
+
+        Args:
+            name: Metric name, e.g. "tool_calls_total"
+            documentation: Help text
+            labelnames: Names of the labels every sample carries
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def clear(self) -> None:
+        """
+        Drop all recorded samples.
+        """
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> List[str]:
+        """
+        Render the metric in the Prometheus text format.
+
+        Returns:
+            Lines including the HELP and TYPE comments
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """
+    Monotonically increasing count.
+    """
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        """
+        Increase the count of a label combination.
+
+        Args:
+            amount: Non-negative increment
+            **labels: Label values
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        """
+        Get the count of a label combination (0 if never incremented).
+        """
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """
+    Value that can go up and down, e.g. requests in flight.
+    """
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        """
+        Set the value of a label combination.
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        """
+        Add to the value of a label combination; use a negative amount to decrease it.
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        """
+        Get the value of a label combination (0 if never set).
+        """
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    """
+    Distribution of observations in cumulative buckets.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Initialize the histogram.
+
+        Args:
+            name: Metric name, e.g. "tool_call_duration_seconds"
+            documentation: Help text
+            labelnames: Names of the labels every sample carries
+            buckets: Increasing upper bounds; +Inf is added automatically
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        """
+        Record an observation.
+
+        Args:
+            value: The observed value, e.g. a latency in seconds
+            **labels: Label values
+        """
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, the sum and the count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, **labels) -> int:
+        """
+        Get the number of observations of a label combination.
+        """
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[2] if state else 0
+
+    def render(self) -> List[str]:
+        """
+        Render the histogram's _bucket, _sum and _count series.
+
+        Returns:
+            Lines including the HELP and TYPE comments
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted((key, ([*state[0]], state[1], state[2])) for key, state in self._values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Named collection of metrics rendered together.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty registry.
+        """
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} is already registered with another type or labels")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """
+        Get or create a counter.
+        """
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """
+        Get or create a gauge.
+        """
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """
+        Get or create a histogram.
+        """
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            The exposition text
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        """
+        Drop the samples of all metrics, keeping their registration.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.clear()
+
+
+# Registry shared by the whole process
+REGISTRY = MetricsRegistry()
+
+AGENT_REQUESTS = REGISTRY.counter(
+    "agent_requests_total", "Agent process() calls by outcome", ("framework", "model", "status"))
+AGENT_REQUEST_DURATION = REGISTRY.histogram(
+    "agent_request_duration_seconds", "Latency of agent process() calls", ("framework", "model"))
+AGENT_IN_FLIGHT = REGISTRY.gauge(
+    "agent_requests_in_flight", "Agent process() calls currently running", ("framework",))
+LLM_REQUESTS = REGISTRY.counter(
+    "llm_requests_total", "LLM completion calls by outcome", ("model", "status"))
+LLM_REQUEST_DURATION = REGISTRY.histogram(
+    "llm_request_duration_seconds", "Latency of LLM completion calls", ("model",))
+LLM_TOKENS = REGISTRY.counter(
+    "llm_tokens_total", "Tokens used by LLM completion calls", ("model", "kind"))
+TOOL_CALLS = REGISTRY.counter(
+    "tool_calls_total", "Tool executions by outcome", ("tool", "status"))
+TOOL_CALL_DURATION = REGISTRY.histogram(
+    "tool_call_duration_seconds", "Latency of tool executions", ("tool",))
+
+
+def metrics_enabled() -> bool:
+    """
+    Whether recording is on (AGENT_METRICS is not "0").
+    """
+    return os.getenv("AGENT_METRICS", "1") != "0"
+
+
+# Set while an instrumented process() runs, so nested calls (super() or
+# wrapped agents) are not counted twice
+_in_request: contextvars.ContextVar = contextvars.ContextVar("in_agent_request", default=False)
+
+
+def instrument_process(process: Callable, framework: str) -> Callable:
+    """
+    Wrap an agent's process() to record request count, status and latency.
+
+    The status is "error" when the call raises or increments the agent's
+    error_count, "deadline_exceeded" when it increments
+    deadline_exceeded_count, and "ok" otherwise. Exceptions with a
+    metrics_status attribute (e.g. scheduler rejections) set that status.
+
+    Args:
+        process: The process method
+        framework: Value of the framework label
+
+    Returns:
+        The instrumented method
+    """
+    @wraps(process)
+    def instrumented(self, *args, **kwargs):
+        if _in_request.get() or not metrics_enabled():
+            return process(self, *args, **kwargs)
+
+        token = _in_request.set(True)
+        errors = getattr(self, "error_count", 0)
+        exceeded = getattr(self, "deadline_exceeded_count", 0)
+        model = getattr(getattr(self, "llm", None), "model", "")
+        status = "error"
+        AGENT_IN_FLIGHT.inc(framework=framework)
+        start_time = time.perf_counter()
+        try:
+            response = process(self, *args, **kwargs)
+            if getattr(self, "error_count", 0) > errors:
+                status = "error"
+            elif getattr(self, "deadline_exceeded_count", 0) > exceeded:
+                status = "deadline_exceeded"
+            else:
+                status = "ok"
+            return response
+        except Exception as e:
+            status = getattr(e, "metrics_status", "error")
+            raise
+        finally:
+            AGENT_REQUEST_DURATION.observe(time.perf_counter() - start_time, framework=framework, model=model)
+            AGENT_REQUESTS.inc(framework=framework, model=model, status=status)
+            AGENT_IN_FLIGHT.inc(-1, framework=framework)
+            _in_request.reset(token)
+
+    return instrumented
+
+
+def _unwrap(agent: Any) -> Tuple[Optional[str], str]:
+    """
+    Find the framework and model labels of an agent, looking through wrappers.
+    """
+    for cls in type(agent).__mro__:
+        if "process" in cls.__dict__:
+            framework = cls.__dict__.get("metrics_framework", cls.__name__)
+            if framework is None and hasattr(agent, "agent"):
+                return _unwrap(agent.agent)
+            return framework, getattr(getattr(agent, "llm", None), "model", "")
+    return None, ""
+
+
+def record_agent_request(agent: Any, status: str, duration: float) -> None:
+    """
+    Record a request a wrapper answered without running the wrapped agent.
+
+    Args:
+        agent: The wrapper (or agent) whose labels to use
+        status: Status label, e.g. "fast_path" or "cache_hit"
+        duration: Seconds the request took
+    """
+    if _in_request.get() or not metrics_enabled():
+        return
+    framework, model = _unwrap(agent)
+    if framework is None:
+        return
+    AGENT_REQUESTS.inc(framework=framework, model=model, status=status)
+    AGENT_REQUEST_DURATION.observe(duration, framework=framework, model=model)
+
+
+def record_llm_call(model: str, duration: float, error: bool,
+                    prompt_tokens: int = 0, completion_tokens: int = 0,
+                    status: Optional[str] = None) -> None:
+    """
+    Record one LLM completion call.
+
+    Args:
+        model: The model name
+        duration: Seconds the call took
+        error: Whether the call failed
+        prompt_tokens: Prompt tokens reported by the provider
+        completion_tokens: Completion tokens reported by the provider
+        status: Status label overriding "ok"/"error", e.g. "rejected"
+    """
+    if not metrics_enabled():
+        return
+    LLM_REQUESTS.inc(model=model, status=status or ("error" if error else "ok"))
+    LLM_REQUEST_DURATION.observe(duration, model=model)
+    if prompt_tokens:
+        LLM_TOKENS.inc(prompt_tokens, model=model, kind="prompt")
+    if completion_tokens:
+        LLM_TOKENS.inc(completion_tokens, model=model, kind="completion")
+
+
+def record_tool_call(tool: str, duration: float, error: bool) -> None:
+    """
+    Record one tool execution.
+
+    Args:
+        tool: The tool name
+        duration: Seconds the call took
+        error: Whether the call returned an error
+    """
+    if not metrics_enabled():
+        return
+    TOOL_CALLS.inc(tool=tool, status="error" if error else "ok")
+    TOOL_CALL_DURATION.observe(duration, tool=tool)
+
+
+def dump_metrics(path: str, registry: MetricsRegistry = REGISTRY) -> None:
+    """
+    Write the registry to a file, e.g. for the node exporter's textfile collector.
+
+    The file is replaced atomically so readers never see a partial dump.
+
+    Args:
+        path: Output file path
+        registry: Registry to write
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(registry.render())
+    os.replace(tmp_path, path)
+
+
+def serve_metrics(port: int = 9464, host: str = "127.0.0.1",
+                  registry: MetricsRegistry = REGISTRY) -> ThreadingHTTPServer:
+    """
+    Serve GET /metrics from a daemon thread.
+
+    Args:
+        port: Port to listen on, 0 for any free port
+        host: Interface to bind, local only by default
+        registry: Registry to expose
+
+    Returns:
+        The running server; call shutdown() to stop it
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True)
+    thread.start()
+    return server
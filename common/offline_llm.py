@@ -0,0 +1,197 @@
+"""
+Deterministic offline stand-in for the LLM.
+
+Selecting the "offline" model makes LLMClient answer locally instead of
+calling a provider. Tool choice is driven by simple keyword rules over the
+last user message, so agents exercise the same tool-calling loop without
+network access or API keys. Set OFFLINE_LLM_LATENCY (seconds) to simulate
+provider latency.
+"""
+import os
+import re
+import time
+from typing import Dict, Any, List, Optional
+
+import litellm
+
+from common import codec
+
+# Model name that routes LLMClient calls to the offline stand-in
+OFFLINE_MODEL = "offline"
+
+# Simulated per-call latency in seconds
+OFFLINE_LATENCY = float(os.getenv("OFFLINE_LLM_LATENCY", "0"))
+
+_ARITHMETIC = re.compile(r"[-+]?\d[\d\.\s]*(?:[-+*/^%]\s*[\d\.\s(]+)+[\d\.)]*")
+_PERCENT_OF = re.compile(r"(\d+(?:\.\d+)?)\s*%\s*of\s*(\d+(?:\.\d+)?)", re.IGNORECASE)
+_LOCATION = re.compile(r"weather(?:\s+\w+)*?\s+in\s+([A-Z][\w\s]*?)(?:[?.!,]|\s+and\s|$)")
+_CAPITAL_OF = re.compile(r"capital of ([A-Z]\w+)")
+
+# Tiny built-in "knowledge" so multi-hop queries resolve a location
+_CAPITALS = {"France": "Paris", "Germany": "Berlin", "Italy": "Rome", "Spain": "Madrid", "Japan": "Tokyo"}
+
+
+def _field(message: Any, key: str) -> Any:
+    """
+    Read a field from a message that may be a dict or a litellm Message.
+
+    Args:
+        message: The message
+        key: The field name
+
+    Returns:
+        The field value, or None if absent
+    """
+    if isinstance(message, dict):
+        return message.get(key)
+    return getattr(message, key, None)
+
+
+def _count_tokens(messages: List[Any]) -> int:
+    """
+    Approximate the token count of messages (four characters per token).
+
+    Args:
+        messages: The messages
+
+    Returns:
+        Approximate number of tokens
+    """
+    return sum(len(str(_field(m, "content") or "")) for m in messages) // 4 + len(messages)
+
+
+def extract_expression(text: str) -> Optional[str]:
+    """
+    Extract an arithmetic expression from free text.
+
+    Args:
+        text: The user's message
+
+    Returns:
+        A Python expression, or None if the text has no arithmetic
+    """
+    percent = _PERCENT_OF.search(text)
+    if percent:
+        return f"{percent.group(1)} / 100 * {percent.group(2)}"
+
+    match = _ARITHMETIC.search(text)
+    if match:
+        return match.group(0).strip().replace("^", "**")
+    return None
+
+
+def extract_location(text: str) -> Optional[str]:
+    """
+    Extract the location of a weather question from free text.
+
+    Args:
+        text: The user's message
+
+    Returns:
+        The location, or None if no location was found
+    """
+    match = _LOCATION.search(text)
+    if match:
+        return match.group(1).strip()
+
+    capital = _CAPITAL_OF.search(text)
+    if capital:
+        return _CAPITALS.get(capital.group(1), capital.group(1))
+    return None
+
+
+def plan_tool_calls(text: str, available: List[str]) -> List[Dict[str, Any]]:
+    """
+    Choose tool calls for a user message with keyword rules.
+
+    Args:
+        text: The user's message
+        available: Names of the tools offered to the model
+
+    Returns:
+        List of {"name", "arguments"} tool calls (possibly empty)
+    """
+    lowered = text.lower()
+    calls = []
+
+    if "weather" in lowered and "get_weather" in available:
+        calls.append({"name": "get_weather", "arguments": {"location": extract_location(text) or "unknown"}})
+
+    expression = extract_expression(text)
+    if expression and "calculate" in available:
+        calls.append({"name": "calculate", "arguments": {"expression": expression}})
+
+    if "search_knowledge_base" in available and (
+        "search" in lowered or "tell me about" in lowered or "information" in lowered
+    ):
+        calls.append({"name": "search_knowledge_base", "arguments": {"query": text}})
+
+    return calls
+
+
+def offline_completion(messages: List[Any],
+                       tools: Optional[List[Dict[str, Any]]] = None,
+                       timeout: Optional[float] = None) -> litellm.ModelResponse:
+    """
+    Produce a completion without calling a provider.
+
+    A user message is answered with tool calls when the keyword rules match;
+    tool results are summarized into a final answer.
+
+    Args:
+        messages: List of messages in the conversation
+        tools: List of tools available to the model
+        timeout: Seconds after which the call fails like a provider timeout
+
+    Returns:
+        A litellm ModelResponse shaped like a provider response
+    """
+    if timeout is not None and OFFLINE_LATENCY > timeout:
+        time.sleep(timeout)
+        raise TimeoutError(f"Offline completion timed out after {timeout:.3f}s")
+    if OFFLINE_LATENCY > 0:
+        time.sleep(OFFLINE_LATENCY)
+
+    available = [t["function"]["name"] for t in tools or []]
+    last = messages[-1] if messages else {}
+
+    # Collect tool results produced since the last user message
+    tool_results = []
+    for message in reversed(messages):
+        role = _field(message, "role")
+        if role == "user":
+            break
+        if role == "tool":
+            tool_results.append(_field(message, "content"))
+    tool_results.reverse()
+
+    message: Dict[str, Any] = {"role": "assistant", "content": None}
+    if _field(last, "role") == "user":
+        calls = plan_tool_calls(str(_field(last, "content") or ""), available)
+        if calls:
+            message["tool_calls"] = [
+                {
+                    "id": f"call_{len(messages)}_{i}",
+                    "type": "function",
+                    "function": {"name": call["name"], "arguments": codec.dumps(call["arguments"])},
+                }
+                for i, call in enumerate(calls)
+            ]
+        else:
+            message["content"] = "I can help with the weather, knowledge base searches and calculations."
+    elif tool_results:
+        message["content"] = "Here is what I found: " + " ".join(str(r) for r in tool_results)
+    else:
+        message["content"] = "Done."
+
+    prompt_tokens = _count_tokens(messages)
+    completion_tokens = _count_tokens([message]) + 10 * len(message.get("tool_calls", []))
+    return litellm.ModelResponse(
+        model=OFFLINE_MODEL,
+        choices=[{"index": 0, "finish_reason": "stop", "message": message}],
+        usage={
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    )
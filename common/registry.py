@@ -0,0 +1,245 @@
+"""
+Lazily loaded plugin registries for tools and agent frameworks.
+
+A registry maps names to "module:attribute" targets plus metadata, such as
+a tool's description and parameter schema or a framework's extras. The
+target module is imported the first time the name is looked up, so
+listing names, building tool schemas or choosing a framework costs nothing
+for plugins that are never called.
+
+Plugins are declared in manifests, which are dicts of this shape:
+
+    {
+        "tools": [{"name": "lookup_order", "target": "shop.tools:lookup_order",
+                   "description": "...", "parameters": {...}, "examples": [...]}],
+        "agents": [{"name": "My Framework", "target": "shop.agent:MyAgent",
+                    "aliases": ["my_framework"], "extras": "my_framework"}]
+    }
+
+Manifests are discovered from the "agent_lab.plugins" entry point group,
+where each entry point names a dict or a function returning one (keep that
+module light), and from JSON files listed in AGENT_PLUGIN_MANIFEST
+(os.pathsep-separated).
+"""
+import os
+import json
+import importlib
+import threading
+from collections.abc import MutableMapping
+from importlib.metadata import entry_points
+from typing import Dict, Any, List, Optional, Callable, Iterator
+
+# Entry point group of plugin manifests
+ENTRY_POINT_GROUP = "agent_lab.plugins"
+
+
+def resolve(target: str) -> Any:
+    """
+    Import a "module:attribute" target.
+
+    Args:
+        target: Module path and attribute separated by a colon
+
+    Returns:
+        The attribute
+    """
+    module_name, _, attribute = target.partition(":")
+    if not attribute:
+        raise ValueError(f"Plugin target {target!r} must look like 'module:attribute'")
+    value = importlib.import_module(module_name)
+    for part in attribute.split("."):
+        value = getattr(value, part)
+    return value
+
+
+class LazyRegistry(MutableMapping):
+    """
+    Name to implementation mapping that imports implementations on first lookup.
+    """
+
+    def __init__(self, kind: str, discover: Optional[Callable[["LazyRegistry"], None]] = None):
+        """
+        Initialize the registry.
+
+        Args:
+            kind: What the registry holds, e.g. "tools"; also the manifest key
+            discover: Called once, before names are first listed or an unknown
+                name is looked up, to register plugins
+        """
+        self.kind = kind
+        self._discover = discover
+        self._discovered = discover is None
+        self._discovering = False
+        self._targets: Dict[str, Any] = {}
+        self._loaded: Dict[str, Any] = {}
+        self._metadata: Dict[str, Dict[str, Any]] = {}
+        self._aliases: Dict[str, str] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, target: Any, aliases: Optional[List[str]] = None, **metadata) -> None:
+        """
+        Register an implementation.
+
+        Args:
+            name: The name to look it up by
+            target: A "module:attribute" string imported on first lookup, or
+                the implementation itself
+            aliases: Other names resolving to it, not listed on iteration
+            **metadata: Information available without importing, e.g. a schema
+        """
+        with self._lock:
+            self._targets[name] = target
+            self._loaded.pop(name, None)
+            if not isinstance(target, str):
+                self._loaded[name] = target
+            self._metadata[name] = metadata
+            for alias in aliases or ():
+                self._aliases[alias] = name
+
+    def _ensure_discovered(self) -> None:
+        if self._discovered:
+            return
+        with self._lock:
+            # Other threads wait on the lock until discovery is complete;
+            # lookups made by discovery itself see the partial registry
+            if self._discovered or self._discovering:
+                return
+            self._discovering = True
+            try:
+                self._discover(self)
+            finally:
+                self._discovering = False
+            self._discovered = True
+
+    def canonical(self, name: str) -> str:
+        """
+        Resolve an alias to its registered name.
+
+        Args:
+            name: A name or alias
+
+        Returns:
+            The registered name
+
+        Raises:
+            KeyError: If the name is unknown
+        """
+        if name not in self._targets and name not in self._aliases:
+            self._ensure_discovered()
+        name = self._aliases.get(name, name)
+        if name not in self._targets:
+            raise KeyError(name)
+        return name
+
+    def metadata(self, name: str) -> Dict[str, Any]:
+        """
+        Get the metadata of a name without importing its implementation.
+
+        Args:
+            name: A name or alias
+
+        Returns:
+            The metadata given at registration
+        """
+        return self._metadata[self.canonical(name)]
+
+    def is_loaded(self, name: str) -> bool:
+        """
+        Whether the implementation of a name has been imported.
+        """
+        return self.canonical(name) in self._loaded
+
+    def aliases(self) -> List[str]:
+        """
+        Get all aliases.
+        """
+        self._ensure_discovered()
+        return list(self._aliases)
+
+    def __getitem__(self, name: str) -> Any:
+        name = self.canonical(name)
+        loaded = self._loaded.get(name)
+        if loaded is not None:
+            return loaded
+        with self._lock:
+            if name not in self._loaded:
+                self._loaded[name] = resolve(self._targets[name])
+            return self._loaded[name]
+
+    def __setitem__(self, name: str, value: Any) -> None:
+        # Replace the implementation, keeping metadata (e.g. to patch a tool)
+        with self._lock:
+            metadata = self._metadata.get(name, {})
+            self.register(name, value, **metadata)
+
+    def __delitem__(self, name: str) -> None:
+        with self._lock:
+            name = self.canonical(name)
+            del self._targets[name]
+            self._loaded.pop(name, None)
+            self._metadata.pop(name, None)
+            self._aliases = {a: n for a, n in self._aliases.items() if n != name}
+
+    def __contains__(self, name: object) -> bool:
+        try:
+            self.canonical(name)
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self) -> Iterator[str]:
+        self._ensure_discovered()
+        return iter(list(self._targets))
+
+    def __len__(self) -> int:
+        self._ensure_discovered()
+        return len(self._targets)
+
+
+def iter_manifests() -> Iterator[Dict[str, Any]]:
+    """
+    Find the plugin manifests of installed packages and AGENT_PLUGIN_MANIFEST.
+
+    Manifests that cannot be loaded are reported and skipped.
+
+    Returns:
+        Iterator over manifest dicts
+    """
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        try:
+            manifest = entry_point.load()
+            yield manifest() if callable(manifest) else manifest
+        except Exception as e:
+            print(f"Error loading plugin manifest {entry_point.name}: {e}")
+
+    for path in filter(None, os.getenv("AGENT_PLUGIN_MANIFEST", "").split(os.pathsep)):
+        try:
+            with open(path) as f:
+                yield json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading plugin manifest {path}: {e}")
+
+
+def load_plugins(registry: LazyRegistry) -> None:
+    """
+    Register the plugins of all manifests under the registry's kind.
+
+    Args:
+        registry: The registry to fill, e.g. TOOLS or AGENTS
+    """
+    for manifest in iter_manifests():
+        for entry in manifest.get(registry.kind, []):
+            entry = dict(entry)
+            try:
+                registry.register(entry.pop("name"), entry.pop("target"), **entry)
+            except KeyError as e:
+                print(f"Error in plugin manifest entry, missing {e}")
+
+
+# Agent frameworks by display name; aliases are the short names used by
+# serving.run and the agents/ directory names
+AGENTS = LazyRegistry("agents", discover=load_plugins)
+AGENTS.register("No Framework", "agents.no_framework.agent:NoFrameworkAgent",
+                aliases=["no_framework"])
+AGENTS.register("LangGraph (Functional)", "agents.langgraph_functional.agent:LangGraphFunctionalAgent",
+                aliases=["langgraph_functional"], extras="langgraph")
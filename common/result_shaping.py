@@ -0,0 +1,298 @@
+"""
+Shaping of tool results before they enter the prompt.
+
+Tool results are resent to the LLM on every later iteration, so large
+ones are shaped first, following each tool's result_shape declaration:
+
+- projection: keep only the fields the model needs
+- deduplication: results (or list items) the model was already shown are
+  replaced by a reference to the earlier tool message; items cut by
+  truncation do not count as shown
+- token budget: oversized results are truncated and the full result is
+  kept out-of-band under a reference the model can expand with the
+  expand_result tool
+"""
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+from common import codec
+
+# Tool definition agents add so the model can fetch out-of-band results
+EXPAND_RESULT_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "expand_result",
+        "description": "Get the full content of a tool result that was truncated",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "ref": {
+                    "type": "string",
+                    "description": "The ref of the truncated result"
+                }
+            },
+            "required": ["ref"]
+        }
+    }
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate the token count of text (four characters per token).
+
+    Args:
+        text: The text
+
+    Returns:
+        Approximate number of tokens
+    """
+    return len(text) // 4 + 1
+
+
+class ShapePolicy:
+    """
+    How a tool's results are shaped before entering the prompt.
+    """
+
+    def __init__(self, fields: Optional[List[str]] = None, max_tokens: int = 400):
+        """
+        Initialize the policy.
+
+        Args:
+            fields: Fields to keep of a dict result (or of each dict item of a
+                list result), None to keep all
+            max_tokens: Token budget of the shaped result
+        """
+        self.fields = fields
+        self.max_tokens = max_tokens
+
+    def __repr__(self) -> str:
+        return f"ShapePolicy(fields={self.fields!r}, max_tokens={self.max_tokens})"
+
+
+DEFAULT_SHAPE = ShapePolicy()
+
+
+def result_shape(fields: Optional[List[str]] = None, max_tokens: int = 400) -> Callable:
+    """
+    Decorator declaring how a tool's results are shaped.
+
+    Args:
+        fields: Fields to keep, None to keep all
+        max_tokens: Token budget of the shaped result
+
+    Returns:
+        Decorator attaching the policy as the function's result_shape attribute
+    """
+    policy = ShapePolicy(fields, max_tokens)
+
+    def decorator(func: Callable) -> Callable:
+        func.result_shape = policy
+        return func
+
+    return decorator
+
+
+def get_shape(func: Optional[Callable]) -> ShapePolicy:
+    """
+    Get the shape policy of a tool function.
+
+    Args:
+        func: The tool function, None for unknown tools
+
+    Returns:
+        The declared policy, or DEFAULT_SHAPE
+    """
+    return getattr(func, "result_shape", DEFAULT_SHAPE)
+
+
+def project(value: Any, fields: Optional[List[str]]) -> Any:
+    """
+    Keep only the given fields of a dict or of each dict in a list.
+
+    Args:
+        value: The tool result
+        fields: Fields to keep, None to keep all
+
+    Returns:
+        The projected result
+    """
+    if fields is None:
+        return value
+    if isinstance(value, dict):
+        return {k: v for k, v in value.items() if k in fields}
+    if isinstance(value, list):
+        return [project(item, fields) for item in value]
+    return value
+
+
+def _digest(value: Any) -> str:
+    return hashlib.sha1(codec.dumpb(value, sort_keys=True)).hexdigest()
+
+
+class ResultShaper:
+    """
+    Shapes tool results of one conversation and keeps oversized ones out-of-band.
+    """
+
+    def __init__(self, max_stored: int = 64):
+        """
+        Initialize the shaper.
+
+        Args:
+            max_stored: Maximum out-of-band results kept, oldest are dropped
+        """
+        self.max_stored = max_stored
+        self._store: "OrderedDict[str, Any]" = OrderedDict()
+        self._seen: Dict[str, str] = {}
+        self._next_ref = 0
+        self.tokens_saved = 0
+
+    def reset(self) -> None:
+        """
+        Forget the conversation's results.
+        """
+        self._store.clear()
+        self._seen.clear()
+
+    def shape(self, tool_call_id: str, tool_result: Dict[str, Any], policy: ShapePolicy = DEFAULT_SHAPE) -> str:
+        """
+        Shape a tool result into the content of its tool message.
+
+        Args:
+            tool_call_id: Id of the tool call, used to reference duplicates
+            tool_result: The {"error", "result"} outcome of execute_tool
+            policy: The tool's shape policy
+
+        Returns:
+            JSON content for the tool message
+        """
+        raw = codec.dumps(tool_result)
+        if tool_result.get("error") is not None:
+            return raw
+
+        result = project(tool_result["result"], policy.fields)
+
+        digest = _digest(result)
+        if digest in self._seen:
+            shaped = {"error": None, "result": None, "duplicate_of": self._seen[digest]}
+            return self._saved(raw, codec.dumps(shaped))
+
+        notes = {}
+        item_digests = None
+        if isinstance(result, list):
+            result, item_digests, duplicates = self._drop_seen_items(result)
+            if duplicates:
+                notes["duplicates_omitted"] = duplicates
+
+        sent = result
+        content = codec.dumps({"error": None, "result": result, **notes})
+        if estimate_tokens(content) > policy.max_tokens:
+            sent, omitted = self._truncate(result, policy.max_tokens)
+            if sent != result:
+                content = codec.dumps({
+                    "error": None,
+                    "result": sent,
+                    **notes,
+                    "truncated": True,
+                    "omitted": omitted,
+                    "ref": self._put(result),
+                    "note": "Call expand_result with this ref for the full result",
+                })
+            else:
+                sent = result
+
+        # Only what the model was actually shown counts as seen
+        if sent is result:
+            self._seen[digest] = tool_call_id
+        if item_digests is not None:
+            for item, original, item_digest in zip(sent, result, item_digests):
+                if item is original:
+                    self._seen[item_digest] = tool_call_id
+        return self._saved(raw, content)
+
+    def expand(self, ref: str) -> Dict[str, Any]:
+        """
+        Get an out-of-band result (the expand_result tool).
+
+        Args:
+            ref: Reference from a truncated result
+
+        Returns:
+            The full result in execute_tool's {"error", "result"} shape
+        """
+        if ref not in self._store:
+            return {"error": f"Unknown or expired ref: {ref}", "result": None}
+        return {"error": None, "result": self._store[ref]}
+
+    def expand_call(self, arguments: Any) -> Dict[str, Any]:
+        """
+        Run an expand_result tool call with the arguments the model sent.
+
+        Args:
+            arguments: The decoded tool call arguments
+
+        Returns:
+            The full result, or an error for arguments other than a single
+            string ref, in execute_tool's {"error", "result"} shape
+        """
+        if not isinstance(arguments, dict) or set(arguments) != {"ref"} or not isinstance(arguments["ref"], str):
+            return {"error": "expand_result takes a single string argument: ref", "result": None}
+        return self.expand(arguments["ref"])
+
+    def _saved(self, raw: str, content: str) -> str:
+        self.tokens_saved += max(0, estimate_tokens(raw) - estimate_tokens(content))
+        return content
+
+    def _put(self, result: Any) -> str:
+        ref = f"r{self._next_ref}"
+        self._next_ref += 1
+        self._store[ref] = result
+        while len(self._store) > self.max_stored:
+            self._store.popitem(last=False)
+        return ref
+
+    def _drop_seen_items(self, items: List[Any]) -> Tuple[List[Any], List[str], int]:
+        """
+        Remove list items that already appeared in earlier results or earlier in the list.
+
+        Returns:
+            (kept items, their digests, number of duplicates removed)
+        """
+        kept, digests, duplicates = [], [], 0
+        listed = set()
+        for item in items:
+            digest = "item:" + _digest(item)
+            if digest in self._seen or digest in listed:
+                duplicates += 1
+                continue
+            listed.add(digest)
+            digests.append(digest)
+            kept.append(item)
+        return kept, digests, duplicates
+
+    def _truncate(self, result: Any, max_tokens: int) -> Tuple[Any, int]:
+        """
+        Cut a result down to roughly max_tokens.
+
+        Returns:
+            (truncated result, number of list items or characters omitted)
+        """
+        budget = max_tokens * 4
+        if isinstance(result, list):
+            kept, used = [], 0
+            for item in result:
+                size = len(codec.dumps(item))
+                if kept and used + size > budget:
+                    break
+                kept.append(item if size <= budget else self._truncate(item, max_tokens)[0])
+                used += size
+            return kept, len(result) - len(kept)
+        if isinstance(result, dict):
+            text = codec.dumps(result)
+            return {k: (v[:budget // max(len(result), 1)] if isinstance(v, str) else v)
+                    for k, v in result.items()}, max(0, len(text) - budget)
+        text = result if isinstance(result, str) else codec.dumps(result)
+        return text[:budget], max(0, len(text) - budget)
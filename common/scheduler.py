@@ -0,0 +1,592 @@
+"""
+Fair-share scheduling of agent work across tenants.
+
+FairScheduler hands out a fixed number of slots, e.g. agent workers or
+concurrent LLM calls. Requests that find no free slot wait in per-tenant
+queues and are served by start-time weighted fair queueing: every tenant
+carries a virtual finish time advanced by the service time it used divided
+by its weight, and the next slot goes to the queued tenant with the
+smallest virtual time. A tenant bursting long multi-tool conversations
+therefore pays for the time it holds slots, and a light tenant's next
+request waits for at most about one slot turnover instead of the whole
+burst. Idle tenants do not bank credit: their virtual time is raised to
+the scheduler's on their next request.
+
+Priority classes ("interactive", then "batch") are strict: batch work is
+only dispatched while no interactive request is eligible. Per-tenant
+TenantPolicy objects set the weight, a concurrency cap and a queue limit.
+
+Admission control rejects a request on arrival, with AdmissionRejected and
+a retry-after hint, when the scheduler or tenant queue is full or when the
+estimated queue wait already exceeds the request's deadline, so overload is
+signalled before any work is spent on the request.
+
+Queue time is recorded per scheduler, tenant and priority in
+common.metrics (scheduler_queue_seconds) together with admission outcomes
+and queued/running gauges.
+
+LLMClient.complete takes a slot from LLM_SCHEDULER when one is configured
+(AGENT_LLM_CONCURRENCY > 0 or configure_llm_scheduler()), on behalf of the
+tenant set with tenant_context() in the calling thread.
+"""
+import os
+import math
+import time
+import asyncio
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Callable, Tuple
+
+from common import metrics
+from common.deadline import Deadline, DeadlineExceeded
+
+# Priority classes, most urgent first
+PRIORITIES = ("interactive", "batch")
+
+DEFAULT_TENANT = "default"
+
+# Weight of the newest observation in service time averages
+_SMOOTHING = 0.2
+
+SCHEDULER_QUEUE_TIME = metrics.REGISTRY.histogram(
+    "scheduler_queue_seconds", "Time requests waited for a scheduler slot", ("scheduler", "tenant", "priority"))
+SCHEDULER_REQUESTS = metrics.REGISTRY.counter(
+    "scheduler_requests_total", "Scheduler admissions by outcome", ("scheduler", "tenant", "outcome"))
+SCHEDULER_QUEUED = metrics.REGISTRY.gauge(
+    "scheduler_queued_requests", "Requests waiting for a scheduler slot", ("scheduler", "tenant"))
+SCHEDULER_RUNNING = metrics.REGISTRY.gauge(
+    "scheduler_running_requests", "Requests holding a scheduler slot", ("scheduler", "tenant"))
+
+
+class AdmissionRejected(Exception):
+    """Raised when the scheduler sheds a request instead of queueing it."""
+
+    # Status of the request in common.metrics
+    metrics_status = "rejected"
+
+    def __init__(self, tenant: str, reason: str, retry_after: float):
+        """
+        Initialize the rejection.
+
+        Args:
+            tenant: The tenant of the rejected request
+            reason: "queue_full", "tenant_queue_full" or "deadline"
+            retry_after: Suggested seconds before retrying
+        """
+        super().__init__(f"Request of tenant {tenant!r} rejected: {reason}")
+        self.tenant = tenant
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TenantPolicy:
+    """
+    Share and limits of one tenant.
+    """
+
+    def __init__(self, weight: float = 1.0, max_concurrency: Optional[int] = None,
+                 max_queued: Optional[int] = None):
+        """
+        Initialize the policy.
+
+        Args:
+            weight: Relative share of the slots when tenants compete
+            max_concurrency: Slots the tenant may hold at once, unlimited if None
+            max_queued: Requests the tenant may have waiting, unlimited if None
+        """
+        if weight <= 0:
+            raise ValueError("A tenant weight must be positive")
+        self.weight = weight
+        self.max_concurrency = max_concurrency
+        self.max_queued = max_queued
+
+    def __repr__(self) -> str:
+        return (f"TenantPolicy(weight={self.weight!r}, max_concurrency={self.max_concurrency!r}, "
+                f"max_queued={self.max_queued!r})")
+
+
+class Ticket:
+    """
+    A request's claim on a scheduler slot; release() it when the work is done.
+    """
+
+    def __init__(self, scheduler: "FairScheduler", tenant: str, priority: str, seq: int):
+        self.scheduler = scheduler
+        self.tenant = tenant
+        self.priority = priority
+        self.seq = seq
+        self.enqueued_at = scheduler.clock()
+        self.started_at: Optional[float] = None
+        self.charged = 0.0
+        self.granted = False
+        self.released = False
+        self.abandoned = False
+        self.event: Optional[threading.Event] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.future: Optional[asyncio.Future] = None
+
+    @property
+    def queue_time(self) -> Optional[float]:
+        """
+        Seconds the request waited for its slot, None while it waits.
+        """
+        return None if self.started_at is None else self.started_at - self.enqueued_at
+
+    def release(self) -> None:
+        """
+        Return the slot to the scheduler; releasing twice is a no-op.
+        """
+        self.scheduler.release(self)
+
+    def __enter__(self) -> "Ticket":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+class _Tenant:
+    """
+    Queues and accounting of one tenant.
+    """
+
+    def __init__(self, policy: TenantPolicy, estimate: float):
+        self.policy = policy
+        self.queues = {priority: deque() for priority in PRIORITIES}
+        self.running = 0
+        self.finish = 0.0
+        self.estimate = estimate
+        self.admitted = 0
+        self.rejected = 0
+        self.queue_time = 0.0
+        self.service_time = 0.0
+
+    @property
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+    def eligible(self) -> bool:
+        cap = self.policy.max_concurrency
+        return cap is None or self.running < cap
+
+
+class FairScheduler:
+    """
+    Weighted fair queueing of a fixed number of slots across tenants.
+    """
+
+    def __init__(self,
+                 capacity: int,
+                 name: str = "agent",
+                 policies: Optional[Dict[str, TenantPolicy]] = None,
+                 default_policy: Optional[TenantPolicy] = None,
+                 max_queued: int = 1024,
+                 service_estimate: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the scheduler.
+
+        Args:
+            capacity: Number of slots, e.g. agent workers or concurrent LLM calls
+            name: Value of the scheduler metrics label
+            policies: Policies of known tenants
+            default_policy: Policy of tenants without their own
+            max_queued: Requests waiting across all tenants before new ones are rejected
+            service_estimate: Initial guess of a request's service time in seconds,
+                refined from completed requests
+            clock: Time source in seconds
+        """
+        if capacity < 1:
+            raise ValueError("A scheduler needs at least one slot")
+        self.capacity = capacity
+        self.name = name
+        self.policies = dict(policies or {})
+        self.default_policy = default_policy or TenantPolicy()
+        self.max_queued = max_queued
+        self.mean_service = service_estimate
+        self.clock = clock
+        self.in_use = 0
+        self.queued = 0
+        self.virtual_time = 0.0
+        self._seq = 0
+        self._tenants: Dict[str, _Tenant] = {}
+        self._lock = threading.Lock()
+
+    def set_policy(self, tenant: str, policy: TenantPolicy) -> None:
+        """
+        Set or replace the policy of a tenant; queued requests keep their place.
+
+        Args:
+            tenant: The tenant
+            policy: Its policy
+        """
+        with self._lock:
+            self.policies[tenant] = policy
+            if tenant in self._tenants:
+                self._tenants[tenant].policy = policy
+            self._dispatch()
+
+    def acquire(self, tenant: str = DEFAULT_TENANT, priority: str = "interactive",
+                deadline: Optional[Deadline] = None) -> Ticket:
+        """
+        Wait for a slot.
+
+        Args:
+            tenant: The tenant the work is done for
+            priority: "interactive" or "batch"
+            deadline: Optional deadline; the request is rejected up front if
+                the estimated wait exceeds it and gives up when it passes
+
+        Returns:
+            The granted ticket
+
+        Raises:
+            AdmissionRejected: If the request is shed on arrival
+            DeadlineExceeded: If the deadline passed while waiting
+        """
+        with self._lock:
+            ticket = self._admit(tenant, priority, deadline)
+            if ticket.granted:
+                return ticket
+            ticket.event = threading.Event()
+
+        if ticket.event.wait(deadline.remaining() if deadline is not None else None):
+            return ticket
+        with self._lock:
+            if not ticket.granted:
+                self._withdraw(ticket)
+                raise DeadlineExceeded(f"Deadline of {deadline.budget}s exceeded while queued")
+        return ticket
+
+    async def acquire_async(self, tenant: str = DEFAULT_TENANT, priority: str = "interactive",
+                            deadline: Optional[Deadline] = None) -> Ticket:
+        """
+        Wait for a slot without blocking the event loop.
+
+        Takes the same arguments, returns the same ticket and raises the same
+        errors as acquire().
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            ticket = self._admit(tenant, priority, deadline)
+            if ticket.granted:
+                return ticket
+            ticket.loop = loop
+            ticket.future = loop.create_future()
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(ticket.future),
+                                          deadline.remaining() if deadline is not None else None)
+        except asyncio.TimeoutError:
+            with self._lock:
+                if not ticket.granted:
+                    self._withdraw(ticket)
+                    raise DeadlineExceeded(f"Deadline of {deadline.budget}s exceeded while queued")
+            return await ticket.future
+        except asyncio.CancelledError:
+            self._abandon(ticket)
+            raise
+
+    @contextmanager
+    def slot(self, tenant: str = DEFAULT_TENANT, priority: str = "interactive",
+             deadline: Optional[Deadline] = None):
+        """
+        Hold a slot for the duration of a with block.
+
+        Args:
+            tenant: The tenant the work is done for
+            priority: "interactive" or "batch"
+            deadline: Optional deadline, see acquire()
+
+        Returns:
+            Context manager yielding the ticket
+        """
+        ticket = self.acquire(tenant, priority, deadline)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def release(self, ticket: Ticket) -> None:
+        """
+        Return a granted ticket's slot and charge its tenant for the time used.
+
+        Args:
+            ticket: The ticket
+        """
+        with self._lock:
+            if ticket.released or not ticket.granted:
+                return
+            ticket.released = True
+            state = self._tenants[ticket.tenant]
+            service = max(0.0, self.clock() - ticket.started_at)
+            # Replace the estimate charged at dispatch with the time actually used
+            state.finish += (service - ticket.charged) / state.policy.weight
+            state.estimate += _SMOOTHING * (service - state.estimate)
+            state.service_time += service
+            self.mean_service += _SMOOTHING * (service - self.mean_service)
+            state.running -= 1
+            self.in_use -= 1
+            if metrics.metrics_enabled():
+                SCHEDULER_RUNNING.set(state.running, scheduler=self.name, tenant=ticket.tenant)
+            self._dispatch()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get per-tenant scheduling metrics.
+
+        Returns:
+            Dict of tenant to queued, running, admitted, rejected, mean queue
+            time and total service time in seconds
+        """
+        with self._lock:
+            return {
+                tenant: {
+                    "queued": state.queued,
+                    "running": state.running,
+                    "admitted": state.admitted,
+                    "rejected": state.rejected,
+                    "mean_queue_time": state.queue_time / state.admitted if state.admitted else 0.0,
+                    "service_time": state.service_time,
+                }
+                for tenant, state in self._tenants.items()
+            }
+
+    def _tenant(self, tenant: str) -> _Tenant:
+        state = self._tenants.get(tenant)
+        if state is None:
+            state = self._tenants[tenant] = _Tenant(self.policies.get(tenant, self.default_policy),
+                                                    self.mean_service)
+        return state
+
+    def _admit(self, tenant: str, priority: str, deadline: Optional[Deadline]) -> Ticket:
+        """
+        Queue a request or reject it. Caller holds the lock.
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        state = self._tenant(tenant)
+
+        # Limits apply to requests that would wait; one that can take a
+        # free slot right away is always admitted
+        reason = None
+        if self.in_use >= self.capacity or not state.eligible():
+            if self.queued >= self.max_queued:
+                reason = "queue_full"
+            elif state.policy.max_queued is not None and state.queued >= state.policy.max_queued:
+                reason = "tenant_queue_full"
+            elif deadline is not None and self._estimated_wait(state, priority) > deadline.remaining():
+                reason = "deadline"
+        if reason is not None:
+            state.rejected += 1
+            self._record(tenant, reason)
+            raise AdmissionRejected(tenant, reason, max(1.0, self.mean_service))
+
+        self._seq += 1
+        ticket = Ticket(self, tenant, priority, self._seq)
+        state.queues[priority].append(ticket)
+        self.queued += 1
+        self._dispatch()
+        if not ticket.granted and metrics.metrics_enabled():
+            SCHEDULER_QUEUED.set(state.queued, scheduler=self.name, tenant=tenant)
+        return ticket
+
+    def _estimated_wait(self, state: _Tenant, priority: str) -> float:
+        """
+        Estimate how long a new request of a tenant would wait. Caller holds the lock.
+
+        The request's virtual start time follows the tenant's own queued
+        requests. Ahead of it are those, every request of a more urgent
+        class, and the requests of other tenants of its class whose virtual
+        start times come earlier, so a light tenant next to a long backlog
+        waits about one slot turnover.
+
+        Args:
+            state: The requesting tenant
+            priority: The request's priority class
+
+        Returns:
+            Estimated seconds until the request gets a slot
+        """
+        level = PRIORITIES.index(priority)
+        own_step = state.estimate / state.policy.weight
+        start = max(self.virtual_time, state.finish) + len(state.queues[priority]) * own_step
+        work = len(state.queues[priority]) * state.estimate
+        for other in self._tenants.values():
+            work += sum(len(other.queues[p]) for p in PRIORITIES[:level]) * other.estimate
+            if other is state or not other.queues[priority]:
+                continue
+            other_start = max(self.virtual_time, other.finish)
+            if other_start < start:
+                step = other.estimate / other.policy.weight
+                ahead = math.ceil((start - other_start) / step) if step > 0 else len(other.queues[priority])
+                work += min(len(other.queues[priority]), ahead) * other.estimate
+        # Plus about one turnover of the slots in use
+        return (work + self.mean_service) / self.capacity
+
+    def _withdraw(self, ticket: Ticket) -> None:
+        """
+        Remove a waiting ticket from its queue. Caller holds the lock.
+        """
+        state = self._tenants[ticket.tenant]
+        state.queues[ticket.priority].remove(ticket)
+        self.queued -= 1
+        state.rejected += 1
+        self._record(ticket.tenant, "expired")
+        if metrics.metrics_enabled():
+            SCHEDULER_QUEUED.set(state.queued, scheduler=self.name, tenant=ticket.tenant)
+
+    def _abandon(self, ticket: Ticket) -> None:
+        """
+        Give up a ticket whose async waiter was cancelled. Runs on the ticket's loop.
+        """
+        with self._lock:
+            if not ticket.granted:
+                self._withdraw(ticket)
+                return
+            if not ticket.future.done():
+                # _resolve will release the slot once it runs
+                ticket.abandoned = True
+                return
+        self.release(ticket)
+
+    def _dispatch(self) -> None:
+        """
+        Grant free slots to the queued requests with the smallest virtual
+        start time, most urgent priority first. Caller holds the lock.
+        """
+        while self.in_use < self.capacity and self.queued:
+            best = None
+            for priority in PRIORITIES:
+                for state in self._tenants.values():
+                    queue = state.queues[priority]
+                    if not queue or not state.eligible():
+                        continue
+                    candidate = (max(self.virtual_time, state.finish), queue[0].seq, state)
+                    if best is None or candidate[:2] < best[:2]:
+                        best = candidate
+                if best is not None:
+                    break
+            if best is None:
+                # Everything queued belongs to tenants at their concurrency cap
+                return
+
+            start, _, state = best
+            ticket = state.queues[priority].popleft()
+            self.queued -= 1
+            self.in_use += 1
+            state.running += 1
+            state.admitted += 1
+            self.virtual_time = start
+            ticket.charged = state.estimate
+            state.finish = start + ticket.charged / state.policy.weight
+            ticket.started_at = self.clock()
+            ticket.granted = True
+            state.queue_time += ticket.queue_time
+            self._record(ticket.tenant, "admitted", ticket)
+            if ticket.event is not None:
+                ticket.event.set()
+            elif ticket.future is not None:
+                ticket.loop.call_soon_threadsafe(self._resolve, ticket)
+
+    def _resolve(self, ticket: Ticket) -> None:
+        if ticket.abandoned or ticket.future.done():
+            self.release(ticket)
+        else:
+            ticket.future.set_result(ticket)
+
+    def _record(self, tenant: str, outcome: str, ticket: Optional[Ticket] = None) -> None:
+        if not metrics.metrics_enabled():
+            return
+        SCHEDULER_REQUESTS.inc(scheduler=self.name, tenant=tenant, outcome=outcome)
+        if ticket is not None:
+            state = self._tenants[tenant]
+            SCHEDULER_QUEUE_TIME.observe(ticket.queue_time, scheduler=self.name, tenant=tenant,
+                                         priority=ticket.priority)
+            SCHEDULER_QUEUED.set(state.queued, scheduler=self.name, tenant=tenant)
+            SCHEDULER_RUNNING.set(state.running, scheduler=self.name, tenant=tenant)
+
+
+# Tenant and priority of the work running in the current thread or task
+_current: contextvars.ContextVar = contextvars.ContextVar(
+    "scheduling_tenant", default=(DEFAULT_TENANT, "interactive"))
+
+
+@contextmanager
+def tenant_context(tenant: str, priority: str = "interactive"):
+    """
+    Attribute the work in a with block, e.g. its LLM calls, to a tenant.
+
+    Args:
+        tenant: The tenant
+        priority: "interactive" or "batch"
+    """
+    token = _current.set((tenant, priority))
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def current_tenant() -> Tuple[str, str]:
+    """
+    Get the tenant and priority set by the innermost tenant_context().
+    """
+    return _current.get()
+
+
+def call_as(tenant: str, priority: str, func: Callable, *args, **kwargs) -> Any:
+    """
+    Call a function inside tenant_context(), e.g. on an executor thread.
+
+    Args:
+        tenant: The tenant
+        priority: "interactive" or "batch"
+        func: The function
+        *args: Its positional arguments
+        **kwargs: Its keyword arguments
+
+    Returns:
+        The function's return value
+    """
+    with tenant_context(tenant, priority):
+        return func(*args, **kwargs)
+
+
+def configure_llm_scheduler(capacity: int, **kwargs) -> Optional[FairScheduler]:
+    """
+    Set the scheduler of LLM calls made through LLMClient.
+
+    Args:
+        capacity: Concurrent LLM calls, 0 to stop scheduling them
+        **kwargs: Other FairScheduler arguments, e.g. policies
+
+    Returns:
+        The new scheduler, None if disabled
+    """
+    global LLM_SCHEDULER
+    LLM_SCHEDULER = FairScheduler(capacity, name="llm", **kwargs) if capacity > 0 else None
+    return LLM_SCHEDULER
+
+
+def acquire_llm_slot(deadline: Optional[Deadline] = None) -> Optional[Ticket]:
+    """
+    Take an LLM slot for the current tenant, if LLM calls are scheduled.
+
+    Args:
+        deadline: Optional deadline of the call
+
+    Returns:
+        The ticket to release after the call, None if there is no LLM scheduler
+    """
+    scheduler = LLM_SCHEDULER
+    if scheduler is None:
+        return None
+    return scheduler.acquire(*current_tenant(), deadline=deadline)
+
+
+# Scheduler of LLM calls, off unless AGENT_LLM_CONCURRENCY is set
+LLM_SCHEDULER: Optional[FairScheduler] = None
+configure_llm_scheduler(int(os.getenv("AGENT_LLM_CONCURRENCY", "0")))
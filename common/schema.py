@@ -39,5 +39,34 @@ class AgentMetrics(BaseModel):
     total_tokens: int = Field(0, description="Total tokens used")
     execution_time: float = Field(0.0, description="Execution time in seconds")
     tool_calls_count: int = Field(0, description="Number of tool calls made")
-    success_rate: float = Field(0.0, description="Success rate for completing tasks")
+    request_count: int = Field(0, description="Number of messages processed")
+    success_rate: float = Field(0.0, description="Share of processed messages that did not fail")
     error_count: int = Field(0, description="Number of errors encountered")
+    deadline_exceeded_count: int = Field(0, description="Number of requests stopped by their deadline")
+    iterations_saved: int = Field(0, description="LLM round-trips avoided by stopping repeating tool loops")
+    iteration_cap_truncations: int = Field(0, description="Turns cut off by their learned iteration cap")
+
+
+class BatchItem(BaseModel):
+    """One message of a batch; items sharing a session_id form one conversation."""
+    session_id: str = Field(..., description="Conversation the message belongs to")
+    message: UserMessage = Field(..., description="The user message")
+    timeout: Optional[float] = Field(None, description="Time budget in seconds, starting when the item runs")
+
+
+class BatchResult(BaseModel):
+    """The outcome of one batch item."""
+    index: int = Field(..., description="Position of the item in the batch input")
+    session_id: str = Field(..., description="Conversation the message belongs to")
+    response: Optional[AgentResponse] = Field(None, description="The agent's response, None if processing raised")
+    error: Optional[str] = Field(None, description="Error message if the item failed")
+    latency: float = Field(0.0, description="Seconds spent processing the item")
+
+
+class BatchResponse(BaseModel):
+    """Results of a batch in input order with aggregate throughput."""
+    results: List[BatchResult] = Field(default_factory=list, description="One result per item, in input order")
+    succeeded: int = Field(0, description="Number of items without error")
+    failed: int = Field(0, description="Number of items with an error")
+    total_time: float = Field(0.0, description="Wall-clock seconds for the whole batch")
+    throughput: float = Field(0.0, description="Items completed per second")
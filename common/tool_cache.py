@@ -0,0 +1,203 @@
+"""
+Result caching for tool executions.
+
+Tools declare how their results may be reused with the cache_policy
+decorator:
+
+- pure: same arguments always give the same result, memoized with an LRU bound
+- ttl: results stay valid for a number of seconds
+- never: always executed (the default for tools without a policy)
+
+execute_tool serves repeat calls from one process-wide ToolResultCache
+keyed on the tool name and its canonicalized arguments, so repeat calls
+across sessions cost a dictionary lookup.
+"""
+import os
+import copy
+import time
+import threading
+from collections import OrderedDict, Counter
+from typing import Dict, Any, Optional, Callable, Tuple
+
+from common import codec
+
+POLICY_KINDS = ("pure", "ttl", "never")
+
+
+class CachePolicy:
+    """
+    How results of a tool may be reused.
+    """
+
+    def __init__(self, kind: str = "never", ttl: Optional[float] = None, max_entries: int = 1024):
+        """
+        Initialize the policy.
+
+        Args:
+            kind: "pure", "ttl" or "never"
+            ttl: Seconds a result stays valid (required for "ttl")
+            max_entries: Maximum cached results of the tool, least recently used are evicted
+        """
+        if kind not in POLICY_KINDS:
+            raise ValueError(f"Unknown cache policy: {kind}")
+        if kind == "ttl" and not ttl:
+            raise ValueError("A ttl cache policy needs a positive ttl")
+        self.kind = kind
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    @property
+    def cacheable(self) -> bool:
+        return self.kind != "never"
+
+    def __repr__(self) -> str:
+        return f"CachePolicy(kind={self.kind!r}, ttl={self.ttl!r}, max_entries={self.max_entries})"
+
+
+NEVER = CachePolicy("never")
+
+
+def cache_policy(kind: str, ttl: Optional[float] = None, max_entries: int = 1024) -> Callable:
+    """
+    Decorator declaring the cache policy of a tool function.
+
+    Args:
+        kind: "pure", "ttl" or "never"
+        ttl: Seconds a result stays valid (required for "ttl")
+        max_entries: Maximum cached results of the tool
+
+    Returns:
+        Decorator attaching the policy as the function's cache_policy attribute
+    """
+    policy = CachePolicy(kind, ttl, max_entries)
+
+    def decorator(func: Callable) -> Callable:
+        func.cache_policy = policy
+        return func
+
+    return decorator
+
+
+def get_policy(func: Callable) -> CachePolicy:
+    """
+    Get the cache policy of a tool function.
+
+    Args:
+        func: The tool function
+
+    Returns:
+        The declared policy, or NEVER
+    """
+    return getattr(func, "cache_policy", NEVER)
+
+
+def canonical_key(tool_input: Dict[str, Any]) -> Optional[str]:
+    """
+    Canonicalize tool arguments into a cache key.
+
+    Args:
+        tool_input: The tool arguments
+
+    Returns:
+        JSON with sorted keys, or None if the arguments are not JSON serializable
+    """
+    try:
+        return codec.dumps(tool_input, sort_keys=True, strict=True)
+    except (TypeError, ValueError):
+        return None
+
+
+class ToolResultCache:
+    """
+    Thread-safe cache of tool results with per-tool hit metrics.
+    """
+
+    def __init__(self, enabled: bool = True):
+        """
+        Initialize the cache.
+
+        Args:
+            enabled: Whether lookups and stores are performed at all
+        """
+        self.enabled = enabled
+        self._entries: Dict[str, "OrderedDict[str, Tuple[float, Any]]"] = {}
+        self._hits = Counter()
+        self._misses = Counter()
+        self._lock = threading.Lock()
+
+    def get(self, tool_name: str, key: str, policy: CachePolicy) -> Tuple[bool, Any]:
+        """
+        Look up a cached result.
+
+        Args:
+            tool_name: The tool name
+            key: Canonical arguments from canonical_key
+            policy: The tool's cache policy
+
+        Returns:
+            (hit, result) where result is a copy of the cached value on a hit
+        """
+        with self._lock:
+            entries = self._entries.get(tool_name)
+            entry = entries.get(key) if entries is not None else None
+            if entry is not None and policy.kind == "ttl" and time.monotonic() - entry[0] > policy.ttl:
+                del entries[key]
+                entry = None
+            if entry is None:
+                self._misses[tool_name] += 1
+                return False, None
+            entries.move_to_end(key)
+            self._hits[tool_name] += 1
+            value = entry[1]
+        # Copy so callers cannot mutate the cached result
+        return True, copy.deepcopy(value)
+
+    def put(self, tool_name: str, key: str, policy: CachePolicy, result: Any) -> None:
+        """
+        Store a result, evicting the tool's least recently used entries over its bound.
+
+        Args:
+            tool_name: The tool name
+            key: Canonical arguments from canonical_key
+            policy: The tool's cache policy
+            result: The tool result
+        """
+        value = copy.deepcopy(result)
+        with self._lock:
+            entries = self._entries.setdefault(tool_name, OrderedDict())
+            entries[key] = (time.monotonic(), value)
+            entries.move_to_end(key)
+            while len(entries) > policy.max_entries:
+                entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Drop all cached results and reset the metrics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._hits.clear()
+            self._misses.clear()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get per-tool cache metrics.
+
+        Returns:
+            Dict mapping tool name to hits, misses, hit_rate and entries
+        """
+        with self._lock:
+            tools = set(self._hits) | set(self._misses)
+            return {
+                tool: {
+                    "hits": self._hits[tool],
+                    "misses": self._misses[tool],
+                    "hit_rate": self._hits[tool] / (self._hits[tool] + self._misses[tool]),
+                    "entries": len(self._entries.get(tool, ())),
+                }
+                for tool in sorted(tools)
+            }
+
+
+# Process-wide cache used by execute_tool; AGENT_TOOL_CACHE=0 disables it
+TOOL_CACHE = ToolResultCache(enabled=os.getenv("AGENT_TOOL_CACHE", "1") not in ("0", "false", "False"))
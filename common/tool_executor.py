@@ -0,0 +1,333 @@
+"""
+Isolated tool execution in a pre-forked process pool.
+
+Tools marked with the isolated decorator run in worker processes instead
+of the agent's thread. Every call has a wall-clock timeout and an address
+space limit; a worker that times out, is cancelled or crashes is killed
+and replaced, so one runaway tool (e.g. calculate("9**9**9")) cannot stall
+the agent loop or hold the GIL. Results keep execute_tool's
+{"error", "result"} shape.
+"""
+import os
+import time
+import queue
+import atexit
+import threading
+import multiprocessing
+from typing import Dict, Any, Optional, Callable
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Seconds between checks for results and cancellation while a tool runs
+POLL_INTERVAL = 0.05
+
+
+class IsolationPolicy:
+    """
+    Limits of an isolated tool call.
+    """
+
+    def __init__(self, timeout: float = 5.0, memory_mb: Optional[int] = 256):
+        """
+        Initialize the policy.
+
+        Args:
+            timeout: Wall-clock seconds before the call is killed
+            memory_mb: Additional address space the call may allocate, None for no limit
+        """
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+
+    def __repr__(self) -> str:
+        return f"IsolationPolicy(timeout={self.timeout!r}, memory_mb={self.memory_mb!r})"
+
+
+def isolated(timeout: float = 5.0, memory_mb: Optional[int] = 256) -> Callable:
+    """
+    Decorator marking a tool to run in the isolated worker pool.
+
+    Args:
+        timeout: Wall-clock seconds before the call is killed
+        memory_mb: Additional address space the call may allocate, None for no limit
+
+    Returns:
+        Decorator attaching the policy as the function's isolation attribute
+    """
+    policy = IsolationPolicy(timeout, memory_mb)
+
+    def decorator(func: Callable) -> Callable:
+        func.isolation = policy
+        return func
+
+    return decorator
+
+
+def get_isolation(func: Callable) -> Optional[IsolationPolicy]:
+    """
+    Get the isolation policy of a tool function.
+
+    Args:
+        func: The tool function
+
+    Returns:
+        The declared policy, or None for tools that run inline
+    """
+    return getattr(func, "isolation", None)
+
+
+def _address_space_bytes() -> Optional[int]:
+    """
+    Current virtual memory size of this process (Linux only).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def _set_memory_limit(memory_mb: Optional[int]) -> None:
+    """
+    Limit further address space growth of this process, or lift the limit.
+    """
+    if resource is None:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    current = _address_space_bytes()
+    if memory_mb is None or current is None:
+        soft = hard
+    else:
+        soft = current + memory_mb * 1024 * 1024
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+def _worker_main(conn) -> None:
+    """
+    Worker process loop: run tool calls received over the pipe.
+    """
+    from common.tools import TOOLS
+
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        tool_name, tool_input, memory_mb = request
+        try:
+            _set_memory_limit(memory_mb)
+            result = {"error": None, "result": TOOLS[tool_name](**tool_input)}
+        except MemoryError:
+            result = {"error": f"Tool {tool_name} exceeded its memory limit of {memory_mb} MB", "result": None}
+        except Exception as e:
+            result = {"error": str(e), "result": None}
+        finally:
+            _set_memory_limit(None)
+        conn.send(result)
+
+
+class _Worker:
+    """
+    A worker process and the parent's end of its pipe.
+    """
+
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class ToolExecutor:
+    """
+    Pre-forked pool of tool worker processes with per-call limits.
+    """
+
+    def __init__(self, workers: int = 2, start_method: Optional[str] = None):
+        """
+        Initialize the pool and start its workers.
+
+        Args:
+            workers: Number of worker processes
+            start_method: multiprocessing start method; defaults to
+                "forkserver" where available, since forking a threaded
+                agent process is unsafe
+        """
+        if start_method is None:
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self._context = multiprocessing.get_context(start_method)
+        self.size = workers
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        for _ in range(workers):
+            self._idle.put(_Worker(self._context))
+
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._closed = False
+        self.calls = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.crashes = 0
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.in_flight = 0
+
+    def execute(self, tool_name: str, tool_input: Dict[str, Any], policy: IsolationPolicy,
+                cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """
+        Run a tool in a worker process.
+
+        Args:
+            tool_name: The name of the tool to execute
+            tool_input: The input parameters for the tool
+            policy: Timeout and memory limit of the call
+            cancel: Optional event that aborts the call when set
+
+        Returns:
+            The result of the tool execution, or a timeout, cancellation or
+            crash error, in execute_tool's {"error", "result"} shape. The
+            timeout includes time spent waiting for an idle worker.
+        """
+        if self._closed:
+            return {"error": "Tool executor is shut down", "result": None}
+
+        # The timeout covers waiting for a worker as well as running the tool
+        requested = time.monotonic()
+        deadline = requested + policy.timeout
+        worker = None
+        while worker is None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or (cancel is not None and cancel.is_set()):
+                counter = "cancelled" if remaining > 0 else "timeouts"
+                with self._lock:
+                    self.calls += 1
+                    setattr(self, counter, getattr(self, counter) + 1)
+                    self.wait_seconds += time.monotonic() - requested
+                if counter == "cancelled":
+                    return {"error": f"Tool {tool_name} was cancelled", "result": None}
+                return {"error": f"Tool {tool_name} timed out after {policy.timeout}s", "result": None}
+            try:
+                worker = self._idle.get(timeout=min(POLL_INTERVAL, remaining))
+            except queue.Empty:
+                pass
+        started = time.monotonic()
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.wait_seconds += started - requested
+
+        try:
+            worker.conn.send((tool_name, tool_input, policy.memory_mb))
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return self._replace(worker, "timeouts", f"Tool {tool_name} timed out after {policy.timeout}s")
+                if cancel is not None and cancel.is_set():
+                    return self._replace(worker, "cancelled", f"Tool {tool_name} was cancelled")
+                if worker.conn.poll(min(POLL_INTERVAL, remaining)):
+                    result = worker.conn.recv()
+                    if self._closed:
+                        worker.kill()
+                    else:
+                        self._idle.put(worker)
+                    return result
+        except (EOFError, OSError):
+            return self._replace(worker, "crashes", f"Tool {tool_name} worker exited unexpectedly")
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.busy_seconds += time.monotonic() - started
+
+    def _replace(self, worker: _Worker, counter: str, error: str) -> Dict[str, Any]:
+        """
+        Kill a worker, start a fresh one in its place and count the failure.
+        """
+        worker.kill()
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+        if not self._closed:
+            self._idle.put(_Worker(self._context))
+        return {"error": error, "result": None}
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool utilization metrics.
+
+        Returns:
+            Dict with call and failure counts, busy and queue-wait seconds,
+            in-flight calls and utilization (busy time over worker time)
+        """
+        with self._lock:
+            uptime = time.monotonic() - self._started
+            return {
+                "workers": self.size,
+                "calls": self.calls,
+                "timeouts": self.timeouts,
+                "cancelled": self.cancelled,
+                "crashes": self.crashes,
+                "in_flight": self.in_flight,
+                "busy_seconds": self.busy_seconds,
+                "wait_seconds": self.wait_seconds,
+                "utilization": self.busy_seconds / (self.size * uptime) if uptime > 0 else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        """
+        Stop all idle workers; busy workers are stopped when their call ends.
+        """
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().kill()
+            except queue.Empty:
+                return
+
+
+_executor: Optional[ToolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def isolation_enabled() -> bool:
+    """
+    Check whether isolated tools run in the pool (AGENT_TOOL_ISOLATION, default on).
+    """
+    return os.getenv("AGENT_TOOL_ISOLATION", "1") not in ("0", "false", "False")
+
+
+def get_executor() -> ToolExecutor:
+    """
+    Get the process-wide tool executor, starting it on first use.
+
+    The pool size comes from AGENT_TOOL_WORKERS (default 2).
+
+    Returns:
+        The shared ToolExecutor
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ToolExecutor(workers=int(os.getenv("AGENT_TOOL_WORKERS", "2")))
+        return _executor
+
+
+def shutdown_executor() -> None:
+    """
+    Stop the process-wide tool executor if it was started.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
+
+
+atexit.register(shutdown_executor)
@@ -0,0 +1,236 @@
+"""
+Relevance-based tool selection for large tool catalogs.
+
+Sending every tool schema with every LLM call costs prompt tokens in
+proportion to the catalog size. ToolSelector indexes the tool definitions
+(name, description, parameters and example queries declared with
+@tool_examples) in a local BM25 index and offers the model only the top-k
+tools for the recent user turns, plus pinned tools and tools already called
+in the turn. When no tool matches at all, the full catalog is sent rather
+than leaving the model without tools.
+
+Numbers in the text are indexed as "#num" and arithmetic operators as
+"#op", so "What's 25% of 840?" matches a calculator whose examples contain
+arithmetic even though the query shares no words with it.
+"""
+import re
+import math
+import threading
+from collections import Counter
+from typing import Dict, Any, List, Optional, Iterable, Sequence
+
+from common.embedding import tokenize
+from common import codec
+from common.result_shaping import estimate_tokens
+
+# User turns ranked together, so follow-ups ("and in Paris?") keep their tools
+SELECTION_TURNS = 3
+
+# An operator next to a digit, e.g. "3 * 4", "25%" or "-7"
+_OPERATOR = re.compile(r"\d\s*[-+*/^%]|[-+*/^]\s*\d")
+
+
+def tool_examples(*examples: str):
+    """
+    Declare example user requests a tool answers, used to select it.
+
+    Args:
+        *examples: Example user messages
+
+    Returns:
+        Decorator attaching the examples to the tool function
+    """
+    def decorator(func):
+        func.tool_examples = tuple(examples)
+        return func
+    return decorator
+
+
+def get_examples(func) -> Sequence[str]:
+    """
+    Get the example requests of a tool function.
+
+    Args:
+        func: The tool function
+
+    Returns:
+        The examples, empty if none were declared
+    """
+    return getattr(func, "tool_examples", ())
+
+
+def selection_terms(text: str) -> List[str]:
+    """
+    Split text into index terms.
+
+    Args:
+        text: Query or tool document text
+
+    Returns:
+        Content words with numbers as "#num", plus "#op" if the text has arithmetic
+    """
+    terms = ["#num" if word[0].isdigit() else word for word in tokenize(text.replace("_", " "))]
+    if _OPERATOR.search(text):
+        terms.append("#op")
+    return terms
+
+
+def recent_user_text(messages: Sequence[Any], turns: int = SELECTION_TURNS) -> str:
+    """
+    Join the contents of the last user messages of a conversation.
+
+    Args:
+        messages: Conversation history in chat-completion format
+        turns: Number of user messages to include
+
+    Returns:
+        The messages' text, oldest first
+    """
+    texts: List[str] = []
+    for message in reversed(messages):
+        if len(texts) == turns:
+            break
+        if isinstance(message, dict) and message.get("role") == "user" and isinstance(message.get("content"), str):
+            texts.append(message["content"])
+    return "\n".join(reversed(texts))
+
+
+def tool_document(definition: Dict[str, Any], examples: Iterable[str] = ()) -> str:
+    """
+    Build the indexed text of a tool.
+
+    Args:
+        definition: OpenAI-style tool definition
+        examples: Example user requests
+
+    Returns:
+        Name, description, parameter names and descriptions, and examples
+    """
+    function = definition["function"]
+    parts = [function["name"], function.get("description", "")]
+    for name, schema in function.get("parameters", {}).get("properties", {}).items():
+        parts.append(name)
+        parts.append(schema.get("description", ""))
+    parts.extend(examples)
+    return " ".join(parts)
+
+
+class ToolSelector:
+    """
+    BM25 index over tool definitions selecting the tools to send per LLM call.
+    """
+
+    def __init__(self,
+                 tool_definitions: List[Dict[str, Any]],
+                 k: int = 5,
+                 pinned: Optional[Iterable[str]] = None,
+                 examples: Optional[Dict[str, Sequence[str]]] = None,
+                 k1: float = 1.5,
+                 b: float = 0.75):
+        """
+        Initialize the selector.
+
+        Args:
+            tool_definitions: The full catalog of OpenAI-style tool definitions
+            k: Maximum number of ranked tools to send
+            pinned: Names of tools always sent, e.g. expand_result
+            examples: Example requests per tool name; defaults to the
+                "examples" metadata of common.tools.TOOLS
+            k1: BM25 term frequency saturation
+            b: BM25 document length normalization
+        """
+        if examples is None:
+            from common.tools import TOOLS
+            examples = {name: TOOLS.metadata(name).get("examples", ()) for name in TOOLS}
+
+        self.tool_definitions = tool_definitions
+        self.k = k
+        self.pinned = set(pinned or ())
+        self.names = [d["function"]["name"] for d in tool_definitions]
+
+        # Precompute each (term, tool) BM25 weight; scoring a query is then
+        # a sum of postings of its terms
+        documents = [Counter(selection_terms(tool_document(d, examples.get(name, ()))))
+                     for d, name in zip(tool_definitions, self.names)]
+        lengths = [sum(doc.values()) for doc in documents]
+        average = sum(lengths) / len(lengths) if lengths else 0.0
+        count = len(documents)
+        document_frequency = Counter(term for doc in documents for term in doc)
+        self._postings: Dict[str, List[tuple]] = {}
+        for index, (doc, length) in enumerate(zip(documents, lengths)):
+            norm = k1 * (1 - b + b * length / average) if average else k1
+            for term, tf in doc.items():
+                df = document_frequency[term]
+                idf = math.log((count - df + 0.5) / (df + 0.5) + 1)
+                self._postings.setdefault(term, []).append((index, idf * tf * (k1 + 1) / (tf + norm)))
+
+        # Token cost of each definition, so a selection is priced by a sum
+        self._tool_tokens = [estimate_tokens(codec.dumps(d)) for d in tool_definitions]
+        self._full_tokens = sum(self._tool_tokens)
+        self._lock = threading.Lock()
+        self.selections = 0
+        self.tokens_full = 0
+        self.tokens_sent = 0
+
+    def rank(self, text: str) -> List[tuple]:
+        """
+        Score the tools against a message.
+
+        Args:
+            text: The message
+
+        Returns:
+            (tool name, score) pairs with a positive score, best first
+        """
+        scores: Dict[int, float] = {}
+        for term in set(selection_terms(text)):
+            for index, weight in self._postings.get(term, ()):
+                scores[index] = scores.get(index, 0.0) + weight
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(self.names[index], score) for index, score in ranked]
+
+    def select(self, text: str, used: Iterable[str] = ()) -> List[Dict[str, Any]]:
+        """
+        Choose the tool definitions to send with an LLM call.
+
+        Args:
+            text: The recent user messages, e.g. from recent_user_text
+            used: Tools already called in this turn, kept so the model can
+                call them again
+
+        Returns:
+            The selected definitions in catalog order, or the full catalog
+            if no tool matches the text
+        """
+        ranked = self.rank(text)
+        if ranked:
+            chosen = self.pinned | set(used)
+            chosen.update(name for name, _ in ranked[:self.k])
+            indices = [i for i, name in enumerate(self.names) if name in chosen]
+        else:
+            indices = list(range(len(self.names)))
+        selected = [self.tool_definitions[i] for i in indices]
+        sent = sum(self._tool_tokens[i] for i in indices)
+
+        with self._lock:
+            self.selections += 1
+            self.tokens_full += self._full_tokens
+            self.tokens_sent += sent
+        return selected
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get selection metrics.
+
+        Returns:
+            Dict with selections, tokens_full, tokens_sent, tokens_saved and saved_share
+        """
+        with self._lock:
+            saved = self.tokens_full - self.tokens_sent
+            return {
+                "selections": self.selections,
+                "tokens_full": self.tokens_full,
+                "tokens_sent": self.tokens_sent,
+                "tokens_saved": saved,
+                "saved_share": saved / self.tokens_full if self.tokens_full else 0.0,
+            }
@@ -0,0 +1,297 @@
+"""
+Shared tool server over a Unix domain socket.
+
+One server process hosts TOOLS (and any warm state they keep, such as a
+search index or a loaded model) for many agent worker processes. When
+AGENT_TOOL_SERVER is set to the server's socket path, execute_tool
+forwards calls to it transparently.
+
+Wire format: every frame is a 5-byte header, a big-endian uint32 payload
+length and a uint8 frame kind, followed by a compact JSON payload. A call
+frame carries a batch of [call_id, tool_name, tool_input] entries and the
+reply carries [call_id, {"error", "result"}] entries in the same order.
+The client coalesces concurrent calls into batches and reuses a small
+pool of connections.
+
+Usage:
+    python -m common.tool_server --socket /tmp/agent-tools.sock --workers 8
+    AGENT_TOOL_SERVER=/tmp/agent-tools.sock python -m evaluation.compare_all
+"""
+import os
+import queue
+import struct
+import socket
+import argparse
+import threading
+import socketserver
+import concurrent.futures
+from typing import Dict, Any, List, Optional, Tuple
+
+from common import codec
+
+HEADER = struct.Struct(">IB")
+
+FRAME_CALLS = 1
+FRAME_RESULTS = 2
+FRAME_ERROR = 3
+
+# Largest accepted frame payload in bytes
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+
+def _encode(payload: Any) -> bytes:
+    return codec.dumpb(payload)
+
+
+def send_frame(sock: socket.socket, kind: int, payload: Any) -> None:
+    """
+    Send one frame.
+
+    Args:
+        sock: Connected socket
+        kind: Frame kind (FRAME_CALLS, FRAME_RESULTS or FRAME_ERROR)
+        payload: JSON-serializable payload
+    """
+    body = _encode(payload)
+    sock.sendall(HEADER.pack(len(body), kind) + body)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise EOFError("Connection closed")
+        data += chunk
+    return bytes(data)
+
+
+def recv_frame(sock: socket.socket) -> Tuple[int, Any]:
+    """
+    Receive one frame.
+
+    Args:
+        sock: Connected socket
+
+    Returns:
+        (kind, payload)
+    """
+    size, kind = HEADER.unpack(_recv_exact(sock, HEADER.size))
+    if size > MAX_FRAME_BYTES:
+        raise ValueError(f"Frame of {size} bytes exceeds the {MAX_FRAME_BYTES} byte limit")
+    return kind, codec.loads(_recv_exact(sock, size))
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    """
+    Serves call batches of one client connection until it closes.
+    """
+
+    def handle(self) -> None:
+        from common.tools import execute_local
+
+        while True:
+            try:
+                kind, calls = recv_frame(self.request)
+            except (EOFError, ConnectionError):
+                return
+            except ValueError as e:
+                send_frame(self.request, FRAME_ERROR, str(e))
+                return
+            if kind != FRAME_CALLS:
+                send_frame(self.request, FRAME_ERROR, f"Unexpected frame kind: {kind}")
+                return
+
+            # Run the calls of a batch concurrently, reply once for all of them
+            futures = [self.server.pool.submit(execute_local, name, tool_input) for _, name, tool_input in calls]
+            results = [[call[0], future.result()] for call, future in zip(calls, futures)]
+            send_frame(self.request, FRAME_RESULTS, results)
+
+
+class ToolServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Unix socket server executing tool call batches.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, workers: int = 8):
+        """
+        Initialize the server and bind its socket.
+
+        Args:
+            socket_path: Path of the Unix domain socket
+            workers: Threads executing tool calls
+        """
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.socket_path = socket_path
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tool-server")
+        super().__init__(socket_path, _Handler)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.pool.shutdown(wait=False)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+class ToolClient:
+    """
+    Client batching concurrent tool calls over pooled connections.
+    """
+
+    def __init__(self, socket_path: str, pool_size: int = 4, max_batch: int = 32,
+                 batch_window: float = 0.001, timeout: float = 60.0):
+        """
+        Initialize the client.
+
+        Args:
+            socket_path: Path of the server's Unix domain socket
+            pool_size: Maximum open connections (and batches in flight)
+            max_batch: Maximum calls per batch
+            batch_window: Seconds to wait for more calls after the first of a batch
+            timeout: Socket timeout in seconds
+        """
+        self.socket_path = socket_path
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.timeout = timeout
+        self._pending: "queue.Queue[Tuple[str, Dict[str, Any], concurrent.futures.Future]]" = queue.Queue()
+        self._connections: "queue.LifoQueue[socket.socket]" = queue.LifoQueue()
+        self._senders = concurrent.futures.ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="tool-client")
+        self._batcher = threading.Thread(target=self._run_batcher, daemon=True)
+        self._batcher.start()
+        self.batches = 0
+        self.calls = 0
+
+    def call(self, tool_name: str, tool_input: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Execute a tool on the server.
+
+        Args:
+            tool_name: The name of the tool to execute
+            tool_input: The input parameters for the tool
+            timeout: Seconds to wait for the result
+
+        Returns:
+            The result of the tool execution in execute_tool's shape
+        """
+        future = concurrent.futures.Future()
+        self._pending.put((tool_name, tool_input, future))
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            return {"error": f"Tool {tool_name} timed out after {timeout:.3f}s", "result": None}
+
+    def call_many(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Execute several tools on the server in one batch.
+
+        Args:
+            calls: (tool_name, tool_input) pairs
+
+        Returns:
+            Results in the order of the calls
+        """
+        futures = [concurrent.futures.Future() for _ in calls]
+        self._send_batch([(name, tool_input, f) for (name, tool_input), f in zip(calls, futures)])
+        return [f.result() for f in futures]
+
+    def _run_batcher(self) -> None:
+        """
+        Coalesce queued calls into batches and hand them to sender threads.
+        """
+        while True:
+            batch = [self._pending.get()]
+            try:
+                while len(batch) < self.max_batch:
+                    batch.append(self._pending.get(timeout=self.batch_window))
+            except queue.Empty:
+                pass
+            self._senders.submit(self._send_batch, batch)
+
+    def _connection(self) -> socket.socket:
+        try:
+            return self._connections.get_nowait()
+        except queue.Empty:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            return sock
+
+    def _send_batch(self, batch: List[Tuple[str, Dict[str, Any], concurrent.futures.Future]]) -> None:
+        """
+        Send one batch over a pooled connection and resolve its futures.
+        """
+        sock = None
+        try:
+            sock = self._connection()
+            send_frame(sock, FRAME_CALLS, [[i, name, tool_input] for i, (name, tool_input, _) in enumerate(batch)])
+            kind, payload = recv_frame(sock)
+            if kind != FRAME_RESULTS:
+                raise ConnectionError(f"Tool server error: {payload}")
+            for call_id, result in payload:
+                batch[call_id][2].set_result(result)
+            self._connections.put(sock)
+            self.batches += 1
+            self.calls += len(batch)
+        except (OSError, EOFError, ValueError) as e:
+            if sock is not None:
+                sock.close()
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_result({"error": f"Tool server unavailable: {e}", "result": None})
+
+    def close(self) -> None:
+        """
+        Close pooled connections.
+        """
+        while True:
+            try:
+                self._connections.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_clients: Dict[str, ToolClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(socket_path: str) -> ToolClient:
+    """
+    Get the process-wide client for a tool server socket.
+
+    Args:
+        socket_path: Path of the server's Unix domain socket
+
+    Returns:
+        The shared ToolClient
+    """
+    with _clients_lock:
+        if socket_path not in _clients:
+            _clients[socket_path] = ToolClient(socket_path)
+        return _clients[socket_path]
+
+
+def main():
+    """
+    Main function.
+    """
+    parser = argparse.ArgumentParser(description="Serve TOOLS over a Unix domain socket")
+    parser.add_argument("--socket", default="/tmp/agent-tools.sock", help="Socket path")
+    parser.add_argument("--workers", type=int, default=8, help="Threads executing tool calls")
+    args = parser.parse_args()
+
+    server = ToolServer(args.socket, args.workers)
+    print(f"Serving tools on {args.socket}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,9 +5,22 @@ import json
 import math
 from typing import Dict, Any, List, Optional
 import os
+import time
 import datetime
 
+from common import tracing
+from common import metrics
+from common.tool_cache import TOOL_CACHE, cache_policy, canonical_key, get_policy
+from common.result_shaping import result_shape
+from common.tool_selection import tool_examples, get_examples
+from common.registry import LazyRegistry, load_plugins
+from common.tool_executor import IsolationPolicy, isolated, get_isolation, get_executor, isolation_enabled
 
+
+@cache_policy("ttl", ttl=300)
+@result_shape(fields=["location", "temperature", "conditions", "humidity", "wind_speed"])
+@tool_examples("What's the weather like in Boston?", "Is it raining in Paris right now?",
+               "Temperature and forecast today")
 def get_weather(location: str) -> Dict[str, Any]:
     """
     Get the current weather for a location.
@@ -30,6 +43,10 @@ def get_weather(location: str) -> Dict[str, Any]:
     }
 
 
+@cache_policy("ttl", ttl=3600)
+@result_shape(fields=["title", "content"], max_tokens=300)
+@tool_examples("Search for information about artificial intelligence",
+               "Tell me about the capital of France", "What is machine learning?")
 def search_knowledge_base(query: str, max_results: int = 3) -> List[Dict[str, Any]]:
     """
     Search a knowledge base for information.
@@ -52,6 +69,10 @@ def search_knowledge_base(query: str, max_results: int = 3) -> List[Dict[str, An
     return results[:max_results]
 
 
+@cache_policy("pure")
+@result_shape(fields=["result", "error"])
+@isolated(timeout=5.0, memory_mb=256)
+@tool_examples("Can you calculate 345 * 892?", "What's 25% of 840?", "Compute the square root of 2")
 def calculate(expression: str) -> Dict[str, Any]:
     """
     Evaluate a mathematical expression.
@@ -92,40 +113,170 @@ def calculate(expression: str) -> Dict[str, Any]:
         }
 
 
-# Dictionary mapping tool names to their implementations
-TOOLS = {
-    "get_weather": get_weather,
-    "search_knowledge_base": search_knowledge_base,
-    "calculate": calculate,
-}
+# Tool implementations by name with their schemas; plugin tools from
+# manifests (common.registry) are imported on first call
+TOOLS = LazyRegistry("tools", discover=load_plugins)
+TOOLS.register(
+    "get_weather", get_weather,
+    description="Get the current weather for a location",
+    parameters={
+        "type": "object",
+        "properties": {
+            "location": {
+                "type": "string",
+                "description": "The location to get weather for"
+            }
+        },
+        "required": ["location"]
+    },
+    examples=get_examples(get_weather)
+)
+TOOLS.register(
+    "search_knowledge_base", search_knowledge_base,
+    description="Search a knowledge base for information",
+    parameters={
+        "type": "object",
+        "properties": {
+            "query": {
+                "type": "string",
+                "description": "The search query"
+            },
+            "max_results": {
+                "type": "integer",
+                "description": "Maximum number of results to return"
+            }
+        },
+        "required": ["query"]
+    },
+    examples=get_examples(search_knowledge_base)
+)
+TOOLS.register(
+    "calculate", calculate,
+    description="Evaluate a mathematical expression",
+    parameters={
+        "type": "object",
+        "properties": {
+            "expression": {
+                "type": "string",
+                "description": "The expression to evaluate"
+            }
+        },
+        "required": ["expression"]
+    },
+    examples=get_examples(calculate)
+)
 
 
-def execute_tool(tool_name: str, tool_input: Dict[str, Any]) -> Dict[str, Any]:
+def tool_definitions(names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Build OpenAI-style tool definitions from the registry without importing plugins.
+
+    Args:
+        names: Tools to include, defaults to all registered tools
+
+    Returns:
+        Tool definitions in registration order
+    """
+    definitions = []
+    for name in names if names is not None else TOOLS:
+        metadata = TOOLS.metadata(name)
+        definitions.append({
+            "type": "function",
+            "function": {
+                "name": name,
+                "description": metadata.get("description", ""),
+                "parameters": metadata.get("parameters", {"type": "object", "properties": {}})
+            }
+        })
+    return definitions
+
+
+def execute_tool(tool_name: str, tool_input: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
     """
     Execute a tool by name with the provided input.
+
+    Calls are forwarded to the shared tool server when AGENT_TOOL_SERVER
+    holds its socket path, and executed in this process otherwise.
     
     Args:
         tool_name: The name of the tool to execute
         tool_input: The input parameters for the tool
+        timeout: Seconds to wait for the result, e.g. the time left before a
+            deadline; enforced for remote and isolated tools
         
     Returns:
         The result of the tool execution
     """
-    if tool_name not in TOOLS:
-        return {
-            "error": f"Tool not found: {tool_name}",
-            "result": None
-        }
+    start_time = time.perf_counter()
+    socket_path = os.getenv("AGENT_TOOL_SERVER")
+    if socket_path:
+        from common.tool_server import get_client
+        with tracing.span("tool.execute", tool=tool_name, remote=True) as span:
+            outcome = get_client(socket_path).call(tool_name, tool_input, timeout=timeout)
+            if outcome["error"] is not None:
+                span.set_attribute("error", outcome["error"])
+    else:
+        outcome = execute_local(tool_name, tool_input, timeout=timeout)
+
+    metrics.record_tool_call(tool_name, time.perf_counter() - start_time, outcome["error"] is not None)
+    return outcome
+
+
+def execute_local(tool_name: str, tool_input: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Execute a tool in this process, using the result cache and isolated workers.
     
-    try:
+    Args:
+        tool_name: The name of the tool to execute
+        tool_input: The input parameters for the tool
+        timeout: Upper bound on the isolated call's own timeout
+        
+    Returns:
+        The result of the tool execution
+    """
+    with tracing.span("tool.execute", tool=tool_name) as span:
+        if tool_name not in TOOLS:
+            span.set_attribute("error", "not found")
+            return {
+                "error": f"Tool not found: {tool_name}",
+                "result": None
+            }
+        
         tool_func = TOOLS[tool_name]
-        result = tool_func(**tool_input)
-        return {
-            "error": None,
-            "result": result
-        }
-    except Exception as e:
-        return {
-            "error": str(e),
-            "result": None
-        }
+        policy = get_policy(tool_func)
+        key = canonical_key(tool_input) if TOOL_CACHE.enabled and policy.cacheable else None
+        if key is not None:
+            hit, result = TOOL_CACHE.get(tool_name, key, policy)
+            span.set_attribute("cache", "hit" if hit else "miss")
+            if hit:
+                return {
+                    "error": None,
+                    "result": result
+                }
+
+        isolation = get_isolation(tool_func)
+        if isolation is not None and isolation_enabled():
+            span.set_attribute("isolated", True)
+            if timeout is not None and timeout < isolation.timeout:
+                isolation = IsolationPolicy(timeout, isolation.memory_mb)
+            outcome = get_executor().execute(tool_name, tool_input, isolation)
+            if outcome["error"] is not None:
+                span.set_attribute("error", outcome["error"])
+            elif key is not None:
+                TOOL_CACHE.put(tool_name, key, policy, outcome["result"])
+            return outcome
+
+        try:
+            result = tool_func(**tool_input)
+            if key is not None:
+                TOOL_CACHE.put(tool_name, key, policy, result)
+            return {
+                "error": None,
+                "result": result
+            }
+        except Exception as e:
+            span.set_attribute("error", str(e))
+            return {
+                "error": str(e),
+                "result": None
+            }
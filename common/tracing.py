@@ -0,0 +1,254 @@
+"""
+Lightweight span tracing exportable to the Chrome/Perfetto trace-event format.
+
+Tracing is disabled by default and costs a single function call per span
+when off. Enable it with configure() or by setting the AGENT_TRACE_FILE
+environment variable (and optionally AGENT_TRACE_SAMPLE_RATE). The output
+file can be opened in chrome://tracing or https://ui.perfetto.dev.
+"""
+import os
+import time
+import atexit
+import random
+import threading
+import contextvars
+from typing import Dict, Any, List, Optional
+
+from common import codec
+
+
+# The innermost open span of the current thread or task
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+class _NoopSpan:
+    """
+    Span returned when tracing is disabled.
+    """
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _UnsampledSpan(_NoopSpan):
+    """
+    Root span of a trace dropped by sampling; marks its children as unsampled.
+    """
+
+    def __enter__(self) -> "_UnsampledSpan":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _current_span.reset(self._token)
+
+
+class Span:
+    """
+    A timed, named section of work with attributes.
+    """
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: Dict[str, Any]):
+        """
+        Initialize the span.
+
+        Args:
+            tracer: The tracer that records the span
+            name: The span name
+            attributes: Attributes attached to the span
+        """
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self._start_ns = 0
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """
+        Attach an attribute to the span.
+
+        Args:
+            key: Attribute name
+            value: Attribute value (must be JSON serializable)
+        """
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        self._start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        end_ns = time.perf_counter_ns()
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.attributes["error"] = f"{exc_type.__name__}: {exc}"
+        self.tracer.record(self, self._start_ns, end_ns)
+
+
+class Tracer:
+    """
+    Records spans as complete ("X") trace events in a JSON array file.
+    """
+
+    def __init__(self, path: str, sample_rate: float = 1.0, flush_every: int = 1000):
+        """
+        Initialize the tracer and open the trace file.
+
+        Args:
+            path: Path of the trace file to write
+            sample_rate: Fraction of root spans (and their children) to record
+            flush_every: Number of buffered events before writing to disk
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.sample_rate = sample_rate
+        self.flush_every = flush_every
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self._events: List[Dict[str, Any]] = []
+        self._file = open(path, "w")
+        # The closing bracket is optional in the trace-event array format,
+        # so the file stays loadable even if the process dies mid-run
+        self._file.write("[")
+        self._first = True
+
+    def span(self, name: str, **attributes: Any):
+        """
+        Create a span, applying the sampling decision at the root of a trace.
+
+        Args:
+            name: The span name
+            **attributes: Attributes attached to the span
+
+        Returns:
+            A context manager for the span
+        """
+        parent = _current_span.get()
+        if parent is None:
+            if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+                return _UnsampledSpan()
+        elif isinstance(parent, _UnsampledSpan):
+            return _NOOP_SPAN
+        return Span(self, name, attributes)
+
+    def record(self, span: Span, start_ns: int, end_ns: int) -> None:
+        """
+        Record a finished span.
+
+        Args:
+            span: The finished span
+            start_ns: Start timestamp in nanoseconds
+            end_ns: End timestamp in nanoseconds
+        """
+        event = {
+            "name": span.name,
+            "cat": span.name.split(".", 1)[0],
+            "ph": "X",
+            "ts": start_ns / 1000,
+            "dur": (end_ns - start_ns) / 1000,
+            "pid": self.pid,
+            "tid": threading.get_ident(),
+            "args": span.attributes,
+        }
+        with self._lock:
+            self._events.append(event)
+            if len(self._events) >= self.flush_every:
+                self._write_events()
+
+    def _write_events(self) -> None:
+        """
+        Write buffered events to the trace file. Caller must hold the lock.
+        """
+        for event in self._events:
+            separator = "\n" if self._first else ",\n"
+            self._file.write(separator + codec.dumps(event))
+            self._first = False
+        self._events = []
+        self._file.flush()
+
+    def flush(self) -> None:
+        """
+        Write all buffered events to disk.
+        """
+        with self._lock:
+            self._write_events()
+
+    def close(self) -> None:
+        """
+        Flush buffered events and close the trace file.
+        """
+        with self._lock:
+            if self._file.closed:
+                return
+            self._write_events()
+            self._file.write("\n]\n")
+            self._file.close()
+
+
+_tracer: Optional[Tracer] = None
+
+
+def configure(path: str, sample_rate: float = 1.0, flush_every: int = 1000) -> Tracer:
+    """
+    Enable tracing to the given file, replacing any active tracer.
+
+    Args:
+        path: Path of the trace file to write
+        sample_rate: Fraction of traces to record
+        flush_every: Number of buffered events before writing to disk
+
+    Returns:
+        The active tracer
+    """
+    global _tracer
+    shutdown()
+    _tracer = Tracer(path, sample_rate=sample_rate, flush_every=flush_every)
+    return _tracer
+
+
+def shutdown() -> None:
+    """
+    Disable tracing and close the trace file.
+    """
+    global _tracer
+    if _tracer is not None:
+        _tracer.close()
+        _tracer = None
+
+
+def span(name: str, **attributes: Any):
+    """
+    Open a span on the active tracer.
+
+    Args:
+        name: The span name, "<category>.<operation>" by convention
+        **attributes: Attributes attached to the span
+
+    Returns:
+        A context manager; a shared no-op when tracing is disabled
+    """
+    if _tracer is None:
+        return _NOOP_SPAN
+    return _tracer.span(name, **attributes)
+
+
+atexit.register(shutdown)
+
+if os.getenv("AGENT_TRACE_FILE"):
+    configure(
+        os.getenv("AGENT_TRACE_FILE"),
+        sample_rate=float(os.getenv("AGENT_TRACE_SAMPLE_RATE", "1.0")),
+    )
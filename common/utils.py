@@ -4,10 +4,12 @@ Utility functions for the multi-framework agent lab.
 import json
 import time
 import os
-from typing import Dict, Any, List, Optional, Callable
+from typing import Dict, Any, List, Optional, Callable, Iterator
 import datetime
 from dotenv import load_dotenv
 
+from common import codec
+
 # Load environment variables
 load_dotenv()
 
@@ -54,6 +56,29 @@ def load_json_file(file_path: str) -> Dict[str, Any]:
     except Exception as e:
         print(f"Error loading JSON file {file_path}: {e}")
         return {}
+
+
+def iter_jsonl_file(file_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream records from a JSONL file one line at a time.
+    
+    Unlike load_json_file, memory use is constant in the file size.
+    
+    Args:
+        file_path: Path to the JSONL file
+        
+    Returns:
+        Iterator over the decoded records; blank lines are skipped
+    """
+    with open(file_path, 'r') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield codec.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"Skipping invalid JSON on line {line_number} of {file_path}: {e}")
         
         
 def save_json_file(data: Dict[str, Any], file_path: str) -> bool:
@@ -113,7 +138,7 @@ def convert_to_openai_messages(conversation: List[Dict[str, Any]]) -> List[Dict[
                         "type": "function",
                         "function": {
                             "name": tc["tool_name"],
-                            "arguments": json.dumps(tc["tool_input"])
+                            "arguments": codec.dumps(tc["tool_input"])
                         }
                     }
                     for i, tc in enumerate(msg["tool_calls"])
@@ -124,7 +149,7 @@ def convert_to_openai_messages(conversation: List[Dict[str, Any]]) -> List[Dict[
             openai_messages.append({
                 "role": "tool",
                 "tool_call_id": msg.get("tool_call_id", "call_0"),
-                "content": json.dumps(msg.get("content", {}))
+                "content": codec.dumps(msg.get("content", {}))
             })
             
     return openai_messages
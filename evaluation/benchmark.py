@@ -0,0 +1,228 @@
+"""
+Statistically rigorous benchmark runner for agent implementations.
+
+Runs warmup iterations, then repeated trials in which every
+(framework, query) pair is executed once in a randomized order to cancel
+out drift. Latencies are summarized with the median, IQR and a bootstrap
+confidence interval, and every pair of frameworks gets a verdict.
+
+Every sample starts with a cold tool result cache: frameworks are
+interleaved, so a shared warm cache would let one framework run on results
+cached by another.
+
+Usage:
+    python -m evaluation.benchmark --warmup 1 --trials 10 --confidence 0.95
+"""
+import sys
+import os
+import time
+import random
+import argparse
+import itertools
+from typing import Dict, Any, List, Optional, Tuple, Type
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(parent_dir)
+
+from common.schema import UserMessage
+from common.offline_llm import OFFLINE_MODEL
+from agents.base_agent import BaseAgent
+from common.registry import AGENTS
+from common.tool_cache import TOOL_CACHE
+from evaluation.compare_all import TEST_QUERIES, RESULTS_DIR
+from evaluation.results_writer import ResultsWriter, iter_rows
+from evaluation.history import BenchmarkHistory
+from evaluation.workload import iter_workload
+from evaluation import stats
+
+# Columns written for every timed sample
+BENCHMARK_FIELDS = [
+    ("trial", "int"),
+    ("framework", "string"),
+    ("query_index", "int"),
+    ("latency", "float"),
+    ("total_tokens", "int"),
+    ("error_count", "int"),
+    ("tool_cache", "bool"),
+]
+
+
+def time_query(agent: BaseAgent, query: str) -> Dict[str, Any]:
+    """
+    Run a single query on a freshly reset agent with a cold tool cache and time it.
+
+    Args:
+        agent: The initialized agent
+        query: The query to run
+
+    Returns:
+        Dict with the latency and the token and error deltas for the query
+    """
+    agent.reset()
+    TOOL_CACHE.clear()
+    before = agent.get_metrics()
+
+    start_time = time.perf_counter()
+    agent.process(UserMessage(content=query))
+    latency = time.perf_counter() - start_time
+
+    after = agent.get_metrics()
+    return {
+        "latency": latency,
+        "total_tokens": after.total_tokens - before.total_tokens,
+        "error_count": after.error_count - before.error_count,
+        "tool_cache": TOOL_CACHE.enabled,
+    }
+
+
+def run_benchmark(agent_classes: List[Tuple[str, Type[BaseAgent]]],
+                  queries: List[str],
+                  warmup: int = 1,
+                  trials: int = 5,
+                  seed: Optional[int] = None,
+                  writer: Optional[ResultsWriter] = None,
+                  model: Optional[str] = None) -> Dict[str, List[List[float]]]:
+    """
+    Benchmark agents with warmup and randomized interleaved trials.
+
+    Args:
+        agent_classes: (name, class) pairs of the agents to benchmark
+        queries: Queries making up the workload
+        warmup: Untimed iterations over the workload per framework
+        trials: Timed iterations over the workload per framework
+        seed: Seed for the interleaving order
+        writer: Optional writer receiving one row per timed sample
+        model: LLM model to use for every agent (e.g. "offline")
+
+    Returns:
+        Dict mapping framework name to latencies indexed [query][trial]
+    """
+    rng = random.Random(seed)
+
+    agents = {}
+    for name, agent_class in agent_classes:
+        agent = agent_class(model=model)
+        agent.initialize()
+        agents[name] = agent
+
+    pairs = list(itertools.product(agents.keys(), range(len(queries))))
+
+    # Warmup iterations absorb first-call effects (imports, connection setup)
+    for i in range(warmup):
+        print(f"Warmup {i+1}/{warmup}")
+        schedule = pairs[:]
+        rng.shuffle(schedule)
+        for name, query_index in schedule:
+            time_query(agents[name], queries[query_index])
+
+    samples = {name: [[] for _ in queries] for name in agents}
+
+    for trial in range(trials):
+        print(f"Trial {trial+1}/{trials}")
+        # Interleave frameworks randomly so drift affects all of them equally
+        schedule = pairs[:]
+        rng.shuffle(schedule)
+        for name, query_index in schedule:
+            result = time_query(agents[name], queries[query_index])
+            samples[name][query_index].append(result["latency"])
+
+            if writer is not None:
+                writer.write({
+                    "trial": trial,
+                    "framework": name,
+                    "query_index": query_index,
+                    **result,
+                })
+
+    return samples
+
+
+def report(samples: Dict[str, List[List[float]]],
+           confidence: float = 0.95,
+           resamples: int = 2000,
+           seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Print per-framework statistics and pairwise verdicts.
+
+    Args:
+        samples: Latencies per framework indexed [query][trial]
+        confidence: Confidence level for intervals and verdicts
+        resamples: Number of bootstrap resamples
+        seed: Seed for the bootstrap
+
+    Returns:
+        List of pairwise comparison results
+    """
+    flat = {
+        name: [latency for per_query in by_query for latency in per_query]
+        for name, by_query in samples.items()
+    }
+
+    print(f"\nLatency per query (seconds, {confidence:.0%} CI of the median)")
+    print("=" * 60)
+    for name, latencies in flat.items():
+        summary = stats.summarize(latencies, confidence, resamples, seed)
+        print(f"{name}:")
+        print(f"  n={summary['n']}  median={summary['median']:.4f}  IQR={summary['iqr']:.4f}")
+        print(f"  CI=[{summary['ci_low']:.4f}, {summary['ci_high']:.4f}]  outliers={summary['outliers']}")
+
+    print("\nVerdicts")
+    print("=" * 60)
+    comparisons = []
+    for name_a, name_b in itertools.combinations(flat.keys(), 2):
+        # Samples are paired by (query, trial) since both lists share the layout
+        comparison = stats.compare_paired(
+            name_a, flat[name_a], name_b, flat[name_b], confidence, resamples, seed
+        )
+        comparisons.append(comparison)
+        print(comparison["verdict"])
+        print(f"  median paired difference {comparison['median_difference']:+.4f}s "
+              f"CI=[{comparison['ci_low']:+.4f}, {comparison['ci_high']:+.4f}]")
+
+    return comparisons
+
+
+def main():
+    """
+    Main function.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark agent frameworks")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed iterations over the workload")
+    parser.add_argument("--trials", type=int, default=5, help="Timed iterations over the workload")
+    parser.add_argument("--confidence", type=float, default=0.95, help="Confidence level for verdicts")
+    parser.add_argument("--resamples", type=int, default=2000, help="Bootstrap resamples")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for interleaving and bootstrap")
+    parser.add_argument("--workload", default=None, help="Workload file (JSONL, CSV or text) instead of TEST_QUERIES")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of workload queries")
+    parser.add_argument("--offline", action="store_true", help="Use the offline LLM stand-in instead of a provider")
+    parser.add_argument("--label", default=None, help="Label for the run in the benchmark history")
+    parser.add_argument("--no-history", action="store_true", help="Do not record the run in the benchmark history")
+    args = parser.parse_args()
+
+    print("Running Agent Framework Benchmark")
+    print("=================================")
+    print(f"Tool result cache: {'enabled (cleared before every sample)' if TOOL_CACHE.enabled else 'disabled'}")
+
+    queries = TEST_QUERIES
+    if args.workload:
+        queries = [item.query for item in iter_workload(args.workload, args.limit)]
+
+    with ResultsWriter(RESULTS_DIR, BENCHMARK_FIELDS, basename="benchmark_results") as writer:
+        samples = run_benchmark(
+            list(AGENTS.items()), queries,
+            warmup=args.warmup, trials=args.trials, seed=args.seed, writer=writer,
+            model=OFFLINE_MODEL if args.offline else None
+        )
+
+    report(samples, args.confidence, args.resamples, args.seed)
+
+    if not args.no_history:
+        history = BenchmarkHistory()
+        run_id = history.record_run(iter_rows(writer.jsonl_path), source="benchmark", label=args.label)
+        history.close()
+        print(f"\nRecorded run {run_id} in {history.db_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Microbenchmark of the JSON codec backends on one agent iteration's work.
+
+One iteration of the no-framework agent decodes the tool call arguments,
+builds the tool cache key, encodes the tool result for the prompt,
+fingerprints it for deduplication and encodes the tool call for the
+history. This script replays that sequence on real tool outputs with
+each available backend and reports the time per iteration.
+
+Usage:
+    python -m evaluation.codec_bench
+    python -m evaluation.codec_bench --repeat 7 --number 20000
+"""
+import sys
+import os
+import timeit
+import argparse
+import hashlib
+from typing import Dict, Any, List, Callable
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(parent_dir)
+
+from common.codec import JsonCodec, orjson
+from common.tools import get_weather, search_knowledge_base, calculate
+from evaluation import stats
+
+
+def iteration_workload(codec: JsonCodec) -> Callable[[], None]:
+    """
+    Build a callable doing the JSON work of one agent iteration with a codec.
+
+    Args:
+        codec: The codec to exercise
+
+    Returns:
+        A no-argument callable
+    """
+    calls = [
+        ('{"location": "Boston"}', get_weather("Boston")),
+        ('{"query": "artificial intelligence", "max_results": 3}', search_knowledge_base("artificial intelligence")),
+        ('{"expression": "345 * 892"}', calculate("345 * 892")),
+    ]
+
+    def run() -> None:
+        for arguments, result in calls:
+            tool_input = codec.loads(arguments)
+            codec.dumps(tool_input, sort_keys=True, strict=True)
+            hashlib.sha1(codec.dumpb(result, sort_keys=True)).digest()
+            codec.dumps({"error": None, "result": result})
+            codec.dumps(tool_input)
+
+    return run
+
+
+def benchmark(backends: List[str], repeat: int = 5, number: int = 10000) -> Dict[str, Dict[str, Any]]:
+    """
+    Time the iteration workload per backend.
+
+    Args:
+        backends: Backend names to compare
+        repeat: Timing repetitions; the median is reported
+        number: Iterations per repetition
+
+    Returns:
+        Dict of backend to median and best microseconds per iteration
+    """
+    results = {}
+    for backend in backends:
+        run = iteration_workload(JsonCodec(backend))
+        run()
+        samples = [t / number * 1e6 for t in timeit.repeat(run, repeat=repeat, number=number)]
+        results[backend] = {"median_us": stats.median(samples), "best_us": min(samples)}
+    return results
+
+
+def main():
+    """
+    Main function.
+    """
+    parser = argparse.ArgumentParser(description="Compare JSON codec backends on agent iteration work")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions")
+    parser.add_argument("--number", type=int, default=10000, help="Iterations per repetition")
+    args = parser.parse_args()
+
+    backends = ["json"] + (["orjson"] if orjson is not None else [])
+    results = benchmark(backends, args.repeat, args.number)
+
+    print(f"{'Backend':10} {'median (us/iter)':>17} {'best (us/iter)':>15}")
+    for backend, result in results.items():
+        print(f"{backend:10} {result['median_us']:17.2f} {result['best_us']:15.2f}")
+
+    if "orjson" in results:
+        baseline = results["json"]["median_us"]
+        fast = results["orjson"]["median_us"]
+        print(f"\norjson saves {baseline - fast:.2f} us per iteration ({baseline / fast:.1f}x faster)")
+    else:
+        print("\norjson is not installed; install it to enable the fast backend")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,20 +3,27 @@ Script to compare all agent implementations.
 """
 import sys
 import os
-import json
 import time
+import argparse
+import contextlib
 import pandas as pd
 import matplotlib.pyplot as plt
-from typing import Dict, Any, List
 
 # Add parent directory to path to allow imports
 parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.append(parent_dir)
 
-from common.schema import UserMessage, AgentMetrics
-# Import all agent implementations
-from agents.no_framework.agent import NoFrameworkAgent
-from agents.langgraph_functional.agent import LangGraphFunctionalAgent
+from common.schema import UserMessage
+from common.offline_llm import OFFLINE_MODEL
+from common import metrics
+from common import codec
+from common.registry import AGENTS
+from common.tool_cache import TOOL_CACHE
+from evaluation.results_writer import ResultsWriter, read_columns, iter_rows
+from evaluation.history import BenchmarkHistory
+from evaluation.profiling import Profiler, PROFILE_MODES
+from evaluation.memory import MemoryTracker, format_summary
+from evaluation.workload import iter_workload
 
 # List of test queries to run against all agents
 TEST_QUERIES = [
@@ -27,116 +34,212 @@ TEST_QUERIES = [
     "Can you tell me about the capital of France and what the weather is like there right now?"
 ]
 
+# Columns written for every (framework, query) result row
+RESULT_FIELDS = [
+    ("framework", "string"),
+    ("query_index", "int"),
+    ("query", "string"),
+    ("response", "string"),
+    ("tool_calls", "string"),
+    ("execution_time", "float"),
+    ("total_tokens", "int"),
+    ("tool_calls_count", "int"),
+    ("error_count", "int"),
+    ("iterations_saved", "int"),
+    ("iteration_cap_truncations", "int"),
+    ("peak_memory_bytes", "int"),
+    ("retained_memory_bytes", "int"),
+    ("tool_cache", "bool"),
+]
+
+RESULTS_DIR = "evaluation/results"
+
 
-def run_comparison():
+def run_comparison(record_history: bool = True,
+                   label: str = None,
+                   profile_mode: str = None,
+                   model: str = None,
+                   track_memory: bool = False,
+                   workload_path: str = None,
+                   limit: int = None):
     """
     Run the comparison between all agent implementations.
-    """
-    # List of agent classes to test
-    agent_classes = [
-        ("No Framework", NoFrameworkAgent),
-        ("LangGraph (Functional)", LangGraphFunctionalAgent),
-        # Add other agent implementations as they are created
-    ]
+
+    Each query result is streamed to disk as soon as it completes; only
+    running per-framework aggregates are kept in memory. The tool result
+    cache is cleared before each framework so no framework is served
+    results cached by another.
     
+    Args:
+        record_history: Whether to record the run in the benchmark history
+        label: Optional label for the run in the benchmark history
+        profile_mode: Profile each query ("deterministic" or "sampling")
+        model: LLM model to use for every agent (e.g. "offline")
+        track_memory: Measure peak and retained memory of each query
+        workload_path: Workload file to stream queries from instead of TEST_QUERIES
+        limit: Maximum number of workload queries
+    """
     results = []
+    profiler = Profiler(profile_mode) if profile_mode else None
+    memory_tracker = MemoryTracker() if track_memory else None
     
-    for agent_name, agent_class in agent_classes:
-        print(f"\nTesting {agent_name} Agent")
-        print("="*40)
-        
-        # Create and initialize the agent
-        agent = agent_class()
-        agent.initialize()
-        
-        # Track metrics for this agent
-        agent_metrics = {
-            "name": agent_name,
-            "execution_times": [],
-            "token_counts": [],
-            "tool_calls": [],
-            "errors": [],
-            "responses": []
-        }
-        
-        # Run each test query
-        for i, query in enumerate(TEST_QUERIES):
-            print(f"\nQuery {i+1}: {query}")
+    with ResultsWriter(RESULTS_DIR, RESULT_FIELDS) as writer:
+        for agent_name in AGENTS:
+            # Frameworks are imported only when their turn comes
+            try:
+                agent_class = AGENTS[agent_name]
+            except ImportError as e:
+                print(f"\nSkipping {agent_name} Agent: {e}")
+                continue
+            
+            print(f"\nTesting {agent_name} Agent")
+            print("="*40)
+            
+            # Start every framework with a cold tool result cache
+            TOOL_CACHE.clear()
+            
+            # Create and initialize the agent
+            agent = agent_class(model=model)
+            agent.initialize()
             
-            # Process the query
-            start_time = time.time()
-            user_message = UserMessage(content=query)
-            response = agent.process(user_message)
+            # Running aggregates for this agent
+            query_count = 0
+            total_time = 0.0
+            previous = agent.get_metrics()
             
-            # Record time
-            query_time = time.time() - start_time
-            agent_metrics["execution_times"].append(query_time)
+            # Stream the workload afresh for every agent
+            if workload_path:
+                queries = (item.query for item in iter_workload(workload_path, limit))
+            else:
+                queries = iter(TEST_QUERIES)
             
-            # Display and record response
-            print(f"Response: {response.content[:100]}...")
-            agent_metrics["responses"].append({
-                "query": query,
-                "response": response.content,
-                "tool_calls": [tc.dict() for tc in response.tool_calls]
-            })
+            # Run each test query
+            for i, query in enumerate(queries):
+                print(f"\nQuery {i+1}: {query}")
+                
+                # Process the query
+                start_time = time.time()
+                user_message = UserMessage(content=query)
+                memory = None
+                with contextlib.ExitStack() as stack:
+                    if profiler:
+                        stack.enter_context(profiler.profile(agent_name, i))
+                    if memory_tracker:
+                        memory = stack.enter_context(memory_tracker.measure(agent_name))
+                    response = agent.process(user_message)
+                
+                # Record time
+                query_time = time.time() - start_time
+                query_count += 1
+                total_time += query_time
+                
+                print(f"Response: {response.content[:100]}...")
+                
+                # Metrics are cumulative, so record the per-query delta
+                metrics = agent.get_metrics()
+                writer.write({
+                    "framework": agent_name,
+                    "query_index": i,
+                    "query": query,
+                    "response": response.content,
+                    "tool_calls": codec.dumps([tc.model_dump() for tc in response.tool_calls]),
+                    "execution_time": query_time,
+                    "total_tokens": metrics.total_tokens - previous.total_tokens,
+                    "tool_calls_count": metrics.tool_calls_count - previous.tool_calls_count,
+                    "error_count": metrics.error_count - previous.error_count,
+                    "iterations_saved": metrics.iterations_saved - previous.iterations_saved,
+                    "iteration_cap_truncations": (metrics.iteration_cap_truncations
+                                                  - previous.iteration_cap_truncations),
+                    "peak_memory_bytes": memory["peak_bytes"] if memory else None,
+                    "retained_memory_bytes": memory["retained_bytes"] if memory else None,
+                    "tool_cache": TOOL_CACHE.enabled,
+                })
+                previous = metrics
+                
+                # Reset agent for next query
+                agent.reset()
             
-            # Get updated metrics
-            metrics = agent.get_metrics()
+            # Calculate aggregate metrics
+            avg_execution_time = total_time / query_count if query_count else 0.0
             
-            # Record metrics
-            agent_metrics["token_counts"].append(metrics.total_tokens)
-            agent_metrics["tool_calls"].append(metrics.tool_calls_count)
-            agent_metrics["errors"].append(metrics.error_count)
+            summary = {
+                "name": agent_name,
+                "avg_execution_time": avg_execution_time,
+                "total_tokens": previous.total_tokens,
+                "total_tool_calls": previous.tool_calls_count,
+                "total_errors": previous.error_count,
+                "iterations_saved": previous.iterations_saved,
+                "iteration_cap_truncations": previous.iteration_cap_truncations,
+                "tool_cache": {"enabled": TOOL_CACHE.enabled, "tools": TOOL_CACHE.stats()},
+            }
+            if memory_tracker:
+                summary["memory"] = memory_tracker.summary(agent_name)
+            results.append(summary)
             
-            # Reset agent for next query
-            agent.reset()
-        
-        # Calculate aggregate metrics
-        avg_execution_time = sum(agent_metrics["execution_times"]) / len(agent_metrics["execution_times"])
-        total_tokens = agent_metrics["token_counts"][-1]  # Last recorded value
-        total_tool_calls = agent_metrics["tool_calls"][-1]  # Last recorded value
-        total_errors = agent_metrics["errors"][-1]  # Last recorded value
-        
-        # Add to results
-        results.append({
-            "name": agent_name,
-            "avg_execution_time": avg_execution_time,
-            "total_tokens": total_tokens,
-            "total_tool_calls": total_tool_calls,
-            "total_errors": total_errors,
-            "detailed_metrics": agent_metrics
-        })
-        
-        print(f"\n{agent_name} Agent Summary:")
-        print(f"  Average execution time: {avg_execution_time:.2f} seconds")
-        print(f"  Total tokens: {total_tokens}")
-        print(f"  Total tool calls: {total_tool_calls}")
-        print(f"  Total errors: {total_errors}")
-    
-    # Save detailed results
-    os.makedirs("evaluation/results", exist_ok=True)
-    with open("evaluation/results/comparison_results.json", "w") as f:
-        json.dump(results, f, indent=2)
-    
-    # Create comparison charts
-    create_comparison_charts(results)
+            print(f"\n{agent_name} Agent Summary:")
+            print(f"  Average execution time: {avg_execution_time:.2f} seconds")
+            print(f"  Total tokens: {summary['total_tokens']}")
+            print(f"  Total tool calls: {summary['total_tool_calls']}")
+            print(f"  Total errors: {summary['total_errors']}")
+            print(f"  Iterations saved by loop detection: {summary['iterations_saved']}")
+            print(f"  Turns cut off by iteration caps: {summary['iteration_cap_truncations']}")
+            if TOOL_CACHE.enabled:
+                hits = sum(tool["hits"] for tool in summary["tool_cache"]["tools"].values())
+                print(f"  Tool cache hits: {hits}")
+            else:
+                print("  Tool cache: disabled")
+            if memory_tracker:
+                print(format_summary(agent_name, summary["memory"]))
+    
+    if memory_tracker:
+        memory_tracker.stop()
+    
+    if profiler:
+        print(profiler.report())
+        profiler.save()
+        print(f"\nProfiles saved to {profiler.output_dir}")
+    
+    # Record the run so later runs can be checked for regressions
+    if record_history:
+        history = BenchmarkHistory()
+        run_id = history.record_run(
+            iter_rows(writer.jsonl_path), source="compare_all", label=label,
+            latency_field="execution_time"
+        )
+        history.close()
+        print(f"\nRecorded run {run_id} in {history.db_path}")
+    
+    # Create comparison charts from the columnar results
+    create_comparison_charts(writer.parquet_path or writer.jsonl_path)
     
     return results
 
 
-def create_comparison_charts(results: List[Dict[str, Any]]):
+def create_comparison_charts(results_path: str):
     """
-    Create comparison charts from the results.
+    Create comparison charts from a streamed results file.
+    
+    Only the columns needed for the charts are read.
     
     Args:
-        results: List of agent results
+        results_path: Path to the .parquet or .jsonl results file
     """
+    columns = read_columns(results_path, [
+        "framework", "execution_time", "total_tokens", "tool_calls_count", "error_count"
+    ])
+    summary = pd.DataFrame(columns).groupby("framework", sort=False).agg(
+        avg_execution_time=("execution_time", "mean"),
+        total_tokens=("total_tokens", "sum"),
+        total_tool_calls=("tool_calls_count", "sum"),
+        total_errors=("error_count", "sum"),
+    )
+    
     # Extract data for charts
-    names = [r["name"] for r in results]
-    exec_times = [r["avg_execution_time"] for r in results]
-    tokens = [r["total_tokens"] for r in results]
-    tool_calls = [r["total_tool_calls"] for r in results]
-    errors = [r["total_errors"] for r in results]
+    names = list(summary.index)
+    exec_times = list(summary["avg_execution_time"])
+    tokens = list(summary["total_tokens"])
+    tool_calls = list(summary["total_tool_calls"])
+    errors = list(summary["total_errors"])
     
     # Create figure with multiple subplots
     fig, axes = plt.subplots(2, 2, figsize=(15, 10))
@@ -170,18 +273,46 @@ def create_comparison_charts(results: List[Dict[str, Any]]):
     plt.tight_layout(rect=[0, 0, 1, 0.95])
     
     # Save the figure
-    os.makedirs("evaluation/results", exist_ok=True)
-    plt.savefig("evaluation/results/comparison_charts.png")
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    plt.savefig(os.path.join(RESULTS_DIR, "comparison_charts.png"))
     
 
 def main():
     """
     Main function.
     """
+    parser = argparse.ArgumentParser(description="Compare agent frameworks")
+    parser.add_argument("--label", default=None, help="Label for the run in the benchmark history")
+    parser.add_argument("--no-history", action="store_true", help="Do not record the run in the benchmark history")
+    parser.add_argument("--profile", choices=PROFILE_MODES, default=None, help="Profile each framework and query")
+    parser.add_argument("--offline", action="store_true", help="Use the offline LLM stand-in instead of a provider")
+    parser.add_argument("--memory", action="store_true", help="Measure peak and retained memory per query with tracemalloc")
+    parser.add_argument("--workload", default=None, help="Workload file (JSONL, CSV or text) instead of TEST_QUERIES")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of workload queries")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Serve live Prometheus metrics on this local port")
+    parser.add_argument("--metrics-file", default=None, help="Write Prometheus metrics to this file when done")
+    args = parser.parse_args()
+    
     print("Running Agent Framework Comparison")
     print("=================================")
     
-    results = run_comparison()
+    if args.metrics_port is not None:
+        metrics.serve_metrics(args.metrics_port)
+        print(f"Serving metrics on http://127.0.0.1:{args.metrics_port}/metrics")
+    
+    results = run_comparison(
+        record_history=not args.no_history,
+        label=args.label,
+        profile_mode=args.profile,
+        model=OFFLINE_MODEL if args.offline else None,
+        track_memory=args.memory,
+        workload_path=args.workload,
+        limit=args.limit
+    )
+    
+    if args.metrics_file:
+        metrics.dump_metrics(args.metrics_file)
+        print(f"Metrics written to {args.metrics_file}")
     
     print("\nComparison complete! Results saved to evaluation/results/")
 
@@ -0,0 +1,99 @@
+"""
+Queue times of a light tenant next to a bursting tenant, FIFO vs fair share.
+
+A "burst" tenant submits many long requests at once (multi-tool
+conversations) while a "steady" tenant sends short requests at a fixed
+rate. Both compete for the same worker slots. The simulation runs twice
+with the same arrivals:
+
+- fifo: every request is queued under one tenant, i.e. served in arrival order
+- fair: requests are queued per tenant by the FairScheduler
+
+and reports the median and p95 queue time per tenant. Service is
+simulated with sleeps, so the numbers measure the scheduler, not the LLM.
+
+Usage:
+    python -m evaluation.fairness_eval
+    python -m evaluation.fairness_eval --slots 4 --burst 200 --burst-service 0.05 --steady-rate 50
+"""
+import sys
+import os
+import time
+import argparse
+import threading
+from typing import Dict, List
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(parent_dir)
+
+from common.scheduler import FairScheduler
+from evaluation import stats
+
+
+def simulate(fair: bool, slots: int, burst: int, burst_service: float,
+             steady: int, steady_rate: float, steady_service: float) -> Dict[str, List[float]]:
+    """
+    Run one simulation.
+
+    Args:
+        fair: Queue per tenant instead of in arrival order
+        slots: Worker slots shared by the tenants
+        burst: Requests the burst tenant submits at the start
+        burst_service: Seconds each burst request holds a slot
+        steady: Requests of the steady tenant
+        steady_rate: Steady requests per second
+        steady_service: Seconds each steady request holds a slot
+
+    Returns:
+        Dict of tenant to the queue times of its requests
+    """
+    scheduler = FairScheduler(slots, name="fair" if fair else "fifo", max_queued=burst + steady,
+                              service_estimate=burst_service)
+    queue_times: Dict[str, List[float]] = {"burst": [], "steady": []}
+    lock = threading.Lock()
+
+    def request(tenant: str, service: float) -> None:
+        ticket = scheduler.acquire(tenant if fair else "all")
+        time.sleep(service)
+        ticket.release()
+        with lock:
+            queue_times[tenant].append(ticket.queue_time)
+
+    threads = [threading.Thread(target=request, args=("burst", burst_service)) for _ in range(burst)]
+    for thread in threads:
+        thread.start()
+    for _ in range(steady):
+        thread = threading.Thread(target=request, args=("steady", steady_service))
+        thread.start()
+        threads.append(thread)
+        time.sleep(1.0 / steady_rate)
+    for thread in threads:
+        thread.join()
+    return queue_times
+
+
+def main():
+    """
+    Main function.
+    """
+    parser = argparse.ArgumentParser(description="Compare FIFO and fair-share queue times per tenant")
+    parser.add_argument("--slots", type=int, default=4, help="Worker slots")
+    parser.add_argument("--burst", type=int, default=200, help="Requests of the bursting tenant")
+    parser.add_argument("--burst-service", type=float, default=0.05, help="Seconds per burst request")
+    parser.add_argument("--steady", type=int, default=50, help="Requests of the steady tenant")
+    parser.add_argument("--steady-rate", type=float, default=25.0, help="Steady requests per second")
+    parser.add_argument("--steady-service", type=float, default=0.01, help="Seconds per steady request")
+    args = parser.parse_args()
+
+    print(f"{'Policy':6} {'Tenant':8} {'p50 queue (ms)':>15} {'p95 queue (ms)':>15}")
+    for fair in (False, True):
+        queue_times = simulate(fair, args.slots, args.burst, args.burst_service,
+                               args.steady, args.steady_rate, args.steady_service)
+        for tenant, values in queue_times.items():
+            print(f"{'fair' if fair else 'fifo':6} {tenant:8} {stats.median(values) * 1000:15.1f} "
+                  f"{stats.quantile(values, 0.95) * 1000:15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,472 @@
+"""
+Historical benchmark database with regression detection.
+
+Every evaluation run is recorded in a local SQLite database together with
+the git revision and an environment fingerprint, so runs can be compared
+over time.
+
+Usage:
+    python -m evaluation.history list
+    python -m evaluation.history compare --baseline previous --current latest
+"""
+import sys
+import os
+import json
+import sqlite3
+import argparse
+import datetime
+import platform
+import subprocess
+from importlib import metadata
+from typing import Dict, Any, List, Optional, Iterable, Callable, Sequence
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(parent_dir)
+
+from common.tool_cache import TOOL_CACHE
+from evaluation import stats
+
+DEFAULT_DB_PATH = "evaluation/results/benchmark_history.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    source TEXT NOT NULL,
+    label TEXT,
+    git_revision TEXT,
+    environment TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS measurements (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    framework TEXT NOT NULL,
+    query_index INTEGER NOT NULL,
+    trial INTEGER NOT NULL DEFAULT 0,
+    latency REAL NOT NULL,
+    total_tokens INTEGER,
+    error_count INTEGER
+);
+CREATE INDEX IF NOT EXISTS measurements_run ON measurements(run_id, framework, query_index);
+"""
+
+# Packages whose versions are part of the environment fingerprint
+FINGERPRINT_PACKAGES = ["litellm", "langgraph", "langchain", "pydantic"]
+
+
+def git_revision(cwd: Optional[str] = None) -> Optional[str]:
+    """
+    Get the current git revision, suffixed with -dirty for uncommitted changes.
+
+    Args:
+        cwd: Directory inside the repository (defaults to the project root)
+
+    Returns:
+        The revision string, or None outside a git checkout
+    """
+    cwd = cwd or parent_dir
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=cwd, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=cwd, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{revision}-dirty" if status else revision
+
+
+def environment_fingerprint() -> Dict[str, Any]:
+    """
+    Describe the environment a run was executed in.
+
+    Returns:
+        Dict with interpreter, platform, hardware, package versions and
+        whether the tool result cache was enabled
+    """
+    packages = {}
+    for name in FINGERPRINT_PACKAGES:
+        try:
+            packages[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            packages[name] = None
+
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "model": os.getenv("DEFAULT_MODEL"),
+        "tool_cache": TOOL_CACHE.enabled,
+        "packages": packages,
+    }
+
+
+class BenchmarkHistory:
+    """
+    SQLite-backed store of benchmark runs and their per-query measurements.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        """
+        Open (and create if needed) the history database.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """
+        Close the database connection.
+        """
+        self.conn.close()
+
+    def record_run(self,
+                   rows: Iterable[Dict[str, Any]],
+                   source: str,
+                   label: Optional[str] = None,
+                   latency_field: str = "latency") -> int:
+        """
+        Record a run and its measurements.
+
+        Args:
+            rows: Result rows with framework, query_index, latency and optionally
+                trial, total_tokens and error_count
+            source: Name of the tool that produced the run
+            label: Optional human-readable label for the run
+            latency_field: Name of the latency column in the rows
+
+        Returns:
+            The id of the new run
+        """
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (created_at, source, label, git_revision, environment) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    datetime.datetime.now().isoformat(),
+                    source,
+                    label,
+                    git_revision(),
+                    json.dumps(environment_fingerprint(), sort_keys=True),
+                ),
+            )
+            run_id = cursor.lastrowid
+            self.conn.executemany(
+                "INSERT INTO measurements "
+                "(run_id, framework, query_index, trial, latency, total_tokens, error_count) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        run_id,
+                        row["framework"],
+                        row["query_index"],
+                        row.get("trial") or 0,
+                        row[latency_field],
+                        row.get("total_tokens"),
+                        row.get("error_count"),
+                    )
+                    for row in rows
+                ),
+            )
+        return run_id
+
+    def list_runs(self) -> List[Dict[str, Any]]:
+        """
+        List all recorded runs, oldest first.
+
+        Returns:
+            List of run records
+        """
+        cursor = self.conn.execute(
+            "SELECT r.*, COUNT(m.run_id) AS measurements FROM runs r "
+            "LEFT JOIN measurements m ON m.run_id = r.id GROUP BY r.id ORDER BY r.id"
+        )
+        return [dict(row) for row in cursor.fetchall()]
+
+    def resolve_run(self, selector: str, source: Optional[str] = None, before: Optional[int] = None) -> int:
+        """
+        Resolve a run selector to a run id.
+
+        Selectors are a numeric id, "latest", "previous" (the run before the
+        run given by before, or before the latest), a run label or a git
+        revision prefix; the most recent matching run wins.
+
+        Args:
+            selector: The run selector
+            source: Only consider runs of this source (e.g. "benchmark"), so
+                runs of different tools are not compared with each other
+            before: Id of the run "previous" is relative to
+
+        Returns:
+            The matching run id
+        """
+        where, params = ("source = ?", (source,)) if source else ("1 = 1", ())
+        if selector == "previous" and before is not None:
+            row = self.conn.execute(
+                "SELECT created_at FROM runs WHERE id = ?", (before,)
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"No run with id {before}")
+            row = self.conn.execute(
+                f"SELECT id FROM runs WHERE id < ? AND created_at <= ? AND {where} "
+                "ORDER BY created_at DESC, id DESC LIMIT 1",
+                (before, row["created_at"], *params),
+            ).fetchone()
+        elif selector.isdigit():
+            row = self.conn.execute(
+                f"SELECT id FROM runs WHERE id = ? AND {where}", (int(selector), *params)
+            ).fetchone()
+        elif selector in ("latest", "previous"):
+            offset = 0 if selector == "latest" else 1
+            row = self.conn.execute(
+                f"SELECT id FROM runs WHERE {where} ORDER BY id DESC LIMIT 1 OFFSET ?", (*params, offset)
+            ).fetchone()
+        else:
+            row = self.conn.execute(
+                f"SELECT id FROM runs WHERE (label = ? OR git_revision LIKE ?) AND {where} "
+                "ORDER BY id DESC LIMIT 1",
+                (selector, f"{selector}%", *params),
+            ).fetchone()
+
+        if row is None:
+            raise ValueError(f"No run matches {selector!r}" + (f" with source {source!r}" if source else ""))
+        return row["id"]
+
+    def run_source(self, run_id: int) -> str:
+        """
+        Get the source of a run.
+        """
+        return self.conn.execute("SELECT source FROM runs WHERE id = ?", (run_id,)).fetchone()["source"]
+
+    def measurements(self, run_id: int) -> Dict[str, Dict[int, Dict[str, List[float]]]]:
+        """
+        Load a run's measurements grouped by framework and query.
+
+        Args:
+            run_id: The run to load
+
+        Returns:
+            Dict of framework -> query_index -> {"latency": [...], "total_tokens": [...]}
+        """
+        grouped: Dict[str, Dict[int, Dict[str, List[float]]]] = {}
+        cursor = self.conn.execute(
+            "SELECT framework, query_index, latency, total_tokens FROM measurements "
+            "WHERE run_id = ? ORDER BY framework, query_index, trial",
+            (run_id,),
+        )
+        for row in cursor:
+            per_query = grouped.setdefault(row["framework"], {}).setdefault(
+                row["query_index"], {"latency": [], "total_tokens": []}
+            )
+            per_query["latency"].append(row["latency"])
+            if row["total_tokens"] is not None:
+                per_query["total_tokens"].append(row["total_tokens"])
+        return grouped
+
+
+def _check_metric(framework: str,
+                  query_index: Optional[int],
+                  metric: str,
+                  baseline: List[float],
+                  current: List[float],
+                  threshold: float,
+                  confidence: float,
+                  higher_is_worse: bool = True,
+                  statistic: Callable[[Sequence[float]], float] = stats.median) -> Optional[Dict[str, Any]]:
+    """
+    Decide whether one metric regressed between two runs.
+
+    With at least two samples on each side a change is only flagged when the
+    bootstrap confidence interval of the statistic's difference excludes
+    zero. With fewer samples no test is possible: a change above the
+    threshold is returned with significant set to None.
+
+    Returns:
+        A finding dict if the metric regressed or could not be tested, otherwise None
+    """
+    if not baseline or not current:
+        return None
+
+    base_median = statistic(baseline)
+    cur_median = statistic(current)
+    change = cur_median - base_median if higher_is_worse else base_median - cur_median
+    relative = change / base_median if base_median else 0.0
+
+    if relative <= threshold:
+        return None
+
+    significant = None
+    if len(baseline) >= 2 and len(current) >= 2:
+        ci_low, ci_high = stats.bootstrap_diff_ci(baseline, current, statistic=statistic,
+                                                  confidence=confidence, seed=0)
+        significant = ci_low > 0 if higher_is_worse else ci_high < 0
+        if not significant:
+            return None
+
+    return {
+        "framework": framework,
+        "query_index": query_index,
+        "metric": metric,
+        "baseline": base_median,
+        "current": cur_median,
+        "relative_change": relative,
+        "significant": significant,
+    }
+
+
+def _throughput(latencies: Sequence[float]) -> float:
+    total = sum(latencies)
+    return len(latencies) / total if total > 0 else 0.0
+
+
+def _trial_throughputs(queries: Dict[int, Dict[str, List[float]]], common: List[int]) -> List[float]:
+    """
+    Compute the throughput of each repetition (trial) over the common queries.
+
+    Trials are the positions in each query's latency list, and only trials
+    every common query has are used.
+    """
+    trials = min((len(queries[q]["latency"]) for q in common), default=0)
+    return [_throughput([queries[q]["latency"][t] for q in common]) for t in range(trials)]
+
+
+def find_regressions(baseline: Dict[str, Dict[int, Dict[str, List[float]]]],
+                     current: Dict[str, Dict[int, Dict[str, List[float]]]],
+                     threshold: float = 0.05,
+                     confidence: float = 0.95) -> List[Dict[str, Any]]:
+    """
+    Compare two runs and list latency, token and throughput regressions.
+
+    Args:
+        baseline: Measurements of the baseline run
+        current: Measurements of the current run
+        threshold: Minimum relative change worth flagging
+        confidence: Confidence level for significance tests
+
+    Returns:
+        List of regression findings
+    """
+    findings = []
+    for framework, current_queries in current.items():
+        baseline_queries = baseline.get(framework)
+        if not baseline_queries:
+            continue
+
+        for query_index, cur in current_queries.items():
+            base = baseline_queries.get(query_index)
+            if base is None:
+                continue
+            for metric in ("latency", "total_tokens"):
+                finding = _check_metric(
+                    framework, query_index, metric, base[metric], cur[metric],
+                    threshold, confidence
+                )
+                if finding:
+                    findings.append(finding)
+
+        # Throughput over the queries both runs have in common, in queries per second
+        common = [q for q in current_queries if q in baseline_queries]
+        base_trials = _trial_throughputs(baseline_queries, common)
+        cur_trials = _trial_throughputs(current_queries, common)
+        if len(base_trials) >= 2 and len(cur_trials) >= 2:
+            # One throughput per repetition of the query set
+            finding = _check_metric(framework, None, "throughput", base_trials, cur_trials,
+                                    threshold, confidence, higher_is_worse=False)
+        else:
+            # A single repetition: bootstrap the throughput over the queries
+            finding = _check_metric(
+                framework, None, "throughput",
+                [latency for q in common for latency in baseline_queries[q]["latency"]],
+                [latency for q in common for latency in current_queries[q]["latency"]],
+                threshold, confidence, higher_is_worse=False, statistic=_throughput
+            )
+        if finding:
+            findings.append(finding)
+
+    return findings
+
+
+def _format_finding(finding: Dict[str, Any]) -> str:
+    where = "all queries" if finding["query_index"] is None else f"query {finding['query_index']}"
+    return (f"  {finding['framework']} / {where} / {finding['metric']}: "
+            f"{finding['baseline']:.4f} -> {finding['current']:.4f} "
+            f"({finding['relative_change']:+.1%})")
+
+
+def main():
+    """
+    Main function.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark history and regression detection")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Path to the history database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("list", help="List recorded runs")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare a run against a baseline")
+    compare_parser.add_argument("--baseline", default="previous", help="Baseline run selector")
+    compare_parser.add_argument("--current", default="latest", help="Current run selector")
+    compare_parser.add_argument("--source", default=None,
+                                help="Source of the runs to compare; defaults to the current run's source")
+    compare_parser.add_argument("--threshold", type=float, default=0.05,
+                                help="Minimum relative change to flag (0.05 = 5%%)")
+    compare_parser.add_argument("--confidence", type=float, default=0.95,
+                                help="Confidence level for significance tests")
+    args = parser.parse_args()
+
+    history = BenchmarkHistory(args.db)
+
+    if args.command == "list":
+        for run in history.list_runs():
+            print(f"{run['id']:>4}  {run['created_at']}  {run['source']:<12} "
+                  f"{(run['git_revision'] or '-')[:12]:<12}  {run['label'] or ''}  "
+                  f"({run['measurements']} measurements)")
+        return
+
+    try:
+        current_id = history.resolve_run(args.current, args.source)
+        source = args.source or history.run_source(current_id)
+        baseline_id = history.resolve_run(args.baseline, source, before=current_id)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(2)
+
+    findings = find_regressions(
+        history.measurements(baseline_id), history.measurements(current_id),
+        args.threshold, args.confidence
+    )
+
+    print(f"Comparing run {current_id} against baseline {baseline_id}")
+    untested = [finding for finding in findings if finding["significant"] is None]
+    regressions = [finding for finding in findings if finding["significant"]]
+
+    if untested:
+        # One sample per side cannot separate a regression from noise, so
+        # these are shown but do not fail the comparison
+        print(f"{len(untested)} change(s) above the threshold with insufficient samples "
+              "for a significance test (record more trials):")
+        for finding in untested:
+            print(_format_finding(finding))
+
+    if not regressions:
+        print("No regressions detected")
+        sys.exit(0)
+
+    print(f"{len(regressions)} regression(s) detected:")
+    for finding in regressions:
+        print(_format_finding(finding))
+    sys.exit(1)
+
+if __name__ == "__main__":
+    main()
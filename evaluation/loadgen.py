@@ -0,0 +1,349 @@
+"""
+Open-loop load generator with SLO reporting.
+
+Requests are sent on a fixed or Poisson arrival schedule, independent of
+how fast earlier requests complete, and the rate is ramped step by step.
+Latency is measured from each request's intended send time, so time a
+request spends waiting behind a saturated target is counted instead of
+silently omitted (coordinated omission). The report gives the maximum
+throughput at which each target still meets the p99 latency SLO.
+
+Usage:
+    python -m evaluation.loadgen --offline --rates 1,2,4,8,16 --duration 10 --slo-p99 2.0
+    python -m evaluation.loadgen --url http://127.0.0.1:8000 --rates 5,10,20 --workload workload.jsonl
+"""
+import sys
+import os
+import time
+import uuid
+import random
+import argparse
+import itertools
+import threading
+import urllib.error
+import urllib.request
+import concurrent.futures
+from typing import Dict, Any, List, Optional, Callable, Iterator, Tuple, Type
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(parent_dir)
+
+from common.schema import UserMessage
+from common.offline_llm import OFFLINE_MODEL
+from common.registry import AGENTS
+from common import codec
+from agents.base_agent import BaseAgent
+from evaluation.results_writer import ResultsWriter
+from evaluation.workload import iter_workload, default_workload
+from evaluation import stats
+
+ARRIVAL_PROCESSES = ("fixed", "poisson")
+
+# Columns written for every ramp step
+LOADGEN_FIELDS = [
+    ("target", "string"),
+    ("rate", "float"),
+    ("sent", "int"),
+    ("errors", "int"),
+    ("throughput", "float"),
+    ("p50", "float"),
+    ("p99", "float"),
+    ("service_p99", "float"),
+    ("max_latency", "float"),
+    ("meets_slo", "bool"),
+]
+
+
+def arrival_times(rate: float, duration: float, process: str = "fixed",
+                  rng: Optional[random.Random] = None) -> List[float]:
+    """
+    Compute intended send times of one step.
+
+    Args:
+        rate: Requests per second
+        duration: Length of the step in seconds
+        process: "fixed" for evenly spaced or "poisson" for exponential gaps
+        rng: Random source for Poisson arrivals
+
+    Returns:
+        Send offsets in seconds from the start of the step
+    """
+    if process not in ARRIVAL_PROCESSES:
+        raise ValueError(f"Unknown arrival process: {process}")
+    if rate <= 0:
+        return []
+
+    if process == "fixed":
+        return [i / rate for i in range(int(rate * duration))]
+
+    rng = rng or random.Random()
+    times, t = [], rng.expovariate(rate)
+    while t < duration:
+        times.append(t)
+        t += rng.expovariate(rate)
+    return times
+
+
+class AgentTarget:
+    """
+    In-process target running queries on agents of one framework.
+
+    Agents keep conversation state and are not thread-safe, so every
+    load-generator thread gets its own agent, reset before each request.
+    """
+
+    def __init__(self, agent_class: Type[BaseAgent], model: Optional[str] = None):
+        """
+        Initialize the target.
+
+        Args:
+            agent_class: The agent implementation to load
+            model: LLM model to use (e.g. "offline")
+        """
+        self.agent_class = agent_class
+        self.model = model
+        self._local = threading.local()
+
+    def __call__(self, query: str) -> bool:
+        agent = getattr(self._local, "agent", None)
+        if agent is None:
+            agent = self.agent_class(model=self.model)
+            agent.initialize()
+            self._local.agent = agent
+        agent.reset()
+        before = agent.get_metrics().error_count
+        agent.process(UserMessage(content=query))
+        return agent.get_metrics().error_count == before
+
+
+class HttpTarget:
+    """
+    Target posting queries to a running serving.app endpoint.
+
+    Like AgentTarget, every request starts a fresh conversation: it is
+    posted to a new session, which is deleted once answered so the service
+    does not hold idle sessions until they expire.
+    """
+
+    def __init__(self, url: str, timeout: float = 60.0):
+        """
+        Initialize the target.
+
+        Args:
+            url: Base URL of the service, e.g. http://127.0.0.1:8000
+            timeout: Request timeout in seconds
+        """
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def __call__(self, query: str) -> bool:
+        session_url = f"{self.url}/sessions/{uuid.uuid4().hex}"
+        request = urllib.request.Request(
+            session_url + "/messages", data=codec.dumpb({"content": query}),
+            headers={"Content-Type": "application/json"}, method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+                ok = response.status == 200
+        except (urllib.error.URLError, OSError):
+            # HTTPError (e.g. 503 when shedding load) is a URLError
+            return False
+        try:
+            with urllib.request.urlopen(urllib.request.Request(session_url, method="DELETE"),
+                                        timeout=self.timeout) as response:
+                response.read()
+        except (urllib.error.URLError, OSError):
+            # The session expires on its own
+            pass
+        return ok
+
+
+def run_step(target: Callable[[str], bool],
+             queries: Iterator[str],
+             rate: float,
+             duration: float,
+             process: str = "fixed",
+             concurrency: int = 64,
+             rng: Optional[random.Random] = None,
+             executor: Optional[concurrent.futures.ThreadPoolExecutor] = None) -> Dict[str, Any]:
+    """
+    Send load at one rate and measure latency from intended send times.
+
+    Args:
+        target: Callable running one query and returning whether it succeeded
+        queries: Endless iterator of queries to send
+        rate: Requests per second
+        duration: Length of the step in seconds
+        process: Arrival process, "fixed" or "poisson"
+        concurrency: Maximum requests in flight; later arrivals queue and
+            their queueing time counts towards latency
+        rng: Random source for Poisson arrivals
+        executor: Thread pool sending the requests; by default one with
+            `concurrency` workers is created for the step
+
+    Returns:
+        Dict with the rate, requests sent, errors, achieved throughput and
+        latency percentiles (corrected and service-time only)
+    """
+    offsets = arrival_times(rate, duration, process, rng)
+
+    def send(query: str, intended: float) -> Tuple[float, float, bool]:
+        started = time.perf_counter()
+        try:
+            ok = target(query)
+        except Exception:
+            ok = False
+        finished = time.perf_counter()
+        return finished - intended, finished - started, ok
+
+    own_executor = executor is None
+    if own_executor:
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=concurrency)
+    futures = []
+    try:
+        start = time.perf_counter()
+        for offset in offsets:
+            intended = start + offset
+            delay = intended - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(executor.submit(send, next(queries), intended))
+        results = [f.result() for f in futures]
+    finally:
+        if own_executor:
+            executor.shutdown()
+    elapsed = time.perf_counter() - start
+
+    latencies = [r[0] for r in results]
+    service_times = [r[1] for r in results]
+    errors = sum(1 for r in results if not r[2])
+    return {
+        "rate": rate,
+        "sent": len(results),
+        "errors": errors,
+        "throughput": (len(results) - errors) / elapsed if elapsed > 0 else 0.0,
+        "p50": stats.quantile(latencies, 0.5) if latencies else 0.0,
+        "p99": stats.quantile(latencies, 0.99) if latencies else 0.0,
+        "service_p99": stats.quantile(service_times, 0.99) if service_times else 0.0,
+        "max_latency": max(latencies, default=0.0),
+    }
+
+
+def ramp(target: Callable[[str], bool],
+         queries: List[str],
+         rates: List[float],
+         duration: float,
+         slo_p99: float,
+         max_error_rate: float = 0.01,
+         process: str = "fixed",
+         concurrency: int = 64,
+         seed: Optional[int] = None,
+         stop_on_violation: bool = True) -> List[Dict[str, Any]]:
+    """
+    Ramp the arrival rate step by step and check each step against the SLO.
+
+    All steps share one thread pool, so per-thread state of the target
+    (e.g. AgentTarget's agents) is built once rather than at every step.
+
+    Args:
+        target: Callable running one query and returning whether it succeeded
+        queries: Queries sent round-robin
+        rates: Requests per second of each step, in order
+        duration: Length of each step in seconds
+        slo_p99: Maximum acceptable p99 latency in seconds
+        max_error_rate: Maximum acceptable fraction of failed requests
+        process: Arrival process, "fixed" or "poisson"
+        concurrency: Maximum requests in flight
+        seed: Seed for Poisson arrivals
+        stop_on_violation: Stop ramping after the first step missing the SLO
+
+    Returns:
+        List of step results, each with a meets_slo flag
+    """
+    rng = random.Random(seed)
+    query_stream = itertools.cycle(queries)
+    steps = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for rate in rates:
+            step = run_step(target, query_stream, rate, duration, process, concurrency, rng, executor)
+            error_rate = step["errors"] / step["sent"] if step["sent"] else 0.0
+            step["meets_slo"] = step["p99"] <= slo_p99 and error_rate <= max_error_rate
+            steps.append(step)
+            print(f"  {rate:8.2f} req/s: p50 {step['p50']:.3f}s, p99 {step['p99']:.3f}s "
+                  f"(service p99 {step['service_p99']:.3f}s), {step['throughput']:.2f} ok/s, "
+                  f"{step['errors']} errors {'OK' if step['meets_slo'] else 'SLO MISSED'}")
+            if stop_on_violation and not step["meets_slo"]:
+                break
+    return steps
+
+
+def max_sustainable_rate(steps: List[Dict[str, Any]]) -> Optional[float]:
+    """
+    Find the highest rate reached before the first SLO violation.
+
+    Args:
+        steps: Output of ramp, in ramp order
+
+    Returns:
+        The maximum sustainable rate, or None if the first step missed the SLO
+    """
+    sustainable = None
+    for step in steps:
+        if not step["meets_slo"]:
+            break
+        sustainable = step["rate"]
+    return sustainable
+
+
+def main():
+    """
+    Main function.
+    """
+    parser = argparse.ArgumentParser(description="Open-loop load test with SLO reporting")
+    parser.add_argument("--rates", default="1,2,4,8", help="Comma-separated requests per second of each step")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per step")
+    parser.add_argument("--process", choices=ARRIVAL_PROCESSES, default="poisson", help="Arrival process")
+    parser.add_argument("--slo-p99", type=float, default=5.0, help="p99 latency SLO in seconds")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Maximum fraction of failed requests")
+    parser.add_argument("--concurrency", type=int, default=64, help="Maximum requests in flight")
+    parser.add_argument("--url", default=None, help="Load a serving endpoint instead of in-process agents")
+    parser.add_argument("--framework", action="append", default=None,
+                        help="Framework display name to load (repeatable, defaults to all)")
+    parser.add_argument("--workload", default=None, help="Workload file (JSONL, CSV or text) instead of TEST_QUERIES")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of workload queries")
+    parser.add_argument("--offline", action="store_true", help="Use the offline LLM stand-in instead of a provider")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for Poisson arrivals")
+    parser.add_argument("--no-stop", action="store_true", help="Keep ramping after the SLO is missed")
+    args = parser.parse_args()
+
+    rates = [float(r) for r in args.rates.split(",")]
+    items = iter_workload(args.workload, args.limit) if args.workload else default_workload()
+    queries = [item.query for item in items]
+
+    if args.url:
+        targets = [(args.url, HttpTarget(args.url))]
+    else:
+        model = OFFLINE_MODEL if args.offline else None
+        targets = [(name, AgentTarget(AGENTS[name], model)) for name in AGENTS
+                   if not args.framework or name in args.framework]
+
+    summary = []
+    with ResultsWriter("evaluation/results", LOADGEN_FIELDS, basename="loadgen_results") as writer:
+        for name, target in targets:
+            print(f"\nLoading {name} ({args.process} arrivals, {args.duration:.0f}s per step)")
+            steps = ramp(target, queries, rates, args.duration, args.slo_p99, args.max_error_rate,
+                         args.process, args.concurrency, args.seed, not args.no_stop)
+            for step in steps:
+                writer.write({"target": name, **step})
+            summary.append((name, max_sustainable_rate(steps)))
+
+    print(f"\nMaximum sustainable throughput (p99 <= {args.slo_p99}s):")
+    for name, rate in summary:
+        print(f"  {name}: {f'{rate:.2f} req/s' if rate is not None else 'SLO missed at every rate'}")
+    print(f"\nStep results written to {writer.jsonl_path}")
+
+
+if __name__ == "__main__":
+    main()
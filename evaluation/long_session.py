@@ -0,0 +1,92 @@
+"""
+Long-session benchmark: per-turn latency as a conversation grows.
+
+One agent answers N turns in a single session without reset. If per-turn
+work is independent of session length, the least-squares slope of the
+per-turn latencies is close to zero and the median of the last turns
+matches the median of the first turns. A positive slope means each turn
+pays for the history accumulated so far.
+
+Usage:
+    python -m evaluation.long_session --offline --turns 200
+    python -m evaluation.long_session --framework "LangGraph (Functional)" --turns 100
+"""
+import sys
+import os
+import time
+import argparse
+from typing import Dict, Any, List
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(parent_dir)
+
+from common.schema import UserMessage
+from common.offline_llm import OFFLINE_MODEL
+from common.registry import AGENTS
+from agents.base_agent import BaseAgent
+from evaluation import stats
+
+
+def run_session(agent: BaseAgent, queries: List[str], turns: int, window: int = 10) -> Dict[str, Any]:
+    """
+    Send turns messages to one agent session and time each turn.
+
+    Args:
+        agent: The agent, used without reset between turns
+        queries: Messages sent in rotation
+        turns: Number of turns
+        window: Number of turns in the first and last medians
+
+    Returns:
+        Dict with latencies, slope (seconds per turn), first and last
+        window medians, growth (last / first) and tool_calls_count
+    """
+    agent.initialize()
+    latencies = []
+    for turn in range(turns):
+        message = UserMessage(content=queries[turn % len(queries)])
+        start_time = time.perf_counter()
+        agent.process(message)
+        latencies.append(time.perf_counter() - start_time)
+
+    window = max(1, min(window, turns // 2))
+    first = stats.median(latencies[:window])
+    last = stats.median(latencies[-window:])
+    return {
+        "turns": turns,
+        "latencies": latencies,
+        "slope": stats.linear_slope(latencies),
+        "first_median": first,
+        "last_median": last,
+        "growth": last / first if first > 0 else None,
+        "tool_calls_count": agent.get_metrics().tool_calls_count,
+    }
+
+
+def main():
+    """
+    Main function.
+    """
+    parser = argparse.ArgumentParser(description="Measure per-turn latency over a long session")
+    parser.add_argument("--framework", action="append", default=None,
+                        help="Framework display name; repeat for several (default: all)")
+    parser.add_argument("--turns", type=int, default=100, help="Turns per session")
+    parser.add_argument("--window", type=int, default=10, help="Turns in the first and last medians")
+    parser.add_argument("--offline", action="store_true", help="Use the offline LLM stand-in instead of a provider")
+    args = parser.parse_args()
+
+    from evaluation.compare_all import TEST_QUERIES
+    frameworks = args.framework or list(AGENTS)
+    model = OFFLINE_MODEL if args.offline else None
+
+    print(f"{'Framework':25} {'first (ms)':>11} {'last (ms)':>10} {'growth':>7} {'slope (us/turn)':>16}")
+    for name in frameworks:
+        report = run_session(AGENTS[name](model=model), TEST_QUERIES, args.turns, args.window)
+        growth = f"{report['growth']:.2f}x" if report["growth"] is not None else "n/a"
+        print(f"{name:25} {report['first_median'] * 1000:11.2f} {report['last_median'] * 1000:10.2f} "
+              f"{growth:>7} {report['slope'] * 1e6:16.1f}")
+
+
+if __name__ == "__main__":
+    main()
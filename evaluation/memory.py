@@ -0,0 +1,156 @@
+"""
+tracemalloc-based memory measurement per agent and per query.
+
+For every measured process() call the tracker records:
+
+- peak bytes: the high-water mark of traced allocations during the call
+- retained bytes: memory still allocated after the call, i.e. the
+  conversation state the session keeps alive until the agent is reset
+
+Allocation sites are aggregated per framework from snapshot differences.
+"""
+import gc
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Any, List
+
+from evaluation import stats
+
+GIB = 1024 ** 3
+
+
+class MemoryTracker:
+    """
+    Measures peak and retained memory of agent calls with tracemalloc.
+    """
+
+    def __init__(self, frames: int = 1, top_n: int = 10, track_sites: bool = True):
+        """
+        Initialize the tracker.
+
+        Args:
+            frames: Traceback depth stored per allocation
+            top_n: Number of allocation sites to report per framework
+            track_sites: Whether to diff snapshots to find allocation sites
+        """
+        self.frames = frames
+        self.top_n = top_n
+        self.track_sites = track_sites
+        self._measurements: Dict[str, List[Dict[str, int]]] = {}
+        self._sites: Dict[str, Counter] = {}
+        # Whether this tracker started tracing, so stop() leaves tracing
+        # started by someone else running
+        self._started = False
+        self._filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+
+    def start(self) -> None:
+        """
+        Start tracing allocations if not already tracing.
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started = True
+
+    def stop(self) -> None:
+        """
+        Stop tracing allocations if this tracker started it.
+        """
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+
+    @contextmanager
+    def measure(self, framework: str):
+        """
+        Measure memory of the enclosed block.
+
+        Args:
+            framework: The framework display name
+
+        Yields:
+            Dict that holds peak_bytes and retained_bytes once the block exits
+        """
+        self.start()
+        result = {"peak_bytes": 0, "retained_bytes": 0}
+
+        gc.collect()
+        before = tracemalloc.take_snapshot().filter_traces(self._filters) if self.track_sites else None
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        try:
+            yield result
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            # Collect garbage so only live objects count as retained
+            gc.collect()
+            current, _ = tracemalloc.get_traced_memory()
+
+            result["peak_bytes"] = max(0, peak - baseline)
+            result["retained_bytes"] = max(0, current - baseline)
+            self._measurements.setdefault(framework, []).append(dict(result))
+
+            if before is not None:
+                after = tracemalloc.take_snapshot().filter_traces(self._filters)
+                sites = self._sites.setdefault(framework, Counter())
+                for diff in after.compare_to(before, "lineno"):
+                    if diff.size_diff > 0:
+                        frame = diff.traceback[0]
+                        sites[f"{frame.filename}:{frame.lineno}"] += diff.size_diff
+
+    def summary(self, framework: str) -> Dict[str, Any]:
+        """
+        Summarize memory measurements of a framework.
+
+        Args:
+            framework: The framework display name
+
+        Returns:
+            Dict with median/max peak bytes, median bytes per session,
+            sessions per GiB and the top allocation sites
+        """
+        measurements = self._measurements.get(framework, [])
+        if not measurements:
+            return {}
+
+        peaks = [m["peak_bytes"] for m in measurements]
+        retained = [m["retained_bytes"] for m in measurements]
+        bytes_per_session = stats.median(retained)
+        return {
+            "median_peak_bytes": stats.median(peaks),
+            "max_peak_bytes": max(peaks),
+            "bytes_per_session": bytes_per_session,
+            "sessions_per_gib": int(GIB / bytes_per_session) if bytes_per_session else None,
+            "top_sites": self._sites.get(framework, Counter()).most_common(self.top_n),
+        }
+
+
+def format_summary(framework: str, summary: Dict[str, Any]) -> str:
+    """
+    Format a framework's memory summary for printing.
+
+    Args:
+        framework: The framework display name
+        summary: Output of MemoryTracker.summary
+
+    Returns:
+        The formatted text
+    """
+    if not summary:
+        return f"{framework}: no memory measurements"
+
+    sessions = summary["sessions_per_gib"]
+    lines = [
+        f"{framework} memory:",
+        f"  Peak per query: median {summary['median_peak_bytes'] / 1024:.1f} KiB, "
+        f"max {summary['max_peak_bytes'] / 1024:.1f} KiB",
+        f"  Retained per session: {summary['bytes_per_session'] / 1024:.1f} KiB "
+        f"(~{sessions if sessions is not None else 'unbounded'} sessions per GiB)",
+        "  Top allocation sites:",
+    ]
+    for site, size in summary["top_sites"]:
+        lines.append(f"    {size / 1024:10.1f} KiB  {site}")
+    return "\n".join(lines)
@@ -0,0 +1,363 @@
+"""
+Per-framework profiling for the comparison harness.
+
+Two modes are supported:
+
+- "deterministic": cProfile per (framework, query), merged per framework
+  and saved as .prof files (for snakeviz, gprof2dot, ...). Collapsed
+  stacks are derived from the call graph, weighted in microseconds of
+  exclusive time; a callee's time is split across its callers in
+  proportion to the time each call edge accounts for, so the stacks are
+  an estimate rather than observed.
+- "sampling": a background thread samples the agent thread's stack and
+  saves collapsed stacks per framework (for flamegraph.pl or speedscope),
+  weighted in samples.
+
+Both modes produce a hot-function report sorted by exclusive time that
+separates project code (common/, agents/) from library code. Combine with
+--offline so the profile reflects CPU work rather than network waits.
+"""
+import os
+import sys
+import cProfile
+import pstats
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+# Project root, used to tell our code apart from library code
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+OWN_CODE_DIRS = [os.path.join(PROJECT_ROOT, d) + os.sep for d in ("common", "agents")]
+
+PROFILE_MODES = ("deterministic", "sampling")
+
+
+def is_own_code(filename: str) -> bool:
+    """
+    Check whether a source file belongs to the project (common/ or agents/).
+
+    Args:
+        filename: Path of the source file
+
+    Returns:
+        True for project code, False for library and builtin code
+    """
+    path = os.path.abspath(filename)
+    return any(path.startswith(d) for d in OWN_CODE_DIRS)
+
+
+def _short_path(filename: str) -> str:
+    """
+    Shorten a source path for display.
+
+    Args:
+        filename: Path of the source file
+
+    Returns:
+        Path relative to the project root or to site-packages when possible
+    """
+    if filename.startswith(PROJECT_ROOT):
+        return os.path.relpath(filename, PROJECT_ROOT)
+    marker = "site-packages" + os.sep
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    return filename
+
+
+def _frame_label(filename: str, line: int, name: str) -> str:
+    """
+    Label a function in a collapsed stack.
+    """
+    return f"{name} ({_short_path(filename)}:{line})"
+
+
+def collapsed_from_stats(stats: pstats.Stats, min_seconds: float = 1e-6) -> Counter:
+    """
+    Derive collapsed stacks from a cProfile call graph.
+
+    cProfile records caller-callee edges, not whole stacks, so each
+    callee's time on a path is estimated as the caller's share on that
+    path times the edge's cumulative time. Recursive calls are cut at the
+    first repeat, and paths below min_seconds are dropped.
+
+    Args:
+        stats: The profile statistics
+        min_seconds: Smallest cumulative time of a path that is expanded
+
+    Returns:
+        Counter of collapsed stack string to microseconds of exclusive time
+    """
+    callees = defaultdict(list)
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller, edge in callers.items():
+            callees[caller].append((func, edge[3]))
+
+    stacks: Counter = Counter()
+
+    def walk(func, path: List[str], on_path: set, share: float) -> None:
+        _, _, exclusive, cumulative, _ = stats.stats[func]
+        own = int(round(exclusive * share * 1e6))
+        if own > 0:
+            stacks[";".join(path)] += own
+        for callee, edge_cumulative in callees.get(func, ()):
+            callee_cumulative = stats.stats[callee][3]
+            if callee in on_path or callee_cumulative <= 0 or share * edge_cumulative < min_seconds:
+                continue
+            walk(callee, path + [_frame_label(*callee)], on_path | {callee},
+                 share * edge_cumulative / callee_cumulative)
+
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        if not callers:
+            walk(func, [_frame_label(*func)], {func}, 1.0)
+    return stacks
+
+
+def _slug(name: str) -> str:
+    """
+    Turn a framework display name into a file-name friendly slug.
+    """
+    return "".join(c.lower() if c.isalnum() else "_" for c in name).strip("_")
+
+
+class StackSampler:
+    """
+    Samples the call stack of one thread at a fixed interval.
+
+    Samples are passed to a callback as (collapsed stack, leaf function key).
+    """
+
+    def __init__(self, on_sample: Callable[[str, Tuple[str, int, str]], None], interval: float = 0.001):
+        """
+        Initialize the sampler.
+
+        Args:
+            on_sample: Callback receiving each sample
+            interval: Seconds between samples
+        """
+        self.on_sample = on_sample
+        self.interval = interval
+        self.target: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """
+        Start the sampling thread.
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the sampling thread.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            if self.target is None:
+                continue
+            frame = sys._current_frames().get(self.target)
+            if frame is None:
+                continue
+            labels = []
+            leaf = None
+            while frame is not None:
+                code = frame.f_code
+                if leaf is None:
+                    leaf = (code.co_filename, code.co_firstlineno, code.co_name)
+                labels.append(_frame_label(code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            # Collapsed stack format: root;...;leaf
+            self.on_sample(";".join(reversed(labels)), leaf)
+
+
+class Profiler:
+    """
+    Captures and aggregates profiles per framework and query.
+    """
+
+    def __init__(self, mode: str = "deterministic", output_dir: str = "evaluation/results/profiles",
+                 interval: float = 0.001):
+        """
+        Initialize the profiler.
+
+        Args:
+            mode: "deterministic" (cProfile) or "sampling"
+            output_dir: Directory for saved profiles
+            interval: Sampling interval in seconds (sampling mode only)
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        self.mode = mode
+        self.output_dir = output_dir
+        self.interval = interval
+        self._stats: Dict[str, pstats.Stats] = {}
+        self._stacks: Dict[Tuple[str, int], Counter] = {}
+        self._leaves: Dict[str, Counter] = {}
+        self._active: Optional[Tuple[str, int]] = None
+        self._lock = threading.Lock()
+        self._sampler: Optional[StackSampler] = None
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _on_sample(self, stack: str, leaf: Tuple[str, int, str]) -> None:
+        """
+        Attribute a stack sample to the query being profiled.
+        """
+        with self._lock:
+            if self._active is None:
+                return
+            self._stacks.setdefault(self._active, Counter())[stack] += 1
+            self._leaves.setdefault(self._active[0], Counter())[leaf] += 1
+
+    @contextmanager
+    def profile(self, framework: str, query_index: int):
+        """
+        Profile the enclosed block as one query of a framework.
+
+        Args:
+            framework: The framework display name
+            query_index: Index of the query being run
+        """
+        prefix = os.path.join(self.output_dir, f"{_slug(framework)}_q{query_index}")
+
+        if self.mode == "deterministic":
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                profiler.dump_stats(prefix + ".prof")
+                stats = pstats.Stats(profiler)
+                self._stacks[(framework, query_index)] = collapsed_from_stats(stats)
+                if framework in self._stats:
+                    self._stats[framework].add(profiler)
+                else:
+                    self._stats[framework] = stats
+            return
+
+        # One long-lived sampler thread, so short queries still get samples
+        if self._sampler is None:
+            self._sampler = StackSampler(self._on_sample, self.interval)
+            self._sampler.start()
+        self._sampler.target = threading.get_ident()
+        with self._lock:
+            self._active = (framework, query_index)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active = None
+
+    def hot_functions(self, framework: str) -> List[Dict[str, Any]]:
+        """
+        List a framework's functions sorted by exclusive time.
+
+        Args:
+            framework: The framework display name
+
+        Returns:
+            List of dicts with function, file, line, own, exclusive, inclusive and calls
+        """
+        rows = []
+        if self.mode == "deterministic":
+            stats = self._stats.get(framework)
+            if stats is None:
+                return []
+            for (filename, line, name), (_, calls, exclusive, inclusive, _) in stats.stats.items():
+                rows.append({
+                    "function": name, "file": _short_path(filename), "line": line,
+                    "own": is_own_code(filename), "exclusive": exclusive,
+                    "inclusive": inclusive, "calls": calls,
+                })
+        else:
+            for (filename, line, name), samples in self._leaves.get(framework, {}).items():
+                rows.append({
+                    "function": name, "file": _short_path(filename), "line": line,
+                    "own": is_own_code(filename), "exclusive": samples * self.interval,
+                    "inclusive": None, "calls": None,
+                })
+        rows.sort(key=lambda r: r["exclusive"], reverse=True)
+        return rows
+
+    def report(self, top: int = 15) -> str:
+        """
+        Build the hot-function report for all profiled frameworks.
+
+        Args:
+            top: Number of functions to list per section
+
+        Returns:
+            The report text
+        """
+        frameworks = self._stats.keys() if self.mode == "deterministic" else self._leaves.keys()
+        lines = []
+        for framework in frameworks:
+            rows = self.hot_functions(framework)
+            total = sum(r["exclusive"] for r in rows)
+            own_total = sum(r["exclusive"] for r in rows if r["own"])
+            share = own_total / total if total else 0.0
+            lines.append(f"\n{framework} ({self.mode} profile)")
+            lines.append("=" * 60)
+            lines.append(f"Exclusive time: {total:.4f}s total, "
+                         f"{own_total:.4f}s ({share:.1%}) in common/ and agents/")
+            for title, own in (("Our code", True), ("Library code", False)):
+                lines.append(f"\n  {title}:")
+                for row in [r for r in rows if r["own"] == own][:top]:
+                    calls = f"{row['calls']:>8}" if row["calls"] is not None else " " * 8
+                    lines.append(f"    {row['exclusive']:9.4f}s {row['exclusive'] / (total or 1.0):6.1%} {calls}  "
+                                 f"{row['function']} ({row['file']}:{row['line']})")
+        return "\n".join(lines)
+
+    def save(self) -> List[str]:
+        """
+        Stop sampling and save per-query and per-framework profiles and the report.
+
+        Returns:
+            Paths of the files written
+        """
+        if self._sampler is not None:
+            self._sampler.stop()
+            self._sampler = None
+
+        paths = []
+        for framework, stats in self._stats.items():
+            path = os.path.join(self.output_dir, f"{_slug(framework)}.prof")
+            stats.dump_stats(path)
+            paths.append(path)
+
+        merged: Dict[str, Counter] = {}
+        for (framework, query_index), stacks in self._stacks.items():
+            path = os.path.join(self.output_dir, f"{_slug(framework)}_q{query_index}.collapsed")
+            _write_collapsed(stacks, path)
+            paths.append(path)
+            merged.setdefault(framework, Counter()).update(stacks)
+        for framework, stacks in merged.items():
+            path = os.path.join(self.output_dir, f"{_slug(framework)}.collapsed")
+            _write_collapsed(stacks, path)
+            paths.append(path)
+
+        report_path = os.path.join(self.output_dir, "hot_functions.txt")
+        with open(report_path, "w") as f:
+            f.write(self.report())
+        paths.append(report_path)
+        return paths
+
+
+def _write_collapsed(stacks: Counter, path: str) -> None:
+    """
+    Write stacks in the collapsed format used by flame graph tools.
+
+    Args:
+        stacks: Counter of collapsed stack string to sample count
+        path: Output file path
+    """
+    with open(path, "w") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
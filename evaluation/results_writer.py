@@ -0,0 +1,188 @@
+"""
+Streaming results writer for evaluation runs.
+
+Rows are appended to a JSONL file as soon as each query completes and are
+mirrored into a columnar Parquet file when pyarrow is installed. The JSONL
+file is flushed periodically, so a crash only loses the rows written since
+the last flush.
+"""
+import os
+import json
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+
+from common import codec
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+# Column types understood by the writer, mapped lazily to pyarrow types
+COLUMN_TYPES = ("string", "int", "float", "bool")
+
+
+def _arrow_type(column_type: str):
+    """
+    Map a writer column type to a pyarrow type.
+
+    Args:
+        column_type: One of COLUMN_TYPES
+
+    Returns:
+        The matching pyarrow data type
+    """
+    return {
+        "string": pa.string(),
+        "int": pa.int64(),
+        "float": pa.float64(),
+        "bool": pa.bool_(),
+    }[column_type]
+
+
+class ResultsWriter:
+    """
+    Append-only writer that streams result rows to JSONL and Parquet.
+    """
+
+    def __init__(self,
+                 output_dir: str,
+                 fields: List[Tuple[str, str]],
+                 basename: str = "comparison_results",
+                 flush_every: int = 10,
+                 columnar: bool = True):
+        """
+        Initialize the writer and open the output files.
+
+        Args:
+            output_dir: Directory to write results into
+            fields: Ordered (column name, column type) pairs describing a row
+            basename: File name (without extension) for the result files
+            flush_every: Number of rows buffered before a flush
+            columnar: Whether to also write a Parquet file (requires pyarrow)
+        """
+        for name, column_type in fields:
+            if column_type not in COLUMN_TYPES:
+                raise ValueError(f"Unsupported column type for {name}: {column_type}")
+
+        os.makedirs(output_dir, exist_ok=True)
+        self.fields = fields
+        self.flush_every = max(1, flush_every)
+        self.rows_written = 0
+
+        self.jsonl_path = os.path.join(output_dir, f"{basename}.jsonl")
+        self.parquet_path = None
+        if columnar and pq is not None:
+            self.parquet_path = os.path.join(output_dir, f"{basename}.parquet")
+
+        self._file = open(self.jsonl_path, "w")
+        self._pending: List[Dict[str, Any]] = []
+        self._parquet_writer = None
+        self._schema = None
+        if self.parquet_path:
+            self._schema = pa.schema([(name, _arrow_type(t)) for name, t in fields])
+
+    def write(self, row: Dict[str, Any]) -> None:
+        """
+        Append a single result row.
+
+        Args:
+            row: Mapping of column name to value; missing columns are written as null
+        """
+        record = {name: row.get(name) for name, _ in self.fields}
+        self._file.write(codec.dumps(record) + "\n")
+        self.rows_written += 1
+
+        if self.parquet_path:
+            self._pending.append(record)
+
+        if self.rows_written % self.flush_every == 0:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Flush buffered rows to disk.
+        """
+        self._file.flush()
+
+        if self.parquet_path and self._pending:
+            table = pa.Table.from_pylist(self._pending, schema=self._schema)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.parquet_path, self._schema)
+            self._parquet_writer.write_table(table)
+            self._pending = []
+
+    def close(self) -> None:
+        """
+        Flush remaining rows and close the output files.
+        """
+        if self._file.closed:
+            return
+
+        self.flush()
+        self._file.close()
+
+        if self._parquet_writer is not None:
+            # The Parquet footer is only written on close
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+    def __enter__(self) -> "ResultsWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def iter_rows(jsonl_path: str, columns: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream rows from a JSONL results file one at a time.
+
+    Args:
+        jsonl_path: Path to the JSONL results file
+        columns: Columns to keep from each row (all columns if None)
+
+    Returns:
+        Iterator over result rows
+    """
+    with open(jsonl_path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = codec.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a truncated final line behind
+                continue
+            if columns is not None:
+                row = {name: row.get(name) for name in columns}
+            yield row
+
+
+def read_columns(results_path: str, columns: List[str]) -> Dict[str, List[Any]]:
+    """
+    Read only the requested columns from a results file.
+
+    Parquet files are read column-wise; JSONL files are streamed so that only
+    the requested columns are ever held in memory.
+
+    Args:
+        results_path: Path to a .parquet or .jsonl results file
+        columns: Names of the columns to read
+
+    Returns:
+        Dict mapping each column name to its list of values
+    """
+    if results_path.endswith(".parquet"):
+        if pq is None:
+            raise ImportError("pyarrow is required to read Parquet results")
+        return pq.read_table(results_path, columns=columns).to_pydict()
+
+    data: Dict[str, List[Any]] = {name: [] for name in columns}
+    for row in iter_rows(results_path, columns):
+        for name in columns:
+            data[name].append(row[name])
+    return data
@@ -0,0 +1,163 @@
+"""
+Precision and latency savings of the fast-path router.
+
+Every query is answered by the full agent (the reference) and offered to
+the router. A routed query is correct when the router used the same tools
+as the workload's expected_tools, or as the reference agent when the
+workload has no labels, and its tool arguments match the reference
+agent's calls of those tools. Arguments match when they are equal after
+case and whitespace normalization, or, for pure tools, when they give the
+same result ("25 / 100 * 840" and "0.25 * 840"). Latency saved is the
+reference latency minus the router latency over correctly routed queries.
+
+Usage:
+    python -m evaluation.router_eval --offline
+    python -m evaluation.router_eval --workload workload.jsonl --limit 500 --framework "No Framework"
+"""
+import sys
+import os
+import time
+import argparse
+from typing import Dict, Any, Callable, Iterable
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(parent_dir)
+
+from common.schema import UserMessage, ToolCall
+from common.tools import TOOLS, execute_tool
+from common.tool_cache import get_policy
+from common.offline_llm import OFFLINE_MODEL
+from common.registry import AGENTS
+from agents.base_agent import BaseAgent
+from agents.router import FastPathRouterAgent
+from evaluation.workload import WorkloadItem, iter_workload, default_workload
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    return value
+
+
+def same_call(routed: ToolCall, reference: ToolCall) -> bool:
+    """
+    Check whether a routed tool call is equivalent to the reference agent's.
+
+    Args:
+        routed: The router's call
+        reference: A call of the reference agent
+
+    Returns:
+        True if the tools match and the arguments are equal after
+        normalization or, for pure tools, give the same result
+    """
+    if routed.tool_name != reference.tool_name:
+        return False
+    if _normalize(routed.tool_input) == _normalize(reference.tool_input):
+        return True
+    policy = get_policy(TOOLS[routed.tool_name]) if routed.tool_name in TOOLS else None
+    if policy is None or policy.kind != "pure":
+        return False
+    results = []
+    for call in (routed, reference):
+        outcome = execute_tool(call.tool_name, call.tool_input)
+        result = outcome["result"]
+        if isinstance(result, dict):
+            # Drop echoed arguments such as calculate's "expression"
+            result = {key: value for key, value in result.items() if key not in call.tool_input}
+        results.append((outcome["error"], result))
+    return results[0][0] is None and results[0] == results[1]
+
+
+def evaluate_router(items: Iterable[WorkloadItem], agent_factory: Callable[[], BaseAgent]) -> Dict[str, Any]:
+    """
+    Compare the router against the full agent on a workload.
+
+    Args:
+        items: Workload items
+        agent_factory: Callable creating the reference agent
+
+    Returns:
+        Dict with per-query rows and totals: queries, routed, correct,
+        precision, coverage, reference and router latency, latency_saved
+    """
+    agent = agent_factory()
+    agent.initialize()
+    router = FastPathRouterAgent(agent)
+
+    rows = []
+    for item in items:
+        agent.reset()
+        start_time = time.perf_counter()
+        reference = agent.process(UserMessage(content=item.query))
+        reference_latency = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        routed = router.try_route(item.query)
+        router_latency = time.perf_counter() - start_time
+
+        row = {
+            "query": item.query,
+            "routed": routed is not None,
+            "correct": None,
+            "reference_latency": reference_latency,
+            "router_latency": router_latency,
+        }
+        if routed is not None:
+            expected = item.expected_tools or [call.tool_name for call in reference.tool_calls]
+            same_tools = sorted(set(expected)) == sorted({call.tool_name for call in routed.tool_calls})
+            row["correct"] = same_tools and all(
+                any(same_call(call, ref) for ref in reference.tool_calls) for call in routed.tool_calls
+            )
+            row["answer"] = routed.content
+        rows.append(row)
+
+    routed_rows = [r for r in rows if r["routed"]]
+    correct_rows = [r for r in routed_rows if r["correct"]]
+    return {
+        "rows": rows,
+        "queries": len(rows),
+        "routed": len(routed_rows),
+        "correct": len(correct_rows),
+        "precision": len(correct_rows) / len(routed_rows) if routed_rows else None,
+        "coverage": len(routed_rows) / len(rows) if rows else 0.0,
+        "reference_latency": sum(r["reference_latency"] for r in rows),
+        "latency_saved": sum(r["reference_latency"] - r["router_latency"] for r in correct_rows),
+    }
+
+
+def main():
+    """
+    Main function.
+    """
+    parser = argparse.ArgumentParser(description="Evaluate the fast-path router")
+    parser.add_argument("--workload", default=None, help="Workload file (JSONL, CSV or text) instead of TEST_QUERIES")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of workload queries")
+    parser.add_argument("--framework", default="No Framework", help="Framework display name of the reference agent")
+    parser.add_argument("--offline", action="store_true", help="Use the offline LLM stand-in instead of a provider")
+    args = parser.parse_args()
+
+    agent_class = AGENTS[args.framework]
+    model = OFFLINE_MODEL if args.offline else None
+    items = iter_workload(args.workload, args.limit) if args.workload else default_workload()
+
+    report = evaluate_router(items, lambda: agent_class(model=model))
+
+    for row in report["rows"]:
+        status = "skip" if not row["routed"] else ("ok" if row["correct"] else "WRONG")
+        print(f"  [{status:5}] {row['reference_latency']:.3f}s -> "
+              f"{row['router_latency'] if row['routed'] else row['reference_latency']:.3f}s  {row['query'][:70]}")
+
+    precision = report["precision"]
+    print(f"\nRouted {report['routed']}/{report['queries']} queries ({report['coverage']:.1%} coverage)")
+    print(f"Precision: {f'{precision:.1%}' if precision is not None else 'n/a'} "
+          f"({report['correct']} of {report['routed']} routed queries used the expected tools and arguments)")
+    share = report["latency_saved"] / report["reference_latency"] if report["reference_latency"] else 0.0
+    print(f"Latency saved: {report['latency_saved']:.3f}s of {report['reference_latency']:.3f}s ({share:.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,543 @@
+"""
+Multi-process sharded evaluation over large query sets.
+
+The work (frameworks x queries x trials) is split into shards described by
+a plan in a work directory. Shards are executed by a local process pool or
+by workers on several machines sharing the work directory; each worker
+process owns its own agent instances. Shards are claimed with exclusive
+claim files, results are written atomically per shard, failed shards are
+retried, and results are merged in a deterministic order. Rerunning "run"
+on an existing work directory resumes its plan; plan settings given on the
+command line must then match it.
+
+Usage:
+    python -m evaluation.sharded run --work-dir /shared/sweep --queries queries.jsonl --trials 5 --workers 16
+    python -m evaluation.sharded worker --work-dir /shared/sweep     # on additional machines
+    python -m evaluation.sharded merge --work-dir /shared/sweep
+"""
+import sys
+import os
+import json
+import time
+import socket
+import argparse
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, List, Optional, Tuple
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(parent_dir)
+
+from common.schema import UserMessage
+from common.offline_llm import OFFLINE_MODEL
+from common.registry import AGENTS
+from common import codec
+from evaluation.results_writer import ResultsWriter, iter_rows
+from evaluation.workload import iter_workload, default_workload
+
+# Columns written for every (framework, query, trial) sample
+SHARD_FIELDS = [
+    ("framework", "string"),
+    ("query_index", "int"),
+    ("trial", "int"),
+    ("latency", "float"),
+    ("total_tokens", "int"),
+    ("tool_calls_count", "int"),
+    ("error_count", "int"),
+]
+
+# Claims older than this many seconds without a result are considered abandoned
+DEFAULT_LEASE = 1800.0
+
+# Agents owned by the current worker process, keyed by framework name
+_AGENTS: Dict[str, Any] = {}
+
+
+def load_queries(path: Optional[str], limit: Optional[int] = None) -> List[str]:
+    """
+    Load queries from a workload file, or return the default test queries.
+
+    Args:
+        path: JSONL, CSV or text workload file; None for the built-in TEST_QUERIES
+        limit: Maximum number of queries to load
+
+    Returns:
+        List of queries
+    """
+    items = iter_workload(path, limit) if path else default_workload()
+    return [item.query for item in items]
+
+
+def _path(work_dir: str, *parts: str) -> str:
+    return os.path.join(work_dir, *parts)
+
+
+def _shard_name(shard_id: int) -> str:
+    return f"{shard_id:05d}"
+
+
+def create_plan(work_dir: str,
+                queries: List[str],
+                frameworks: List[str],
+                trials: int = 1,
+                shard_size: int = 50,
+                model: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Write the evaluation plan to the work directory.
+
+    Args:
+        work_dir: Shared work directory
+        queries: Queries to evaluate
+        frameworks: Framework names to evaluate
+        trials: Trials per (framework, query)
+        shard_size: Work units per shard
+        model: LLM model used by every agent
+
+    Returns:
+        The plan
+    """
+    for sub in ("claims", "results", "failures"):
+        os.makedirs(_path(work_dir, sub), exist_ok=True)
+
+    units = trials * len(frameworks) * len(queries)
+    plan = {
+        "queries": queries,
+        "frameworks": frameworks,
+        "trials": trials,
+        "shard_size": shard_size,
+        "model": model,
+        "shard_count": (units + shard_size - 1) // shard_size,
+    }
+    tmp_path = _path(work_dir, "plan.json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(plan, f)
+    os.replace(tmp_path, _path(work_dir, "plan.json"))
+    return plan
+
+
+def plan_conflicts(plan: Dict[str, Any], requested: Dict[str, Any]) -> List[str]:
+    """
+    Find requested settings an existing plan disagrees with.
+
+    Args:
+        plan: The existing plan
+        requested: Plan fields given on the command line
+
+    Returns:
+        Names of the fields whose plan value differs
+    """
+    return [key for key, value in requested.items() if plan.get(key) != value]
+
+
+def load_plan(work_dir: str) -> Dict[str, Any]:
+    """
+    Load the evaluation plan from the work directory.
+
+    Args:
+        work_dir: Shared work directory
+
+    Returns:
+        The plan
+    """
+    with open(_path(work_dir, "plan.json"), "r") as f:
+        return json.load(f)
+
+
+def shard_units(plan: Dict[str, Any], shard_id: int) -> List[Tuple[str, int, int]]:
+    """
+    List the (framework, query_index, trial) units of a shard.
+
+    Units are enumerated trial-major and then framework-interleaved so each
+    shard mixes frameworks and no framework is concentrated on one worker.
+
+    Args:
+        plan: The evaluation plan
+        shard_id: The shard
+
+    Returns:
+        The shard's work units
+    """
+    frameworks = plan["frameworks"]
+    query_count = len(plan["queries"])
+    per_trial = query_count * len(frameworks)
+
+    start = shard_id * plan["shard_size"]
+    end = min(start + plan["shard_size"], per_trial * plan["trials"])
+    units = []
+    for unit in range(start, end):
+        trial, rest = divmod(unit, per_trial)
+        query_index, framework_index = divmod(rest, len(frameworks))
+        units.append((frameworks[framework_index], query_index, trial))
+    return units
+
+
+def _get_agent(framework: str, model: Optional[str]):
+    """
+    Get this process's agent for a framework, creating it on first use.
+    """
+    if framework not in _AGENTS:
+        agent_class = AGENTS[framework]
+        agent = agent_class(model=model)
+        agent.initialize()
+        _AGENTS[framework] = agent
+    return _AGENTS[framework]
+
+
+def run_shard(work_dir: str, shard_id: int) -> int:
+    """
+    Execute one shard and write its results atomically.
+
+    Args:
+        work_dir: Shared work directory
+        shard_id: The shard to run
+
+    Returns:
+        Number of result rows written
+    """
+    plan = load_plan(work_dir)
+    rows = []
+    for framework, query_index, trial in shard_units(plan, shard_id):
+        agent = _get_agent(framework, plan["model"])
+        agent.reset()
+        before = agent.get_metrics()
+
+        start_time = time.perf_counter()
+        agent.process(UserMessage(content=plan["queries"][query_index]))
+        latency = time.perf_counter() - start_time
+
+        after = agent.get_metrics()
+        rows.append({
+            "framework": framework,
+            "query_index": query_index,
+            "trial": trial,
+            "latency": latency,
+            "total_tokens": after.total_tokens - before.total_tokens,
+            "tool_calls_count": after.tool_calls_count - before.tool_calls_count,
+            "error_count": after.error_count - before.error_count,
+        })
+
+    result_path = _path(work_dir, "results", f"{_shard_name(shard_id)}.jsonl")
+    tmp_path = f"{result_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        for row in rows:
+            f.write(codec.dumps(row) + "\n")
+    os.replace(tmp_path, result_path)
+    return len(rows)
+
+
+def is_done(work_dir: str, shard_id: int) -> bool:
+    """
+    Check whether a shard's results exist.
+    """
+    return os.path.exists(_path(work_dir, "results", f"{_shard_name(shard_id)}.jsonl"))
+
+
+def claim_shard(work_dir: str, shard_id: int, lease: float = DEFAULT_LEASE) -> bool:
+    """
+    Try to claim a shard for this worker.
+
+    Args:
+        work_dir: Shared work directory
+        shard_id: The shard to claim
+        lease: Age in seconds after which an unfinished claim is taken over
+
+    Returns:
+        True if the claim succeeded
+    """
+    claim_path = _path(work_dir, "claims", f"{_shard_name(shard_id)}.claim")
+    try:
+        if time.time() - os.path.getmtime(claim_path) > lease:
+            os.remove(claim_path)
+    except FileNotFoundError:
+        pass
+
+    try:
+        fd = os.open(claim_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, "w") as f:
+        f.write(f"{socket.gethostname()}:{os.getpid()}")
+    return True
+
+
+def release_shard(work_dir: str, shard_id: int) -> None:
+    """
+    Release a shard claim.
+    """
+    try:
+        os.remove(_path(work_dir, "claims", f"{_shard_name(shard_id)}.claim"))
+    except FileNotFoundError:
+        pass
+
+
+def record_failure(work_dir: str, shard_id: int, error: str) -> int:
+    """
+    Record a failed attempt at a shard.
+
+    Args:
+        work_dir: Shared work directory
+        shard_id: The failed shard
+        error: Description of the failure
+
+    Returns:
+        Number of failed attempts so far
+    """
+    path = _path(work_dir, "failures", f"{_shard_name(shard_id)}.log")
+    with open(path, "a") as f:
+        f.write(json.dumps({"host": socket.gethostname(), "pid": os.getpid(), "error": error}) + "\n")
+    return failure_count(work_dir, shard_id)
+
+
+def failure_count(work_dir: str, shard_id: int) -> int:
+    """
+    Count failed attempts at a shard.
+    """
+    try:
+        with open(_path(work_dir, "failures", f"{_shard_name(shard_id)}.log"), "r") as f:
+            return sum(1 for _ in f)
+    except FileNotFoundError:
+        return 0
+
+
+def crashed_shards(work_dir: str, shard_ids: List[int]) -> List[int]:
+    """
+    Find the shards a crashed local worker process was running.
+
+    A worker releases its claim when a shard finishes or raises, so a claim
+    held by a process of this host that no longer exists marks a shard that
+    was running when its process died.
+
+    Args:
+        work_dir: Shared work directory
+        shard_ids: Shards whose futures failed with a broken pool
+
+    Returns:
+        The shards that were running, in the given order
+    """
+    crashed = []
+    for shard_id in shard_ids:
+        try:
+            with open(_path(work_dir, "claims", f"{_shard_name(shard_id)}.claim"), "r") as f:
+                host, pid = f.read().rsplit(":", 1)
+        except (FileNotFoundError, ValueError):
+            continue
+        if host != socket.gethostname():
+            continue
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            crashed.append(shard_id)
+        except (PermissionError, ValueError):
+            pass
+    return crashed
+
+
+def _claim_and_run(work_dir: str, shard_id: int, lease: float) -> Optional[int]:
+    """
+    Claim and execute a shard in a worker process.
+
+    Returns:
+        Number of rows written, or None if another worker holds the shard
+    """
+    if is_done(work_dir, shard_id) or not claim_shard(work_dir, shard_id, lease):
+        return None
+    try:
+        return run_shard(work_dir, shard_id)
+    finally:
+        release_shard(work_dir, shard_id)
+
+
+def run_local(work_dir: str, workers: int, retries: int = 2, lease: float = DEFAULT_LEASE) -> List[int]:
+    """
+    Execute all pending shards with a local process pool.
+
+    Args:
+        work_dir: Shared work directory
+        workers: Number of worker processes
+        retries: Extra attempts per failed shard
+        lease: Claim lease in seconds
+
+    Returns:
+        Ids of shards that still failed after all retries
+    """
+    plan = load_plan(work_dir)
+    pending = [
+        s for s in range(plan["shard_count"])
+        if not is_done(work_dir, s) and failure_count(work_dir, s) <= retries
+    ]
+    failed = []
+
+    def fail(shard_id: int, error: str) -> None:
+        attempts = record_failure(work_dir, shard_id, error)
+        print(f"Shard {shard_id} failed (attempt {attempts}): {error}")
+        (retry if attempts <= retries else failed).append(shard_id)
+
+    while pending:
+        retry = []
+        broken = []
+        # A crashed worker breaks the whole pool, so each round gets a fresh one
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_claim_and_run, work_dir, s, lease): s for s in pending}
+            for future in concurrent.futures.as_completed(futures):
+                shard_id = futures[future]
+                try:
+                    rows = future.result()
+                    if rows is not None:
+                        print(f"Shard {shard_id}: {rows} rows")
+                except BrokenProcessPool:
+                    broken.append(shard_id)
+                except Exception as e:
+                    fail(shard_id, f"{type(e).__name__}: {e}")
+
+        # Every queued shard fails with a broken pool; only those that were
+        # running count the attempt, the rest are simply resubmitted. If none
+        # was running the pool cannot start, so all of them count.
+        crashed = crashed_shards(work_dir, broken) or broken
+        for shard_id in broken:
+            if shard_id in crashed:
+                # The claim of a crashed worker process is never released
+                release_shard(work_dir, shard_id)
+                fail(shard_id, "BrokenProcessPool: worker process terminated")
+            else:
+                retry.append(shard_id)
+        pending = retry
+
+    return failed
+
+
+def run_worker(work_dir: str, retries: int = 2, lease: float = DEFAULT_LEASE, poll: float = 5.0) -> None:
+    """
+    Claim and execute shards until none are left; for additional machines.
+
+    Args:
+        work_dir: Shared work directory
+        retries: Extra attempts per failed shard
+        lease: Claim lease in seconds
+        poll: Seconds to wait before rescanning when shards are still claimed
+    """
+    plan = load_plan(work_dir)
+    while True:
+        remaining = [
+            s for s in range(plan["shard_count"])
+            if not is_done(work_dir, s) and failure_count(work_dir, s) <= retries
+        ]
+        if not remaining:
+            return
+
+        progressed = False
+        for shard_id in remaining:
+            try:
+                rows = _claim_and_run(work_dir, shard_id, lease)
+            except Exception as e:
+                attempts = record_failure(work_dir, shard_id, f"{type(e).__name__}: {e}")
+                print(f"Shard {shard_id} failed (attempt {attempts}): {e}")
+                continue
+            if rows is not None:
+                progressed = True
+                print(f"Shard {shard_id}: {rows} rows")
+
+        if not progressed:
+            # Everything left is claimed by other workers
+            time.sleep(poll)
+
+
+def merge_results(work_dir: str, output_dir: str, basename: str = "sharded_results") -> ResultsWriter:
+    """
+    Merge shard results into one results file in deterministic order.
+
+    Args:
+        work_dir: Shared work directory
+        output_dir: Directory for the merged results
+        basename: File name (without extension) of the merged results
+
+    Returns:
+        The closed writer, whose paths point at the merged files
+    """
+    plan = load_plan(work_dir)
+    order = {name: i for i, name in enumerate(plan["frameworks"])}
+
+    rows = []
+    for shard_id in range(plan["shard_count"]):
+        if is_done(work_dir, shard_id):
+            rows.extend(iter_rows(_path(work_dir, "results", f"{_shard_name(shard_id)}.jsonl")))
+    rows.sort(key=lambda r: (order[r["framework"]], r["query_index"], r["trial"]))
+
+    with ResultsWriter(output_dir, SHARD_FIELDS, basename=basename, flush_every=1000) as writer:
+        for row in rows:
+            writer.write(row)
+    return writer
+
+
+def main():
+    """
+    Main function.
+    """
+    parser = argparse.ArgumentParser(description="Sharded multi-process agent evaluation")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for name in ("run", "worker", "merge"):
+        sub = subparsers.add_parser(name)
+        sub.add_argument("--work-dir", required=True, help="Shared work directory")
+        sub.add_argument("--retries", type=int, default=2, help="Extra attempts per failed shard")
+        sub.add_argument("--lease", type=float, default=DEFAULT_LEASE, help="Claim lease in seconds")
+
+    run_parser = subparsers.choices["run"]
+    run_parser.add_argument("--queries", default=None, help="Workload file (JSONL, CSV or text)")
+    run_parser.add_argument("--limit", type=int, default=None, help="Maximum number of queries to load")
+    run_parser.add_argument("--frameworks", nargs="*", default=None, help="Framework names (default: all)")
+    run_parser.add_argument("--trials", type=int, default=None, help="Trials per framework and query (default: 1)")
+    run_parser.add_argument("--shard-size", type=int, default=None, help="Work units per shard (default: 50)")
+    run_parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    run_parser.add_argument("--offline", action="store_true", default=None, help="Use the offline LLM stand-in")
+
+    for name in ("run", "merge"):
+        subparsers.choices[name].add_argument(
+            "--output-dir", default="evaluation/results", help="Directory for merged results"
+        )
+    args = parser.parse_args()
+
+    if args.command == "run":
+        if not os.path.exists(_path(args.work_dir, "plan.json")):
+            frameworks = args.frameworks or list(AGENTS)
+            plan = create_plan(
+                args.work_dir, load_queries(args.queries, args.limit), frameworks,
+                trials=args.trials or 1, shard_size=args.shard_size or 50,
+                model=OFFLINE_MODEL if args.offline else None
+            )
+            print(f"Planned {plan['shard_count']} shards in {args.work_dir}")
+        else:
+            # Resuming: settings given on the command line must match the plan
+            requested = {
+                "frameworks": args.frameworks or None,
+                "trials": args.trials,
+                "shard_size": args.shard_size,
+                "model": OFFLINE_MODEL if args.offline else None,
+            }
+            requested = {key: value for key, value in requested.items() if value is not None}
+            if args.queries or args.limit is not None:
+                requested["queries"] = load_queries(args.queries, args.limit)
+            conflicts = plan_conflicts(load_plan(args.work_dir), requested)
+            if conflicts:
+                print(f"Error: {args.work_dir} already holds a plan with different {', '.join(conflicts)}; "
+                      "use a new work directory or rerun without these arguments to resume")
+                sys.exit(1)
+
+        start_time = time.time()
+        failed = run_local(args.work_dir, args.workers, args.retries, args.lease)
+        # Wait for shards claimed by workers on other machines
+        run_worker(args.work_dir, args.retries, args.lease)
+        print(f"Finished in {time.time() - start_time:.1f} seconds")
+        if failed:
+            print(f"Shards failed after retries: {failed}")
+            sys.exit(1)
+
+    if args.command == "worker":
+        run_worker(args.work_dir, args.retries, args.lease)
+    else:
+        writer = merge_results(args.work_dir, args.output_dir)
+        print(f"Merged {writer.rows_written} rows into {writer.jsonl_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Outlier-robust statistics for benchmark samples.
+"""
+import math
+import random
+from typing import Dict, Any, Optional, Callable, Sequence, Tuple
+
+
+def quantile(values: Sequence[float], q: float) -> float:
+    """
+    Compute a quantile with linear interpolation between closest ranks.
+
+    Args:
+        values: The samples
+        q: Quantile to compute, between 0 and 1
+
+    Returns:
+        The q-th quantile of the samples
+    """
+    if not values:
+        raise ValueError("quantile() requires at least one value")
+
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return ordered[lower]
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def median(values: Sequence[float]) -> float:
+    """
+    Compute the median of the samples.
+
+    Args:
+        values: The samples
+
+    Returns:
+        The median
+    """
+    return quantile(values, 0.5)
+
+
+def iqr(values: Sequence[float]) -> float:
+    """
+    Compute the interquartile range of the samples.
+
+    Args:
+        values: The samples
+
+    Returns:
+        The distance between the 75th and 25th percentiles
+    """
+    return quantile(values, 0.75) - quantile(values, 0.25)
+
+
+def count_outliers(values: Sequence[float]) -> int:
+    """
+    Count samples outside Tukey's fences (1.5 IQR beyond the quartiles).
+
+    Args:
+        values: The samples
+
+    Returns:
+        Number of outlying samples
+    """
+    q1 = quantile(values, 0.25)
+    q3 = quantile(values, 0.75)
+    fence = 1.5 * (q3 - q1)
+    return sum(1 for v in values if v < q1 - fence or v > q3 + fence)
+
+
+def linear_slope(values: Sequence[float]) -> float:
+    """
+    Compute the least-squares slope of samples against their index.
+
+    Args:
+        values: The samples in order, e.g. per-turn latencies
+
+    Returns:
+        Change of the samples per step; 0.0 for fewer than two samples
+    """
+    n = len(values)
+    if n < 2:
+        return 0.0
+    mean_x = (n - 1) / 2
+    mean_y = sum(values) / n
+    covariance = sum((i - mean_x) * (v - mean_y) for i, v in enumerate(values))
+    variance = sum((i - mean_x) ** 2 for i in range(n))
+    return covariance / variance
+
+
+def bootstrap_ci(values: Sequence[float],
+                 statistic: Callable[[Sequence[float]], float] = median,
+                 confidence: float = 0.95,
+                 resamples: int = 2000,
+                 seed: Optional[int] = None) -> Tuple[float, float]:
+    """
+    Compute a percentile bootstrap confidence interval for a statistic.
+
+    Args:
+        values: The samples
+        statistic: Function computing the statistic from a sample
+        confidence: Confidence level of the interval
+        resamples: Number of bootstrap resamples
+        seed: Seed for the resampling random generator
+
+    Returns:
+        (low, high) bounds of the interval
+    """
+    if len(values) < 2:
+        value = statistic(values)
+        return value, value
+
+    rng = random.Random(seed)
+    n = len(values)
+    estimates = [
+        statistic([values[rng.randrange(n)] for _ in range(n)])
+        for _ in range(resamples)
+    ]
+    alpha = (1.0 - confidence) / 2
+    return quantile(estimates, alpha), quantile(estimates, 1.0 - alpha)
+
+
+def bootstrap_diff_ci(baseline: Sequence[float],
+                      current: Sequence[float],
+                      statistic: Callable[[Sequence[float]], float] = median,
+                      confidence: float = 0.95,
+                      resamples: int = 2000,
+                      seed: Optional[int] = None) -> Tuple[float, float]:
+    """
+    Compute a bootstrap confidence interval for statistic(current) - statistic(baseline).
+
+    The two samples are independent and are resampled separately.
+
+    Args:
+        baseline: Samples of the baseline
+        current: Samples of the current version
+        statistic: Function computing the statistic from a sample
+        confidence: Confidence level of the interval
+        resamples: Number of bootstrap resamples
+        seed: Seed for the resampling random generator
+
+    Returns:
+        (low, high) bounds of the interval
+    """
+    rng = random.Random(seed)
+    n_base = len(baseline)
+    n_cur = len(current)
+    estimates = []
+    for _ in range(resamples):
+        base_sample = [baseline[rng.randrange(n_base)] for _ in range(n_base)]
+        cur_sample = [current[rng.randrange(n_cur)] for _ in range(n_cur)]
+        estimates.append(statistic(cur_sample) - statistic(base_sample))
+    alpha = (1.0 - confidence) / 2
+    return quantile(estimates, alpha), quantile(estimates, 1.0 - alpha)
+
+
+def summarize(values: Sequence[float],
+              confidence: float = 0.95,
+              resamples: int = 2000,
+              seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Summarize samples with robust statistics.
+
+    Args:
+        values: The samples
+        confidence: Confidence level for the median's interval
+        resamples: Number of bootstrap resamples
+        seed: Seed for the resampling random generator
+
+    Returns:
+        Dict with n, median, iqr, mean, outliers, ci_low and ci_high
+    """
+    ci_low, ci_high = bootstrap_ci(values, median, confidence, resamples, seed)
+    return {
+        "n": len(values),
+        "median": median(values),
+        "iqr": iqr(values),
+        "mean": sum(values) / len(values),
+        "outliers": count_outliers(values),
+        "ci_low": ci_low,
+        "ci_high": ci_high,
+    }
+
+
+def compare_paired(name_a: str,
+                   samples_a: Sequence[float],
+                   name_b: str,
+                   samples_b: Sequence[float],
+                   confidence: float = 0.95,
+                   resamples: int = 2000,
+                   seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Compare two paired sets of latency samples.
+
+    Samples must be paired, i.e. samples_a[i] and samples_b[i] measure the
+    same query in the same trial. The comparison bootstraps the median of the
+    paired differences; a difference is significant when its confidence
+    interval excludes zero.
+
+    Args:
+        name_a: Display name of the first set
+        samples_a: Latencies of the first set
+        name_b: Display name of the second set
+        samples_b: Latencies of the second set
+        confidence: Confidence level for the verdict
+        resamples: Number of bootstrap resamples
+        seed: Seed for the resampling random generator
+
+    Returns:
+        Dict with the median difference, its interval, the faster name (or
+        None if not significant) and a printable verdict
+    """
+    if len(samples_a) != len(samples_b):
+        raise ValueError("Paired comparison requires samples of equal length")
+
+    differences = [a - b for a, b in zip(samples_a, samples_b)]
+    ci_low, ci_high = bootstrap_ci(differences, median, confidence, resamples, seed)
+
+    faster = None
+    if ci_high < 0:
+        faster, slower = name_a, name_b
+    elif ci_low > 0:
+        faster, slower = name_b, name_a
+
+    level = f"{confidence:.0%}"
+    if faster is None:
+        verdict = f"No significant difference between {name_a} and {name_b} at {level} confidence"
+    else:
+        verdict = f"{faster} is faster than {slower} at {level} confidence"
+
+    return {
+        "median_difference": median(differences),
+        "ci_low": ci_low,
+        "ci_high": ci_high,
+        "faster": faster,
+        "verdict": verdict,
+    }
@@ -0,0 +1,163 @@
+"""
+Token savings and recall of relevance-based tool selection.
+
+The agent's real tools are mixed into a synthetic catalog of distractor
+tools (CRUD-style operations over business objects, some deliberately
+close to the real ones, such as air quality or sales forecasts) to emulate
+a production catalog of hundreds of tools. For every workload query with
+expected_tools the selector picks the top-k tools. The evaluation reports:
+
+- recall: share of queries whose expected tools were all selected
+- per-tool recall of each expected tool
+- prompt tokens of the sent schemas compared to the full catalog
+- selection latency
+
+Usage:
+    python -m evaluation.tool_selection_eval
+    python -m evaluation.tool_selection_eval --catalog-size 500 --k 3 --count 2000
+    python -m evaluation.tool_selection_eval --workload workload.jsonl --limit 500
+"""
+import sys
+import os
+import time
+import random
+import argparse
+from typing import Dict, Any, List, Optional, Iterable
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(parent_dir)
+
+from common.result_shaping import EXPAND_RESULT_TOOL
+from common.tool_selection import ToolSelector
+from evaluation import stats
+from evaluation.workload import WorkloadItem, iter_workload, generate_workload
+
+_VERBS = ["get", "list", "create", "update", "delete", "search", "send", "export"]
+
+# (object, system holding it); a few overlap with the real tools' vocabulary
+_OBJECTS = [
+    ("invoice", "billing system"), ("support ticket", "helpdesk"), ("calendar event", "calendar"),
+    ("email", "mailbox"), ("stock price", "market data feed"), ("flight", "travel booking service"),
+    ("hotel reservation", "travel booking service"), ("currency exchange rate", "treasury service"),
+    ("user account", "identity provider"), ("document", "document store"),
+    ("air quality reading", "environmental sensor network"), ("news article", "news feed"),
+    ("order", "order management system"), ("shipment", "logistics platform"),
+    ("employee record", "HR system"), ("expense report", "finance system"), ("playlist", "music service"),
+    ("recipe", "cooking database"), ("map route", "mapping service"), ("translation", "translation memory"),
+    ("sales forecast", "analytics warehouse"), ("sensor alert", "monitoring system"),
+    ("contract", "legal archive"), ("product listing", "catalog service"), ("budget", "planning tool"),
+]
+
+
+def _distractor(verb: str, obj: str, system: str, variant: int) -> Dict[str, Any]:
+    name = f"{verb}_{obj.replace(' ', '_')}" + (f"_v{variant + 1}" if variant else "")
+    if verb in ("search", "list"):
+        properties = {"query": {"type": "string", "description": f"Text to match {obj}s against"}}
+    else:
+        properties = {f"{obj.split()[-1]}_id": {"type": "string", "description": f"Identifier of the {obj}"}}
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": f"{verb.capitalize()} {'a' if verb not in ('list', 'search') else 'the'} "
+                           f"{obj}{'s' if verb in ('list', 'search') else ''} in the {system}",
+            "parameters": {"type": "object", "properties": properties, "required": list(properties)},
+        },
+    }
+
+
+def synthetic_catalog(size: int, seed: Optional[int] = 0) -> List[Dict[str, Any]]:
+    """
+    Build a catalog of distractor tool definitions.
+
+    Args:
+        size: Number of distractor tools
+        seed: Seed for the order in which combinations are drawn
+
+    Returns:
+        OpenAI-style tool definitions with unique names
+    """
+    combos = [(verb, obj, system) for obj, system in _OBJECTS for verb in _VERBS]
+    random.Random(seed).shuffle(combos)
+    return [_distractor(*combos[i % len(combos)], i // len(combos)) for i in range(size)]
+
+
+def evaluate_selection(items: Iterable[WorkloadItem], selector: ToolSelector) -> Dict[str, Any]:
+    """
+    Measure recall and token savings of a selector on labelled queries.
+
+    Args:
+        items: Workload items; items without expected_tools are skipped
+        selector: The tool selector over the full catalog
+
+    Returns:
+        Dict with queries, recall, per_tool recall, mean tools sent, token
+        stats from the selector and the median selection latency
+    """
+    hits = 0
+    queries = 0
+    tools_sent = 0
+    per_tool: Dict[str, List[int]] = {}
+    latencies = []
+    for item in items:
+        if not item.expected_tools:
+            continue
+        start_time = time.perf_counter()
+        selected = {d["function"]["name"] for d in selector.select(item.query)}
+        latencies.append(time.perf_counter() - start_time)
+
+        queries += 1
+        tools_sent += len(selected)
+        hits += set(item.expected_tools) <= selected
+        for tool in item.expected_tools:
+            per_tool.setdefault(tool, []).append(tool in selected)
+
+    return {
+        "queries": queries,
+        "recall": hits / queries if queries else None,
+        "per_tool": {tool: sum(found) / len(found) for tool, found in sorted(per_tool.items())},
+        "mean_tools_sent": tools_sent / queries if queries else 0.0,
+        "selection_latency": stats.median(latencies) if latencies else 0.0,
+        **selector.stats(),
+    }
+
+
+def main():
+    """
+    Main function.
+    """
+    parser = argparse.ArgumentParser(description="Evaluate relevance-based tool selection")
+    parser.add_argument("--workload", default=None, help="Labelled workload file (JSONL or CSV) instead of a generated one")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of workload queries")
+    parser.add_argument("--count", type=int, default=1000, help="Queries to generate without --workload")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated workload and catalog")
+    parser.add_argument("--catalog-size", type=int, default=300, help="Number of distractor tools")
+    parser.add_argument("--k", type=int, default=5, help="Ranked tools sent per call")
+    args = parser.parse_args()
+
+    from agents.no_framework.agent import NoFrameworkAgent
+    real_tools = NoFrameworkAgent().tool_definitions
+    catalog = real_tools + synthetic_catalog(args.catalog_size, args.seed)
+    selector = ToolSelector(catalog, k=args.k, pinned=[EXPAND_RESULT_TOOL["function"]["name"]])
+    items = (iter_workload(args.workload, args.limit) if args.workload
+             else generate_workload(args.count, seed=args.seed, long_context_words=200))
+
+    report = evaluate_selection(items, selector)
+    if not report["queries"]:
+        print("No labelled queries (expected_tools) in the workload")
+        return
+
+    print(f"Catalog: {len(catalog)} tools, top-{args.k} plus pinned")
+    print(f"Queries: {report['queries']}")
+    print(f"Recall (all expected tools selected): {report['recall']:.1%}")
+    for tool, recall in report["per_tool"].items():
+        print(f"  {tool:25} {recall:.1%}")
+    print(f"Tools sent per call: {report['mean_tools_sent']:.1f} of {len(catalog)}")
+    print(f"Schema tokens per call: {report['tokens_sent'] / report['selections']:.0f} "
+          f"instead of {report['tokens_full'] / report['selections']:.0f} ({report['saved_share']:.1%} saved)")
+    print(f"Selection latency (median): {report['selection_latency'] * 1e6:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Streaming workload loader and synthetic workload generator.
+
+Workloads are streams of WorkloadItem records. They can be read from large
+JSONL or CSV files with constant memory, or generated synthetically with a
+configurable mix of query categories and seeded randomness.
+
+Usage:
+    python -m evaluation.workload generate --count 100000 --seed 1 --output workload.jsonl \\
+        --mix chat=0.2,single_tool=0.4,multi_tool=0.2,multi_hop=0.1,long_context=0.1
+    python -m evaluation.workload stats workload.jsonl
+"""
+import sys
+import os
+import csv
+import random
+import argparse
+import itertools
+from collections import Counter
+from typing import Dict, Any, List, Optional, Iterable, Iterator
+
+from pydantic import BaseModel, Field
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(parent_dir)
+
+from common.utils import iter_jsonl_file
+
+# Column names accepted as the query text in workload files
+QUERY_FIELDS = ("query", "content", "message")
+
+CATEGORIES = ("chat", "single_tool", "multi_tool", "multi_hop", "long_context")
+
+DEFAULT_MIX = {
+    "chat": 0.15,
+    "single_tool": 0.45,
+    "multi_tool": 0.2,
+    "multi_hop": 0.1,
+    "long_context": 0.1,
+}
+
+_CITIES = ["Boston", "Paris", "Tokyo", "Berlin", "Madrid", "Rome", "Seattle", "Austin", "Denver", "Chicago"]
+_COUNTRIES = {"France": "Paris", "Germany": "Berlin", "Italy": "Rome", "Spain": "Madrid", "Japan": "Tokyo"}
+_TOPICS = ["artificial intelligence", "renewable energy", "quantum computing", "climate change",
+           "the history of the internet", "vector databases", "photosynthesis", "black holes"]
+_OPERATORS = ["+", "-", "*", "/"]
+_CHAT = ["Hello!", "Thanks for your help.", "Who are you?", "What can you do?", "Good morning"]
+_FILLER = ("Here is some background from our earlier discussion that you may find relevant. "
+           "We talked about travel plans, budgets, schedules and a few open questions. ")
+
+
+class WorkloadItem(BaseModel):
+    """A single query of a workload."""
+    query: str = Field(..., description="The user message")
+    category: Optional[str] = Field(None, description="Query category, e.g. single_tool")
+    expected_tools: List[str] = Field(default_factory=list, description="Tools a correct answer should call")
+    session_id: Optional[str] = Field(None, description="Conversation the query belongs to")
+
+
+def _to_item(record: Dict[str, Any]) -> WorkloadItem:
+    """
+    Build a workload item from a JSONL or CSV record.
+
+    Args:
+        record: The decoded record
+
+    Returns:
+        The workload item
+    """
+    query = next((record[f] for f in QUERY_FIELDS if record.get(f)), None)
+    if query is None:
+        raise ValueError(f"Workload record has none of the fields {QUERY_FIELDS}: {record}")
+
+    expected = record.get("expected_tools") or []
+    if isinstance(expected, str):
+        # CSV cells hold tool lists separated by "|" or ","
+        expected = [t for t in expected.replace("|", ",").split(",") if t]
+
+    return WorkloadItem(
+        query=query,
+        category=record.get("category") or None,
+        expected_tools=expected,
+        session_id=record.get("session_id") or None,
+    )
+
+
+def iter_workload(path: str, limit: Optional[int] = None) -> Iterator[WorkloadItem]:
+    """
+    Stream a workload file with constant memory.
+
+    JSONL and CSV files are read record by record; any other file is read as
+    plain text with one query per line.
+
+    Args:
+        path: Path to a .jsonl, .csv or text file
+        limit: Maximum number of items to yield
+
+    Returns:
+        Iterator over workload items
+    """
+    if path.endswith(".jsonl") or path.endswith(".ndjson"):
+        items = (_to_item(record) for record in iter_jsonl_file(path))
+    elif path.endswith(".csv"):
+        items = _iter_csv(path)
+    else:
+        items = _iter_text(path)
+    return itertools.islice(items, limit)
+
+
+def _iter_csv(path: str) -> Iterator[WorkloadItem]:
+    with open(path, "r", newline="") as f:
+        for record in csv.DictReader(f):
+            yield _to_item(record)
+
+
+def _iter_text(path: str) -> Iterator[WorkloadItem]:
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield WorkloadItem(query=line)
+
+
+def default_workload() -> Iterator[WorkloadItem]:
+    """
+    The built-in TEST_QUERIES of compare_all as a workload.
+
+    Returns:
+        Iterator over workload items
+    """
+    from evaluation.compare_all import TEST_QUERIES
+    return (WorkloadItem(query=q) for q in TEST_QUERIES)
+
+
+def _arithmetic(rng: random.Random) -> str:
+    if rng.random() < 0.3:
+        return f"What's {rng.choice([5, 10, 15, 20, 25, 50])}% of {rng.randint(10, 2000)}?"
+    a, b = rng.randint(2, 999), rng.randint(2, 999)
+    return f"Can you calculate {a} {rng.choice(_OPERATORS)} {b}?"
+
+
+def _make_item(category: str, rng: random.Random, long_context_words: int) -> WorkloadItem:
+    """
+    Generate one synthetic item of a category.
+    """
+    if category == "chat":
+        return WorkloadItem(query=rng.choice(_CHAT), category=category)
+
+    if category == "single_tool":
+        kind = rng.randrange(3)
+        if kind == 0:
+            return WorkloadItem(query=f"What's the weather like in {rng.choice(_CITIES)}?",
+                                category=category, expected_tools=["get_weather"])
+        if kind == 1:
+            return WorkloadItem(query=_arithmetic(rng), category=category, expected_tools=["calculate"])
+        return WorkloadItem(query=f"Search for information about {rng.choice(_TOPICS)}",
+                            category=category, expected_tools=["search_knowledge_base"])
+
+    if category == "multi_tool":
+        city = rng.choice(_CITIES)
+        a, b = rng.randint(2, 99), rng.randint(2, 99)
+        return WorkloadItem(
+            query=f"What's the weather in {city} and can you calculate {a} * {b}?",
+            category=category, expected_tools=["get_weather", "calculate"],
+        )
+
+    if category == "multi_hop":
+        country = rng.choice(list(_COUNTRIES))
+        return WorkloadItem(
+            query=f"Can you tell me about the capital of {country} and what the weather is like there right now?",
+            category=category, expected_tools=["search_knowledge_base", "get_weather"],
+        )
+
+    if category == "long_context":
+        repeats = max(1, long_context_words // len(_FILLER.split()))
+        question = f"Given all that, search for information about {rng.choice(_TOPICS)}"
+        return WorkloadItem(query=_FILLER * repeats + question, category=category,
+                            expected_tools=["search_knowledge_base"])
+
+    raise ValueError(f"Unknown workload category: {category}")
+
+
+def generate_workload(count: int,
+                      mix: Optional[Dict[str, float]] = None,
+                      seed: Optional[int] = None,
+                      long_context_words: int = 2000) -> Iterator[WorkloadItem]:
+    """
+    Generate a synthetic workload lazily.
+
+    Args:
+        count: Number of items to generate
+        mix: Relative weight of each category (defaults to DEFAULT_MIX)
+        seed: Seed for reproducible workloads
+        long_context_words: Approximate size of long_context queries in words
+
+    Returns:
+        Iterator over workload items
+    """
+    mix = mix or DEFAULT_MIX
+    unknown = set(mix) - set(CATEGORIES)
+    if unknown:
+        raise ValueError(f"Unknown workload categories: {sorted(unknown)}")
+
+    rng = random.Random(seed)
+    categories = list(mix)
+    weights = [mix[c] for c in categories]
+    for _ in range(count):
+        category = rng.choices(categories, weights)[0]
+        yield _make_item(category, rng, long_context_words)
+
+
+def write_workload(items: Iterable[WorkloadItem], path: str) -> int:
+    """
+    Stream workload items to a JSONL file.
+
+    Args:
+        items: Workload items
+        path: Output path
+
+    Returns:
+        Number of items written
+    """
+    written = 0
+    with open(path, "w") as f:
+        for item in items:
+            f.write(item.model_dump_json(exclude_none=True) + "\n")
+            written += 1
+    return written
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """
+    Parse a "category=weight,..." mix specification.
+
+    Args:
+        text: The mix specification
+
+    Returns:
+        Dict of category to weight
+    """
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def main():
+    """
+    Main function.
+    """
+    parser = argparse.ArgumentParser(description="Workload generation and inspection")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = subparsers.add_parser("generate", help="Generate a synthetic workload")
+    generate_parser.add_argument("--count", type=int, required=True, help="Number of queries")
+    generate_parser.add_argument("--mix", type=parse_mix, default=None, help="category=weight,... mix")
+    generate_parser.add_argument("--seed", type=int, default=None, help="Random seed")
+    generate_parser.add_argument("--long-context-words", type=int, default=2000, help="Size of long_context queries")
+    generate_parser.add_argument("--output", required=True, help="Output JSONL path")
+
+    stats_parser = subparsers.add_parser("stats", help="Summarize a workload file")
+    stats_parser.add_argument("path", help="Workload file")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        items = generate_workload(args.count, args.mix, args.seed, args.long_context_words)
+        written = write_workload(items, args.output)
+        print(f"Wrote {written} queries to {args.output}")
+        return
+
+    categories = Counter()
+    total_chars = 0
+    for item in iter_workload(args.path):
+        categories[item.category or "unlabelled"] += 1
+        total_chars += len(item.query)
+    count = sum(categories.values())
+    print(f"{count} queries, {total_chars / max(count, 1):.0f} characters on average")
+    for category, n in categories.most_common():
+        print(f"  {category}: {n} ({n / count:.1%})")
+
+
+if __name__ == "__main__":
+    main()
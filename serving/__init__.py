@@ -0,0 +1,3 @@
+"""
+HTTP serving layer for agent implementations.
+"""
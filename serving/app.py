@@ -0,0 +1,441 @@
+"""
+Async HTTP (ASGI) service exposing any BaseAgent implementation.
+
+Each session gets its own agent instance. Sessions are pinned to one of
+a fixed number of single-threaded workers by hashing the session id, so
+a session's turns always run in order on the same thread while different
+sessions run concurrently. When too many requests are in flight the
+service sheds load with 503 and a Retry-After header.
+
+With a FairScheduler, requests wait for an agent slot in per-tenant fair
+queues before they reach a worker. The tenant is taken from the
+X-Tenant-Id header and the priority class from X-Priority ("interactive"
+or "batch"). Requests the scheduler sheds get 429 (tenant limits) or 503
+(scheduler full, or the expected wait exceeds the deadline) with
+Retry-After; requests whose deadline passes while queued get 504. The
+scheduler's limits then replace the global max_pending limit.
+
+Routes:
+    POST   /sessions/{session_id}/messages   {"content": "...", "timeout": 5.0}
+    POST   /messages                         {"content": "..."} (new session)
+    DELETE /sessions/{session_id}
+    GET    /healthz
+    GET    /metrics                          (Prometheus text format)
+
+The optional "timeout" is the request's deadline in seconds. Send
+"Accept: text/event-stream" (or ?stream=true) to receive the response as
+server-sent events. Agents do not generate incrementally, so the events
+carry the finished response in chunks: the session id arrives at once,
+but the first content only once the whole turn is done.
+"""
+import time
+import uuid
+import zlib
+import asyncio
+import threading
+import concurrent.futures
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Callable, Tuple
+from urllib.parse import parse_qs
+
+from common.schema import UserMessage, AgentResponse
+from common.deadline import Deadline, DeadlineExceeded
+from common.scheduler import FairScheduler, AdmissionRejected, DEFAULT_TENANT, PRIORITIES, call_as
+from common import metrics
+from common import codec
+from agents.base_agent import BaseAgent
+
+# Largest accepted request body in bytes
+MAX_BODY_BYTES = 1024 * 1024
+
+SESSIONS_GAUGE = metrics.REGISTRY.gauge("serving_sessions", "Agent sessions held by the service")
+PENDING_GAUGE = metrics.REGISTRY.gauge("serving_pending_requests", "Requests in flight in the service")
+REJECTED_COUNTER = metrics.REGISTRY.counter("serving_rejected_total", "Requests shed with 503 or 429")
+
+
+class _Session:
+    """
+    Agent state of one conversation.
+    """
+
+    def __init__(self, worker: int):
+        # Built on the session's worker by its first request
+        self.agent: Optional[BaseAgent] = None
+        self.worker = worker
+        self.last_used = time.monotonic()
+        self.active = 0
+
+
+class AgentService:
+    """
+    ASGI application serving a BaseAgent implementation.
+    """
+
+    def __init__(self,
+                 agent_factory: Callable[[], BaseAgent],
+                 workers: int = 4,
+                 max_pending: int = 64,
+                 max_sessions: int = 10000,
+                 session_ttl: float = 1800.0,
+                 retry_after: int = 1,
+                 scheduler: Optional[FairScheduler] = None):
+        """
+        Initialize the service.
+
+        Args:
+            agent_factory: Callable creating a new, uninitialized agent
+            workers: Number of single-threaded workers sessions are pinned to
+            max_pending: In-flight requests above which new ones get 503; not
+                applied with a scheduler, whose max_queued and tenant queue
+                limits bound waiting requests and whose capacity bounds
+                running ones, so one tenant's queued burst cannot shed others
+            max_sessions: Idle sessions beyond this are evicted, oldest first
+            session_ttl: Seconds of inactivity after which a session is evicted
+            retry_after: Retry-After seconds sent with 503 responses
+            scheduler: Optional fair scheduler admitting requests per tenant
+                before they reach a worker
+        """
+        self.agent_factory = agent_factory
+        self.max_pending = max_pending
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self.retry_after = retry_after
+        self.scheduler = scheduler
+        self.executors = [
+            concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"agent-worker-{i}")
+            for i in range(workers)
+        ]
+        self.sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self.pending = 0
+        self.rejected = 0
+        self.completed = 0
+        self._lock = threading.Lock()
+
+    def _worker_for(self, session_id: str) -> int:
+        """
+        Pick the worker a session is pinned to.
+        """
+        return zlib.crc32(session_id.encode()) % len(self.executors)
+
+    def _acquire_session(self, session_id: str) -> _Session:
+        """
+        Get or create a session and mark it active.
+
+        A new session has no agent yet; building one can be slow, so it is
+        done on the session's worker rather than here under the lock on the
+        event loop.
+        """
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                session = _Session(self._worker_for(session_id))
+                self.sessions[session_id] = session
+            self.sessions.move_to_end(session_id)
+            session.active += 1
+            session.last_used = time.monotonic()
+            self._evict()
+            return session
+
+    def _run_turn(self, session: _Session, tenant: str, priority: str,
+                  message: UserMessage, deadline: Optional[Deadline]) -> AgentResponse:
+        """
+        Run one turn on the session's worker, building the agent on first use.
+
+        The worker is single-threaded and the session is pinned to it, so the
+        agent is built once, before any of the session's turns.
+        """
+        if session.agent is None:
+            agent = self.agent_factory()
+            agent.initialize()
+            session.agent = agent
+        return call_as(tenant, priority, session.agent.process, message, deadline)
+
+    def _release_session(self, session: _Session) -> None:
+        with self._lock:
+            session.active -= 1
+            session.last_used = time.monotonic()
+
+    def _evict(self) -> None:
+        """
+        Drop expired sessions and idle sessions over the limit. Caller holds the lock.
+        """
+        now = time.monotonic()
+        for session_id in list(self.sessions):
+            session = self.sessions[session_id]
+            over_limit = len(self.sessions) > self.max_sessions
+            expired = now - session.last_used > self.session_ttl
+            if not over_limit and not expired:
+                # Sessions are ordered by last use, so the rest are fresher
+                break
+            if session.active == 0:
+                del self.sessions[session_id]
+
+    async def process(self, session_id: str, content: str, deadline: Optional[Deadline] = None,
+                      tenant: str = DEFAULT_TENANT, priority: str = "interactive") -> AgentResponse:
+        """
+        Process a message in a session on the session's worker.
+
+        Args:
+            session_id: The conversation id
+            content: The user message
+            deadline: Optional deadline of the request, started on arrival so
+                time queued behind the session's worker counts against it
+            tenant: Tenant the agent's LLM calls are attributed to
+            priority: Priority class of those calls
+
+        Returns:
+            The agent's response
+        """
+        session = self._acquire_session(session_id)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.executors[session.worker], self._run_turn, session, tenant, priority,
+                UserMessage(content=content), deadline
+            )
+        finally:
+            self._release_session(session)
+
+    def close(self) -> None:
+        """
+        Shut down the worker threads.
+        """
+        for executor in self.executors:
+            executor.shutdown(wait=True)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        method = scope["method"]
+        parts = [p for p in scope["path"].split("/") if p]
+
+        if parts == ["healthz"] and method == "GET":
+            health = {
+                "status": "ok",
+                "sessions": len(self.sessions),
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+            if self.scheduler is not None:
+                health["tenants"] = self.scheduler.stats()
+            await _send_json(send, 200, health)
+        elif parts == ["metrics"] and method == "GET":
+            SESSIONS_GAUGE.set(len(self.sessions))
+            PENDING_GAUGE.set(self.pending)
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", metrics.CONTENT_TYPE.encode())],
+            })
+            await send({"type": "http.response.body", "body": metrics.REGISTRY.render().encode()})
+        elif len(parts) == 2 and parts[0] == "sessions" and method == "DELETE":
+            with self._lock:
+                session = self.sessions.get(parts[1])
+                if session is not None and session.active == 0:
+                    del self.sessions[parts[1]]
+            status = 404 if session is None else (409 if session.active else 204)
+            await _send_json(send, status, None if status == 204 else {"error": "session busy or unknown"})
+        elif parts == ["messages"] or (len(parts) == 3 and parts[0] == "sessions" and parts[2] == "messages"):
+            if method != "POST":
+                await _send_json(send, 405, {"error": "method not allowed"})
+                return
+            session_id = parts[1] if len(parts) == 3 else uuid.uuid4().hex
+            await self._handle_message(scope, receive, send, session_id)
+        else:
+            await _send_json(send, 404, {"error": "not found"})
+
+    async def _handle_message(self, scope: Dict[str, Any], receive: Callable, send: Callable,
+                              session_id: str) -> None:
+        """
+        Handle POST of a user message, with backpressure and optional SSE.
+        """
+        # Shed load before reading the body so saturation stays cheap
+        if self.scheduler is None and self.pending >= self.max_pending:
+            self.rejected += 1
+            REJECTED_COUNTER.inc()
+            await _send_json(send, 503, {"error": "server saturated"},
+                             [(b"retry-after", str(self.retry_after).encode())])
+            return
+
+        self.pending += 1
+        try:
+            body = await _read_body(receive)
+            if body is None:
+                await _send_json(send, 413, {"error": "request body too large"})
+                return
+            try:
+                payload = codec.loads(body)
+                content = payload["content"]
+                if not isinstance(content, str):
+                    raise TypeError("content must be a string")
+                timeout = payload.get("timeout")
+                deadline = Deadline(float(timeout)) if timeout is not None else None
+            except (ValueError, KeyError, TypeError, AttributeError):
+                await _send_json(send, 400, {"error": "expected a JSON body with a content field"})
+                return
+
+            headers = dict(scope.get("headers") or [])
+            tenant = headers.get(b"x-tenant-id", DEFAULT_TENANT.encode()).decode() or DEFAULT_TENANT
+            priority = headers.get(b"x-priority", b"interactive").decode().lower()
+            if priority not in PRIORITIES:
+                await _send_json(send, 400, {"error": f"priority must be one of {', '.join(PRIORITIES)}"})
+                return
+
+            ticket = await self._admit(send, tenant, priority, deadline)
+            if ticket is False:
+                return
+            try:
+                if _wants_stream(scope):
+                    await self._stream_response(send, session_id, content, deadline, tenant, priority)
+                    return
+
+                try:
+                    response = await self.process(session_id, content, deadline, tenant, priority)
+                except AdmissionRejected as e:
+                    # The LLM scheduler shed one of the agent's calls
+                    await self._send_rejection(send, e)
+                    return
+                except Exception as e:
+                    await _send_json(send, 500, {"error": str(e)})
+                    return
+                self.completed += 1
+                await _send_json(send, 200, {"session_id": session_id, **response.model_dump()})
+            finally:
+                if ticket is not None:
+                    ticket.release()
+        finally:
+            self.pending -= 1
+
+    async def _admit(self, send: Callable, tenant: str, priority: str, deadline: Optional[Deadline]):
+        """
+        Wait for the scheduler to admit a request, answering it if shed.
+
+        Returns:
+            The ticket to release, None without a scheduler, or False if the
+            request was answered with an error
+        """
+        if self.scheduler is None:
+            return None
+        try:
+            return await self.scheduler.acquire_async(tenant, priority, deadline)
+        except AdmissionRejected as e:
+            await self._send_rejection(send, e)
+        except DeadlineExceeded as e:
+            await _send_json(send, 504, {"error": str(e)})
+        return False
+
+    async def _send_rejection(self, send: Callable, rejection: AdmissionRejected) -> None:
+        """
+        Answer a request shed by a scheduler with 429 (tenant limit) or 503.
+        """
+        self.rejected += 1
+        REJECTED_COUNTER.inc()
+        status = 429 if rejection.reason == "tenant_queue_full" else 503
+        retry_after = max(self.retry_after, round(rejection.retry_after))
+        await _send_json(send, status, {"error": str(rejection), "reason": rejection.reason},
+                         [(b"retry-after", str(retry_after).encode())])
+
+    async def _stream_response(self, send: Callable, session_id: str, content: str,
+                               deadline: Optional[Deadline] = None, tenant: str = DEFAULT_TENANT,
+                               priority: str = "interactive") -> None:
+        """
+        Send the response as server-sent events.
+
+        Emits a "session" event immediately, then one "tool_call" event per
+        tool call, "message" events carrying the content, and "done". The
+        content is the finished response split into chunks, not tokens
+        streamed while the LLM generates them.
+        """
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+            ],
+        })
+        await _send_event(send, "session", {"session_id": session_id})
+
+        try:
+            response = await self.process(session_id, content, deadline, tenant, priority)
+        except Exception as e:
+            await _send_event(send, "error", {"error": str(e)})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        for tool_call in response.tool_calls:
+            await _send_event(send, "tool_call", tool_call.model_dump())
+        for chunk in _chunks(response.content):
+            await _send_event(send, "message", {"content": chunk})
+        self.completed += 1
+        await _send_event(send, "done", {"session_id": session_id})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def _lifespan(self, receive: Callable, send: Callable) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def _wants_stream(scope: Dict[str, Any]) -> bool:
+    query = parse_qs(scope.get("query_string", b"").decode())
+    if query.get("stream", ["false"])[0].lower() in ("1", "true", "yes"):
+        return True
+    headers = dict(scope.get("headers") or [])
+    return b"text/event-stream" in headers.get(b"accept", b"")
+
+
+def _chunks(text: str, size: int = 64) -> List[str]:
+    """
+    Split text into chunks of roughly `size` characters on word boundaries.
+    """
+    chunks, current = [], ""
+    for word in (text or "").split(" "):
+        if current and len(current) + len(word) + 1 > size:
+            chunks.append(current + " ")
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+async def _read_body(receive: Callable) -> Optional[bytes]:
+    """
+    Read the request body; None if it exceeds MAX_BODY_BYTES.
+    """
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if len(body) > MAX_BODY_BYTES:
+            return None
+        if not message.get("more_body", False):
+            return body
+
+
+async def _send_json(send: Callable, status: int, payload: Any,
+                     headers: Optional[List[Tuple[bytes, bytes]]] = None) -> None:
+    body = b"" if payload is None else codec.dumpb(payload)
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json")] + (headers or []),
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_event(send: Callable, event: str, data: Dict[str, Any]) -> None:
+    payload = f"event: {event}\ndata: {codec.dumps(data)}\n\n".encode()
+    await send({"type": "http.response.body", "body": payload, "more_body": True})
@@ -0,0 +1,118 @@
+"""
+Run the agent HTTP service with uvicorn.
+
+Usage:
+    python -m serving.run --framework no_framework --offline --workers 8 --port 8000
+    python -m serving.run --offline --fair --tenant-weight acme=3 --tenant-concurrency 4 --llm-concurrency 16
+"""
+import sys
+import os
+import argparse
+
+# Add parent directory to path to allow imports
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(parent_dir)
+
+from common.offline_llm import OFFLINE_MODEL
+from common.registry import AGENTS
+from common.scheduler import FairScheduler, TenantPolicy, configure_llm_scheduler
+from serving.app import AgentService
+
+
+def parse_weights(values):
+    """
+    Parse NAME=WEIGHT tenant weights.
+
+    Args:
+        values: Strings like "acme=3"
+
+    Returns:
+        Dict of tenant to weight
+    """
+    weights = {}
+    for value in values or []:
+        tenant, _, weight = value.partition("=")
+        try:
+            weights[tenant] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Expected NAME=WEIGHT, got {value!r}")
+    return weights
+
+
+def main():
+    """
+    Main function.
+    """
+    parser = argparse.ArgumentParser(description="Serve an agent over HTTP")
+    parser.add_argument("--framework", choices=sorted(AGENTS.aliases()), default="no_framework",
+                        help="Short name of the framework (plugins add their aliases)")
+    parser.add_argument("--model", default=None, help="LLM model to use")
+    parser.add_argument("--offline", action="store_true", help="Use the deterministic offline LLM stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=4, help="Agent worker threads")
+    parser.add_argument("--max-pending", type=int, default=64, help="In-flight requests before shedding load (without --fair)")
+    parser.add_argument("--max-sessions", type=int, default=10000, help="Maximum idle sessions kept")
+    parser.add_argument("--session-ttl", type=float, default=1800.0, help="Idle session lifetime in seconds")
+    parser.add_argument("--semantic-cache", action="store_true",
+                        help="Answer near-duplicate first messages from a shared semantic cache")
+    parser.add_argument("--similarity", type=float, default=0.9, help="Semantic cache similarity threshold")
+    parser.add_argument("--fast-path", action="store_true",
+                        help="Answer trivial arithmetic and weather queries without the LLM")
+    parser.add_argument("--fair", action="store_true",
+                        help="Admit requests through per-tenant fair queues (X-Tenant-Id, X-Priority)")
+    parser.add_argument("--tenant-weight", action="append", metavar="NAME=WEIGHT",
+                        help="Share of a tenant relative to the default weight 1 (repeatable)")
+    parser.add_argument("--tenant-concurrency", type=int, default=None, help="Agent slots one tenant may hold")
+    parser.add_argument("--tenant-queue", type=int, default=None, help="Queued requests per tenant before 429")
+    parser.add_argument("--max-queued", type=int, default=1024, help="Queued requests in total before 503")
+    parser.add_argument("--llm-concurrency", type=int, default=0,
+                        help="Concurrent LLM calls, shared fairly across tenants (0 for unlimited)")
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        print("uvicorn is required to serve agents: pip install -e '.[serving]'")
+        sys.exit(1)
+
+    model = OFFLINE_MODEL if args.offline else args.model
+    agent_class = AGENTS[args.framework]
+    factory = lambda: agent_class(model=model)
+    if args.semantic_cache:
+        from agents.semantic_cache import SemanticAnswerCache, SemanticCacheAgent
+        cache = SemanticAnswerCache(threshold=args.similarity)
+        base_factory = factory
+        factory = lambda: SemanticCacheAgent(base_factory(), cache)
+    if args.fast_path:
+        from agents.router import FastPathRouterAgent
+        inner_factory = factory
+        factory = lambda: FastPathRouterAgent(inner_factory())
+
+    default_policy = TenantPolicy(max_concurrency=args.tenant_concurrency, max_queued=args.tenant_queue)
+    policies = {
+        tenant: TenantPolicy(weight, args.tenant_concurrency, args.tenant_queue)
+        for tenant, weight in parse_weights(args.tenant_weight).items()
+    }
+    scheduler = None
+    if args.fair:
+        # One slot per worker, so admitted requests rarely queue behind a worker
+        scheduler = FairScheduler(args.workers, policies=policies, default_policy=default_policy,
+                                  max_queued=args.max_queued)
+    if args.llm_concurrency:
+        configure_llm_scheduler(args.llm_concurrency, policies=policies,
+                                default_policy=TenantPolicy(max_queued=args.tenant_queue))
+
+    service = AgentService(
+        factory,
+        workers=args.workers,
+        max_pending=args.max_pending,
+        max_sessions=args.max_sessions,
+        session_ttl=args.session_ttl,
+        scheduler=scheduler,
+    )
+    uvicorn.run(service, host=args.host, port=args.port, log_level="info")
+
+
+if __name__ == "__main__":
+    main()
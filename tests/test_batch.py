@@ -0,0 +1,87 @@
+"""Tests for the BaseAgent batch processing API."""
+from agents.no_framework.agent import NoFrameworkAgent
+from agents.semantic_cache import SemanticCacheAgent, SemanticAnswerCache
+from common.offline_llm import OFFLINE_MODEL
+from common.schema import BatchItem, UserMessage
+
+
+def _items(queries, sessions=None):
+    return [
+        BatchItem(session_id=sessions[i] if sessions else f"s{i}", message=UserMessage(content=q))
+        for i, q in enumerate(queries)
+    ]
+
+
+def test_process_many_returns_results_in_input_order():
+    """Test ordering, counts and throughput of a batch."""
+    agent = NoFrameworkAgent(model=OFFLINE_MODEL)
+    queries = [f"Can you calculate {i} * 3?" for i in range(12)]
+    batch = agent.process_many(_items(queries), concurrency=4)
+
+    assert [r.index for r in batch.results] == list(range(12))
+    assert batch.succeeded == 12 and batch.failed == 0
+    assert batch.throughput > 0
+    assert batch.results[5].response.tool_calls[0].tool_input == {"expression": "5 * 3"}
+    # The batch ran on forks; the original session is untouched
+    assert agent.messages == []
+
+
+def test_messages_of_a_session_share_one_conversation():
+    """Test that a session's messages run in order on one fork."""
+    agent = NoFrameworkAgent(model=OFFLINE_MODEL)
+    items = _items(["What's the weather like in Boston?", "Can you calculate 2 + 2?", "Hello"],
+                   sessions=["a", "a", "b"])
+    seen = []
+    original_fork = agent.fork
+
+    def fork():
+        clone = original_fork()
+        seen.append(clone)
+        return clone
+
+    agent.fork = fork
+    batch = agent.process_many(items, concurrency=2)
+
+    assert batch.failed == 0
+    assert len(seen) == 2
+    histories = sorted(len([m for m in a.messages if m["role"] == "user"]) for a in seen)
+    assert histories == [1, 2]
+
+
+def test_failures_are_reported_per_item():
+    """Test that a raising item fails alone and the stream yields every item."""
+    agent = NoFrameworkAgent(model=OFFLINE_MODEL)
+    original_fork = agent.fork
+
+    def fork():
+        clone = original_fork()
+        process = clone.process
+
+        def flaky(message, deadline=None):
+            if "boom" in message.content:
+                raise RuntimeError("boom")
+            return process(message, deadline)
+
+        clone.process = flaky
+        return clone
+
+    agent.fork = fork
+    items = _items(["Can you calculate 1 + 1?", "boom", "Can you calculate 2 + 2?"], sessions=["a", "a", "b"])
+    streamed = list(agent.iter_process_many(items, concurrency=2))
+    assert sorted(r.index for r in streamed) == [0, 1, 2]
+
+    batch = agent.process_many(items)
+    assert batch.failed == 1 and batch.succeeded == 2
+    assert batch.results[1].error == "boom" and batch.results[1].response is None
+    assert batch.results[2].response is not None
+
+
+def test_wrapper_forks_share_the_cache():
+    """Test that wrapper forks keep the shared semantic cache."""
+    cache = SemanticAnswerCache()
+    agent = SemanticCacheAgent(NoFrameworkAgent(model=OFFLINE_MODEL), cache)
+    batch = agent.process_many(_items(["What's the weather like in Boston?"] * 3, sessions=["a", "b", "c"]),
+                               concurrency=1)
+
+    assert batch.failed == 0
+    assert cache.stats()["hits"] == 2
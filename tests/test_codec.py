@@ -0,0 +1,70 @@
+"""Tests for the JSON codec backends."""
+import datetime
+import dataclasses
+
+import pytest
+
+from common.codec import JsonCodec, orjson
+from common.schema import ToolCall
+from common.tool_cache import canonical_key
+
+BACKENDS = ["json"] + (["orjson"] if orjson is not None else [])
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_round_trip_and_conversions(backend):
+    """Test that non-JSON types are converted and plain values round trip."""
+    codec = JsonCodec(backend)
+    value = {
+        "when": datetime.datetime(2024, 1, 2, 3, 4, 5),
+        "tags": {"a"},
+        "call": ToolCall(tool_name="calculate", tool_input={"expression": "1 + 1"}),
+        "text": "café",
+    }
+
+    decoded = codec.loads(codec.dumpb(value))
+
+    assert decoded["when"] == "2024-01-02T03:04:05"
+    assert decoded["tags"] == ["a"]
+    assert decoded["call"]["tool_input"] == {"expression": "1 + 1"}
+    assert codec.loads(codec.dumps({"text": "café", "n": [1, 2.5, None]})) == {"text": "café", "n": [1, 2.5, None]}
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_strict_mode_rejects_unknown_types(backend):
+    """Test that strict encoding raises TypeError instead of converting."""
+    with pytest.raises(TypeError):
+        JsonCodec(backend).dumps({"value": object()}, strict=True)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_big_integers_and_invalid_input(backend):
+    """Test integers beyond 64 bits and decoding errors."""
+    codec = JsonCodec(backend)
+
+    assert codec.loads(codec.dumps({"n": 2 ** 70})) == {"n": 2 ** 70}
+    with pytest.raises(ValueError):
+        codec.loads("{not json")
+
+
+@pytest.mark.skipif(orjson is None, reason="orjson is not installed")
+def test_backends_produce_identical_text():
+    """Test that cache keys and fingerprints agree across backends for plain values and dataclasses."""
+    @dataclasses.dataclass
+    class Point:
+        x: int
+        y: float
+
+    value = {"b": [1, 2.5, "x"], "a": {"z": None, "y": True}, "text": "naïve", "point": Point(1, 0.5)}
+
+    assert JsonCodec("orjson").dumps(value, sort_keys=True) == JsonCodec("json").dumps(value, sort_keys=True)
+    assert JsonCodec("orjson").dumps(value) == JsonCodec("json").dumps(value)
+
+
+def test_unknown_backend_and_canonical_key():
+    """Test backend validation and that cache keys stay order independent."""
+    with pytest.raises(ValueError):
+        JsonCodec("yaml")
+
+    assert canonical_key({"a": 1, "b": 2}) == canonical_key({"b": 2, "a": 1})
+    assert canonical_key({"a": object()}) is None
@@ -0,0 +1,71 @@
+"""Tests for request deadlines in the agent loop."""
+import time
+
+import pytest
+
+from agents.no_framework.agent import NoFrameworkAgent
+from common import offline_llm
+from common.deadline import Deadline, DeadlineExceeded
+from common.schema import UserMessage
+
+
+def test_deadline_shrinks_timeouts():
+    """Test that timeouts are capped by the time left and fail once it is gone."""
+    deadline = Deadline(0.05)
+
+    assert deadline.timeout(cap=0.01) == 0.01
+    assert 0 < deadline.timeout() <= 0.05
+    time.sleep(0.06)
+    assert deadline.expired()
+    with pytest.raises(DeadlineExceeded):
+        deadline.timeout()
+
+
+def test_agent_returns_partial_answer_at_deadline(monkeypatch):
+    """Test that the loop stops at the deadline with the tool results gathered so far."""
+    monkeypatch.setattr(offline_llm, "OFFLINE_LATENCY", 0.2)
+    agent = NoFrameworkAgent(model=offline_llm.OFFLINE_MODEL)
+    agent.initialize()
+
+    start = time.monotonic()
+    response = agent.process(UserMessage(content="What's the weather like in Boston?"), deadline=Deadline(0.3))
+    elapsed = time.monotonic() - start
+
+    metrics = agent.get_metrics()
+    assert elapsed < 0.4
+    assert response.content.startswith("I ran out of time before finishing.")
+    assert "Boston" in response.content
+    assert [c.tool_name for c in response.tool_calls] == ["get_weather"]
+    assert metrics.deadline_exceeded_count == 1
+    assert metrics.error_count == 0
+
+
+def test_generous_deadline_changes_nothing():
+    """Test that a request finishing in time is answered normally."""
+    agent = NoFrameworkAgent(model=offline_llm.OFFLINE_MODEL)
+    agent.initialize()
+
+    response = agent.process(UserMessage(content="Can you calculate 6 * 7?"), deadline=Deadline(30))
+
+    assert "42" in response.content
+    assert agent.get_metrics().deadline_exceeded_count == 0
+
+
+def test_late_final_answer_is_returned(monkeypatch):
+    """Test that a final answer arriving after the deadline is kept rather than discarded."""
+    agent = NoFrameworkAgent(model=offline_llm.OFFLINE_MODEL)
+    agent.initialize()
+    complete = agent.llm.complete
+
+    def slow_complete(*args, **kwargs):
+        response = complete(*args, **kwargs)
+        time.sleep(0.06)
+        return response
+
+    monkeypatch.setattr(agent.llm, "complete", slow_complete)
+    response = agent.process(UserMessage(content="Hello, how are you?"), deadline=Deadline(0.05))
+
+    assert response.content
+    assert not response.content.startswith("I ran out of time")
+    assert response.tool_calls == []
+    assert agent.get_metrics().deadline_exceeded_count == 0
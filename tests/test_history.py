@@ -0,0 +1,110 @@
+"""Tests for the benchmark history and regression detection."""
+import sys
+
+import pytest
+
+from evaluation import history as history_module
+from evaluation.history import BenchmarkHistory, find_regressions
+
+
+def _rows(latency, trials=5):
+    return [
+        {"framework": "A", "query_index": 0, "trial": t, "latency": latency + 0.01 * t, "total_tokens": 100}
+        for t in range(trials)
+    ]
+
+
+def test_record_and_resolve_runs(tmp_path):
+    """Test that runs are recorded and resolvable by selector."""
+    history = BenchmarkHistory(str(tmp_path / "history.sqlite"))
+    first = history.record_run(_rows(1.0), source="test", label="base")
+    second = history.record_run(_rows(1.0), source="test")
+
+    assert history.resolve_run("latest") == second
+    assert history.resolve_run("previous") == first
+    assert history.resolve_run("base") == first
+    assert history.measurements(first)["A"][0]["latency"][0] == 1.0
+    history.close()
+
+
+def test_latency_regression_is_flagged(tmp_path):
+    """Test that a significant slowdown is reported and noise is not."""
+    history = BenchmarkHistory(str(tmp_path / "history.sqlite"))
+    base = history.record_run(_rows(1.0), source="test")
+    same = history.record_run(_rows(1.0), source="test")
+    slow = history.record_run(_rows(2.0), source="test")
+
+    assert find_regressions(history.measurements(base), history.measurements(same)) == []
+
+    metrics = {f["metric"] for f in find_regressions(history.measurements(base), history.measurements(slow))}
+    assert metrics == {"latency", "throughput"}
+    history.close()
+
+
+def test_throughput_regression_needs_significance(tmp_path):
+    """Test that throughput is compared per repetition rather than as one sample."""
+    history = BenchmarkHistory(str(tmp_path / "history.sqlite"))
+    rows = lambda latency: [dict(row, query_index=q) for q in range(3) for row in _rows(latency)]
+    base = history.record_run(rows(1.0), source="test")
+    same = history.record_run(rows(1.02), source="test")
+    slow = history.record_run(rows(1.5), source="test")
+
+    assert find_regressions(history.measurements(base), history.measurements(same), threshold=0.01) == []
+    findings = find_regressions(history.measurements(base), history.measurements(slow))
+    throughput = [f for f in findings if f["metric"] == "throughput"]
+    assert len(throughput) == 1 and throughput[0]["significant"]
+    history.close()
+
+
+def test_selectors_respect_the_run_source(tmp_path):
+    """Test that latest/previous only consider runs of the requested source."""
+    history = BenchmarkHistory(str(tmp_path / "history.sqlite"))
+    first = history.record_run(_rows(1.0), source="benchmark")
+    second = history.record_run(_rows(1.0), source="benchmark")
+    other = history.record_run(_rows(1.0), source="compare_all")
+
+    assert history.resolve_run("latest") == other
+    assert history.resolve_run("latest", source="benchmark") == second
+    assert history.resolve_run("previous", source="benchmark") == first
+    assert history.run_source(other) == "compare_all"
+    history.close()
+
+
+def test_previous_is_relative_to_the_current_run(tmp_path):
+    """Test that "previous" is the run before the current run, not before the latest."""
+    history = BenchmarkHistory(str(tmp_path / "history.sqlite"))
+    first = history.record_run(_rows(1.0), source="test")
+    second = history.record_run(_rows(1.0), source="test")
+    history.record_run(_rows(1.0), source="test")
+
+    assert history.resolve_run("previous", before=second) == first
+    with pytest.raises(ValueError):
+        history.resolve_run("previous", before=first)
+    history.close()
+
+
+def test_single_samples_do_not_fail_the_comparison(tmp_path, monkeypatch, capsys):
+    """Test that untestable changes are reported as insufficient samples with exit status 0."""
+    db = str(tmp_path / "history.sqlite")
+    history = BenchmarkHistory(db)
+    history.record_run(_rows(1.0, trials=1), source="test")
+    history.record_run(_rows(2.0, trials=1), source="test")
+    history.close()
+
+    monkeypatch.setattr(sys, "argv", ["history", "--db", db, "compare"])
+    with pytest.raises(SystemExit) as exit_info:
+        history_module.main()
+
+    assert exit_info.value.code == 0
+    output = capsys.readouterr().out
+    assert "insufficient samples" in output
+    assert "No regressions detected" in output
+
+
+def test_fingerprint_records_the_tool_cache(monkeypatch):
+    """Test that runs record whether the tool result cache was enabled."""
+    from common.tool_cache import TOOL_CACHE
+    from evaluation.history import environment_fingerprint
+
+    monkeypatch.setattr(TOOL_CACHE, "enabled", False)
+    assert environment_fingerprint()["tool_cache"] is False
@@ -0,0 +1,95 @@
+"""Tests for the open-loop load generator."""
+import random
+import threading
+import time
+
+from evaluation.loadgen import arrival_times, ramp, max_sustainable_rate, HttpTarget
+
+
+def test_arrival_times():
+    """Test fixed and seeded Poisson arrival schedules."""
+    assert arrival_times(4, 1.0) == [0.0, 0.25, 0.5, 0.75]
+
+    poisson = arrival_times(100, 10.0, "poisson", random.Random(1))
+    assert poisson == sorted(poisson)
+    assert 900 < len(poisson) < 1100
+    assert poisson == arrival_times(100, 10.0, "poisson", random.Random(1))
+
+
+def test_queueing_counts_towards_latency():
+    """Test that a saturated target misses the SLO even though service time stays flat."""
+    lock = threading.Lock()
+
+    def target(query):
+        # A single-server target: requests serialize behind the lock
+        with lock:
+            time.sleep(0.02)
+        return True
+
+    steps = ramp(target, ["q"], rates=[10, 200], duration=0.5, slo_p99=0.1, concurrency=8)
+
+    assert [s["meets_slo"] for s in steps] == [True, False]
+    assert steps[1]["p99"] > steps[1]["service_p99"]
+    assert max_sustainable_rate(steps) == 10
+
+
+def test_errors_violate_slo():
+    """Test that failing requests count against the error budget."""
+    steps = ramp(lambda q: False, ["q"], rates=[20], duration=0.2, slo_p99=1.0)
+
+    assert steps[0]["errors"] == steps[0]["sent"]
+    assert max_sustainable_rate(steps) is None
+
+
+def test_ramp_reuses_threads_across_steps():
+    """Test that per-thread target state is built once for the whole ramp."""
+    local = threading.local()
+    created = []
+
+    def target(query):
+        if not hasattr(local, "agent"):
+            local.agent = object()
+            created.append(threading.get_ident())
+        time.sleep(0.01)
+        return True
+
+    ramp(target, ["q"], rates=[50, 50, 50], duration=0.2, slo_p99=1.0, concurrency=2)
+
+    assert len(created) <= 2
+
+
+def test_http_target_uses_a_session_per_request():
+    """Test that HttpTarget posts to a fresh session and deletes it afterwards."""
+    import http.server
+
+    requests = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def _reply(self, status):
+            requests.append((self.command, self.path))
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            self.send_response(status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def do_POST(self):
+            self._reply(200)
+
+        def do_DELETE(self):
+            self._reply(204)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        target = HttpTarget(f"http://127.0.0.1:{server.server_port}/")
+        assert target("hello") and target("again")
+    finally:
+        server.shutdown()
+
+    (post, post_path), (delete, delete_path) = requests[:2]
+    assert post == "POST" and post_path.startswith("/sessions/") and post_path.endswith("/messages")
+    assert delete == "DELETE" and post_path == delete_path + "/messages"
+    assert requests[2][1] != post_path
@@ -0,0 +1,35 @@
+"""Tests for the long-session benchmark."""
+import pytest
+
+from agents.no_framework.agent import NoFrameworkAgent
+from common.offline_llm import OFFLINE_MODEL
+from evaluation.long_session import run_session
+
+
+def test_run_session_reports_per_turn_latency():
+    """Test that one session is timed turn by turn without reset."""
+    agent = NoFrameworkAgent(model=OFFLINE_MODEL)
+    report = run_session(agent, ["Can you calculate 345 * 892?", "What's the weather like in Boston?"], 8, window=3)
+
+    assert len(report["latencies"]) == 8
+    assert report["first_median"] > 0 and report["last_median"] > 0
+    # Each turn calls one tool; counts must not include earlier turns again
+    assert report["tool_calls_count"] == 8
+    assert len(agent.messages) > 16
+
+
+def test_run_session_on_langgraph_agent():
+    """Test that the LangGraph agent keeps the session on the graph side."""
+    pytest.importorskip("langgraph")
+    from agents.langgraph_functional.agent import LangGraphFunctionalAgent
+
+    agent = LangGraphFunctionalAgent(model=OFFLINE_MODEL)
+    report = run_session(agent, ["Can you calculate 345 * 892?", "Hello, how are you?"], 6, window=2)
+
+    assert len(report["latencies"]) == 6
+    assert report["tool_calls_count"] == 3
+    # Only unsent messages stay on the agent; the thread holds the history
+    assert agent.messages == []
+    history = agent.graph.get_state({"configurable": {"thread_id": agent.thread_id}}).values["messages"]
+    assert [m["role"] for m in history].count("user") == 6
+    assert history[0]["role"] == "system"
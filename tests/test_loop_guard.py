@@ -0,0 +1,95 @@
+"""Tests for loop detection and adaptive iteration caps in NoFrameworkAgent."""
+import json
+
+import litellm
+
+from agents.no_framework.agent import NoFrameworkAgent
+from common.loop_guard import IterationBudget, ToolCallTracker, STOP_HINT
+from common.schema import UserMessage
+
+
+class RepeatingLLM:
+    """LLM stand-in that keeps issuing the same tool call."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def complete(self, messages, tools=None, timeout=None):
+        self.calls += 1
+        message = {"role": "assistant", "content": None, "tool_calls": [{
+            "id": f"call_{self.calls}",
+            "type": "function",
+            "function": {"name": "calculate", "arguments": json.dumps({"expression": "6 * 7"})},
+        }]}
+        return litellm.ModelResponse(choices=[{"index": 0, "message": message}],
+                                     usage={"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2})
+
+
+def test_repeated_calls_reuse_results_and_stop():
+    """Test that a repeating model is hinted, then stopped with the results it has."""
+    agent = NoFrameworkAgent(model="offline")
+    agent.iteration_budget = IterationBudget()
+    agent.llm = RepeatingLLM()
+    agent.initialize()
+
+    response = agent.process(UserMessage(content="What is 6 * 7?"))
+
+    metrics = agent.get_metrics()
+    # 1 new call, 2 repeats trigger the hint, the 4th LLM call is cut off
+    assert agent.llm.calls == 4
+    assert agent.repeated_tool_calls == 2
+    assert {"role": "system", "content": STOP_HINT} in agent.messages
+    assert response.content.startswith("I stopped because I kept repeating the same tool calls.")
+    assert "42" in response.content
+    assert metrics.iterations_saved == 10 - 4
+
+
+def test_tracker_keys_on_canonical_arguments():
+    """Test that argument order does not hide a repeat."""
+    tracker = ToolCallTracker(hint_after=1)
+    tracker.record("search_knowledge_base", {"query": "x", "max_results": 2}, "result")
+
+    assert tracker.previous("search_knowledge_base", {"max_results": 2, "query": "x"}) == "result"
+    assert tracker.previous("search_knowledge_base", {"query": "y"}) is None
+    assert tracker.stop_hint_due
+
+
+def test_budget_adapts_to_query_class():
+    """Test that caps follow the iterations a class has needed."""
+    budget = IterationBudget(max_iterations=10, min_samples=3, slack=1)
+    for iterations in (2, 2, 3):
+        budget.observe("get_weather", iterations)
+    budget.observe("calculate", 2)
+
+    assert budget.cap_for("get_weather") == 4
+    assert budget.cap_for("calculate") == 10
+    assert budget.cap_for(None) == 10
+
+
+def test_offline_turns_train_the_budget():
+    """Test that completed turns are observed under their query class."""
+    agent = NoFrameworkAgent(model="offline")
+    agent.iteration_budget = IterationBudget(min_samples=1)
+    agent.initialize()
+
+    agent.process(UserMessage(content="Can you calculate 2 + 2?"))
+
+    assert agent.iteration_budget.caps() == {"calculate": 3}
+
+
+def test_truncated_turns_let_the_cap_grow_back():
+    """Test that turns cut off by a learned cap are counted and raise the cap."""
+    agent = NoFrameworkAgent(model="offline")
+    agent.iteration_budget = IterationBudget(min_samples=1, slack=1)
+    agent.iteration_budget.observe("calculate", 2)
+    agent.llm = RepeatingLLM()
+    agent.initialize()
+
+    response = agent.process(UserMessage(content="What is 6 * 7?"))
+
+    metrics = agent.get_metrics()
+    assert response.content.startswith("I reached the step limit for this request before finishing.")
+    assert agent.llm.calls == 3
+    assert metrics.iteration_cap_truncations == 1
+    assert metrics.iterations_saved == 0
+    assert agent.iteration_budget.cap_for("calculate") == 5
@@ -0,0 +1,43 @@
+"""Tests for the tracemalloc-based memory tracker."""
+from evaluation.memory import MemoryTracker, format_summary
+
+MIB = 1024 * 1024
+
+
+def test_peak_and_retained_memory():
+    """Test that a temporary allocation counts towards peak only and a kept one towards both."""
+    tracker = MemoryTracker(track_sites=False)
+    kept = []
+    try:
+        with tracker.measure("A") as temporary:
+            scratch = bytearray(8 * MIB)
+            del scratch
+        with tracker.measure("A") as retained:
+            kept.append(bytearray(2 * MIB))
+    finally:
+        tracker.stop()
+
+    assert 8 * MIB <= temporary["peak_bytes"] < 9 * MIB
+    assert temporary["retained_bytes"] < MIB
+    assert 2 * MIB <= retained["peak_bytes"] < 3 * MIB
+    assert 2 * MIB <= retained["retained_bytes"] < 3 * MIB
+
+    summary = tracker.summary("A")
+    assert summary["max_peak_bytes"] == temporary["peak_bytes"]
+    assert "A memory:" in format_summary("A", summary)
+    assert tracker.summary("B") == {}
+
+
+def test_stop_leaves_foreign_tracing_running():
+    """Test that the tracker only stops tracing it started itself."""
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        tracker = MemoryTracker(track_sites=False)
+        with tracker.measure("A"):
+            pass
+        tracker.stop()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
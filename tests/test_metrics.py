@@ -0,0 +1,79 @@
+"""Tests for the live metrics registry."""
+import urllib.request
+
+import pytest
+
+from agents.no_framework.agent import NoFrameworkAgent
+from agents.router import FastPathRouterAgent
+from common import metrics
+from common.offline_llm import OFFLINE_MODEL
+from common.schema import UserMessage
+from common.tools import execute_tool
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Test the Prometheus text format of a labelled histogram."""
+    registry = metrics.MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency", ("tool",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 2.0):
+        histogram.observe(value, tool="calc")
+
+    text = registry.render()
+    assert '# TYPE latency_seconds histogram' in text
+    assert 'latency_seconds_bucket{tool="calc",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{tool="calc",le="1"} 2' in text
+    assert 'latency_seconds_bucket{tool="calc",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{tool="calc"} 3' in text
+
+    with pytest.raises(ValueError):
+        registry.counter("latency_seconds", "Clash")
+    with pytest.raises(ValueError):
+        histogram.observe(1.0)
+
+
+def test_agents_llm_and_tools_feed_the_registry():
+    """Test that one offline turn records agent, LLM and tool metrics once."""
+    before = metrics.AGENT_REQUESTS.value(framework="no_framework", model=OFFLINE_MODEL, status="ok")
+    llm_before = metrics.LLM_REQUESTS.value(model=OFFLINE_MODEL, status="ok")
+    tool_before = metrics.TOOL_CALLS.value(tool="calculate", status="ok")
+
+    agent = FastPathRouterAgent(NoFrameworkAgent(model=OFFLINE_MODEL))
+    agent.initialize()
+    agent.process(UserMessage(content="Search for information about artificial intelligence"))
+
+    # Counted once for the wrapped agent, not again for the wrapper
+    assert metrics.AGENT_REQUESTS.value(framework="no_framework", model=OFFLINE_MODEL, status="ok") == before + 1
+    assert metrics.LLM_REQUESTS.value(model=OFFLINE_MODEL, status="ok") > llm_before
+    assert metrics.AGENT_IN_FLIGHT.value(framework="no_framework") == 0
+
+    execute_tool("calculate", {"expression": "2 + 2"})
+    assert metrics.TOOL_CALLS.value(tool="calculate", status="ok") == tool_before + 1
+
+
+def test_success_rate_counts_failed_requests():
+    """Test that success_rate is the share of requests without error."""
+    agent = NoFrameworkAgent(model=OFFLINE_MODEL)
+    agent.initialize()
+    agent.process(UserMessage(content="Hello"))
+    agent.error_count = 1
+    agent.request_count = 4
+
+    assert agent.get_metrics().success_rate == pytest.approx(0.75)
+
+
+def test_serve_and_dump_metrics(tmp_path):
+    """Test the HTTP endpoint and the file dump."""
+    registry = metrics.MetricsRegistry()
+    registry.counter("jobs_total", "Jobs", ("kind",)).inc(kind="a")
+
+    server = metrics.serve_metrics(0, registry=registry)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        body = urllib.request.urlopen(url, timeout=5).read().decode()
+    finally:
+        server.shutdown()
+    assert 'jobs_total{kind="a"} 1' in body
+
+    path = tmp_path / "agents.prom"
+    metrics.dump_metrics(str(path), registry)
+    assert path.read_text() == registry.render()
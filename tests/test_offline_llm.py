@@ -0,0 +1,18 @@
+"""Tests for the offline LLM stand-in."""
+from common.offline_llm import plan_tool_calls
+
+TOOLS = ["get_weather", "calculate", "search_knowledge_base"]
+
+
+def test_offline_planner_tool_choice():
+    """Test the offline LLM's keyword rules for choosing tools."""
+    weather = plan_tool_calls("What's the weather like in Boston?", TOOLS)
+    percent = plan_tool_calls("What's 25% of 840?", TOOLS)
+    capital = plan_tool_calls("Can you tell me about the capital of France and what the weather is like there?", TOOLS)
+
+    assert weather == [{"name": "get_weather", "arguments": {"location": "Boston"}}]
+    assert percent == [{"name": "calculate", "arguments": {"expression": "25 / 100 * 840"}}]
+    assert [c["name"] for c in capital] == ["get_weather", "search_knowledge_base"]
+    assert capital[0]["arguments"] == {"location": "Paris"}
+    assert plan_tool_calls("What's the weather like in Boston?", ["calculate"]) == []
+    assert plan_tool_calls("Hello!", TOOLS) == []
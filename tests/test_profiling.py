@@ -0,0 +1,36 @@
+"""Tests for the per-framework profiler."""
+import os
+import time
+
+import pytest
+
+from agents.no_framework.agent import NoFrameworkAgent
+from common.offline_llm import OFFLINE_MODEL
+from common.schema import UserMessage
+from evaluation.profiling import Profiler, PROFILE_MODES
+
+
+@pytest.mark.parametrize("mode", PROFILE_MODES)
+def test_profiler_modes_write_profiles(mode, tmp_path):
+    """Test that each mode reports our code and writes collapsed stacks."""
+    profiler = Profiler(mode, output_dir=str(tmp_path), interval=0.0005)
+    agent = NoFrameworkAgent(model=OFFLINE_MODEL)
+    agent.initialize()
+
+    with profiler.profile("No Framework", 0):
+        # Run long enough for the sampler to catch the agent thread
+        end = time.perf_counter() + 0.3
+        while time.perf_counter() < end:
+            agent.reset()
+            agent.process(UserMessage(content="What's the weather like in Boston?"))
+    paths = profiler.save()
+
+    assert "No Framework" in profiler.report()
+    assert any(row["own"] for row in profiler.hot_functions("No Framework"))
+    collapsed = os.path.join(str(tmp_path), "no_framework.collapsed")
+    assert collapsed in paths
+    with open(collapsed) as f:
+        stack, weight = f.readline().rsplit(" ", 1)
+    assert int(weight) > 0 and stack
+    if mode == "deterministic":
+        assert os.path.join(str(tmp_path), "no_framework.prof") in paths
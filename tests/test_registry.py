@@ -0,0 +1,88 @@
+"""Tests for the lazily loaded plugin registries."""
+import json
+import sys
+import time
+
+import pytest
+
+from common import tools
+from common.registry import AGENTS, LazyRegistry, load_plugins
+from common.tools import TOOLS, execute_tool, tool_definitions
+
+
+def test_plugin_tool_is_imported_on_first_call(tmp_path, monkeypatch):
+    """Test that schemas come from metadata and the module loads on invocation."""
+    (tmp_path / "lab_plugin_tools.py").write_text("def shout(text):\n    return text.upper()\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    TOOLS.register("shout", "lab_plugin_tools:shout", description="Upper-case text",
+                   parameters={"type": "object", "properties": {"text": {"type": "string"}}})
+    try:
+        definition = tool_definitions(["shout"])[0]
+        assert definition["function"]["description"] == "Upper-case text"
+        assert "lab_plugin_tools" not in sys.modules
+
+        assert execute_tool("shout", {"text": "hi"}) == {"error": None, "result": "HI"}
+        assert TOOLS.is_loaded("shout")
+    finally:
+        del TOOLS["shout"]
+        sys.modules.pop("lab_plugin_tools", None)
+
+
+def test_large_manifest_starts_without_imports(tmp_path, monkeypatch):
+    """Test that 500 manifest tools and 9 frameworks are listed without importing them."""
+    manifest = {
+        "tools": [{"name": f"tool_{i}", "target": f"missing_plugin_{i}:run", "description": f"Tool {i}",
+                   "parameters": {"type": "object", "properties": {}}} for i in range(500)],
+        "agents": [{"name": f"Framework {i}", "target": f"missing_framework_{i}:Agent",
+                    "aliases": [f"framework_{i}"]} for i in range(9)],
+    }
+    path = tmp_path / "plugins.json"
+    path.write_text(json.dumps(manifest))
+    monkeypatch.setenv("AGENT_PLUGIN_MANIFEST", str(path))
+
+    registry = LazyRegistry("tools", discover=load_plugins)
+    agents = LazyRegistry("agents", discover=load_plugins)
+    start_time = time.perf_counter()
+    assert len(registry) == 500
+    assert len(agents) == 9 and "framework_3" in agents
+    assert registry.metadata("tool_42")["description"] == "Tool 42"
+    assert time.perf_counter() - start_time < 1.0
+    assert not any(m.startswith("missing_") for m in sys.modules)
+
+    with pytest.raises(ModuleNotFoundError):
+        registry["tool_7"]
+
+
+def test_builtin_agents_resolve_by_alias():
+    """Test display names and short aliases of the built-in frameworks."""
+    assert list(AGENTS)[:2] == ["No Framework", "LangGraph (Functional)"]
+    assert AGENTS["no_framework"] is AGENTS["No Framework"]
+    assert AGENTS.metadata("langgraph_functional")["extras"] == "langgraph"
+    assert "unknown_framework" not in AGENTS
+
+
+def test_patching_a_tool_keeps_its_schema(monkeypatch):
+    """Test that replacing an implementation keeps the registered metadata."""
+    monkeypatch.setitem(tools.TOOLS, "calculate", lambda expression: {"result": 0})
+    assert TOOLS.metadata("calculate")["description"] == "Evaluate a mathematical expression"
+
+
+def test_lookups_wait_for_discovery_to_finish():
+    """Test that a thread does not see the registry while another is still discovering."""
+    import threading
+
+    def discover(registry):
+        registry.register("first", "json:dumps")
+        time.sleep(0.1)
+        registry.register("second", "json:loads")
+
+    registry = LazyRegistry("things", discover=discover)
+    seen = []
+    worker = threading.Thread(target=lambda: seen.append(list(registry)))
+    worker.start()
+    time.sleep(0.02)
+    names = list(registry)
+    worker.join()
+
+    assert names == ["first", "second"]
+    assert seen == [["first", "second"]]
@@ -0,0 +1,77 @@
+"""Tests for shaping tool results before they enter the prompt."""
+import json
+
+from common.result_shaping import ResultShaper, ShapePolicy, estimate_tokens, project
+
+
+def test_projection_keeps_declared_fields():
+    """Test field projection of dict and list results."""
+    hits = [{"title": "a", "content": "x", "relevance": 0.9}]
+
+    assert project(hits, ["title", "content"]) == [{"title": "a", "content": "x"}]
+    assert project({"result": 4, "expression": "2+2"}, ["result"]) == {"result": 4}
+    assert project("text", ["title"]) == "text"
+
+
+def test_oversized_results_go_out_of_band():
+    """Test truncation to the token budget and expansion by ref."""
+    shaper = ResultShaper()
+    docs = [{"title": f"doc {i}", "content": "word " * 200} for i in range(10)]
+
+    content = shaper.shape("call_1", {"error": None, "result": docs}, ShapePolicy(max_tokens=300))
+    shaped = json.loads(content)
+
+    assert estimate_tokens(content) < 400
+    assert shaped["truncated"] is True
+    assert shaped["omitted"] == len(docs) - len(shaped["result"])
+    assert shaper.expand(shaped["ref"]) == {"error": None, "result": docs}
+    assert shaper.expand("r99")["error"] == "Unknown or expired ref: r99"
+    assert shaper.tokens_saved > 0
+
+
+def test_malformed_expand_calls_return_errors():
+    """Test that bad expand_result arguments give a tool error instead of raising."""
+    shaper = ResultShaper()
+    docs = [{"title": f"doc {i}", "content": "word " * 200} for i in range(10)]
+    ref = json.loads(shaper.shape("call_1", {"error": None, "result": docs}, ShapePolicy(max_tokens=300)))["ref"]
+
+    assert shaper.expand_call({"ref": ref}) == {"error": None, "result": docs}
+    for arguments in ({}, {"id": ref}, {"ref": ref, "full": True}, {"ref": 3}, [ref]):
+        outcome = shaper.expand_call(arguments)
+        assert outcome["result"] is None and "ref" in outcome["error"]
+
+
+def test_repeated_content_is_deduplicated():
+    """Test that repeated results and list items reference earlier tool messages."""
+    shaper = ResultShaper()
+    first = [{"title": "a"}, {"title": "b"}]
+
+    shaper.shape("call_1", {"error": None, "result": first})
+    repeat = json.loads(shaper.shape("call_2", {"error": None, "result": first}))
+    overlap = json.loads(shaper.shape("call_3", {"error": None, "result": [{"title": "b"}, {"title": "c"}]}))
+
+    assert repeat == {"error": None, "result": None, "duplicate_of": "call_1"}
+    assert overlap == {"error": None, "result": [{"title": "c"}], "duplicates_omitted": 1}
+
+    shaper.reset()
+    assert json.loads(shaper.shape("call_4", {"error": None, "result": first}))["result"] == first
+
+
+def test_items_cut_by_truncation_are_not_duplicates():
+    """Test that an item first returned past the truncation point is sent in full later."""
+    shaper = ResultShaper()
+    docs = [{"title": f"doc {i}", "content": "word " * 200} for i in range(10)]
+
+    first = json.loads(shaper.shape("call_1", {"error": None, "result": docs}, ShapePolicy(max_tokens=300)))
+    later = json.loads(shaper.shape("call_2", {"error": None, "result": [docs[0], docs[7]]}))
+
+    assert first["result"] == docs[:1] and first["omitted"] == 9
+    assert later == {"error": None, "result": [docs[7]], "duplicates_omitted": 1}
+
+
+def test_errors_pass_through():
+    """Test that failed tool results are not shaped."""
+    shaper = ResultShaper()
+    failed = {"error": "Tool not found: nope", "result": None}
+
+    assert json.loads(shaper.shape("call_1", failed)) == failed
@@ -0,0 +1,41 @@
+"""Tests for the streaming evaluation results writer."""
+import pytest
+
+from evaluation.results_writer import ResultsWriter, read_columns, iter_rows
+
+FIELDS = [("framework", "string"), ("execution_time", "float"), ("error_count", "int")]
+
+
+def test_rows_are_flushed_before_close(tmp_path):
+    """Test that JSONL rows are on disk after a periodic flush."""
+    writer = ResultsWriter(str(tmp_path), FIELDS, flush_every=2, columnar=False)
+    writer.write({"framework": "a", "execution_time": 1.0, "error_count": 0})
+    writer.write({"framework": "b", "execution_time": 2.0})
+
+    rows = list(iter_rows(writer.jsonl_path))
+    assert rows == [
+        {"framework": "a", "execution_time": 1.0, "error_count": 0},
+        {"framework": "b", "execution_time": 2.0, "error_count": None},
+    ]
+    writer.close()
+
+
+def test_truncated_last_line_is_skipped(tmp_path):
+    """Test that a partially written row from a crash is ignored."""
+    with ResultsWriter(str(tmp_path), FIELDS, columnar=False) as writer:
+        writer.write({"framework": "a", "execution_time": 1.0, "error_count": 0})
+    with open(writer.jsonl_path, "a") as f:
+        f.write('{"framework": "b", "exec')
+
+    assert read_columns(writer.jsonl_path, ["framework"]) == {"framework": ["a"]}
+
+
+def test_parquet_columns_match_jsonl(tmp_path):
+    """Test that the columnar copy holds the same data as the JSONL file."""
+    pytest.importorskip("pyarrow")
+    with ResultsWriter(str(tmp_path), FIELDS, flush_every=1) as writer:
+        for i in range(3):
+            writer.write({"framework": "a", "execution_time": float(i), "error_count": i})
+
+    columns = ["framework", "execution_time"]
+    assert read_columns(writer.parquet_path, columns) == read_columns(writer.jsonl_path, columns)
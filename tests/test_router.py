@@ -0,0 +1,83 @@
+"""Tests for the deterministic fast-path router."""
+from agents.no_framework.agent import NoFrameworkAgent
+from agents.router import FastPathRouterAgent, match_route
+from common.offline_llm import OFFLINE_MODEL
+from common.schema import UserMessage, ToolCall
+from evaluation.router_eval import evaluate_router, same_call
+from evaluation.workload import WorkloadItem
+
+TEST_QUERIES = [
+    "What's the weather like in Boston?",
+    "Can you calculate 345 * 892?",
+    "Search for information about artificial intelligence",
+    "What's 25% of 840?",
+    "Can you tell me about the capital of France and what the weather is like there right now?",
+]
+
+
+def test_only_unambiguous_queries_match():
+    """Test that routes match whole messages only."""
+    assert match_route("Can you calculate 345 * 892?")[0].tool_input == {"expression": "345 * 892"}
+    assert match_route("What's 25% of 840?")[0].tool_input == {"expression": "25 / 100 * 840"}
+    assert match_route("weather in New York today")[0].tool_input == {"location": "New York"}
+
+    assert match_route("Can you calculate 345 * 892 and the weather in Boston?") is None
+    assert match_route("What's the weather in Boston and Paris?") is None
+    assert match_route("What is 42?") is None
+    assert match_route("What is the weather in Boston tomorrow?") is None
+    assert match_route("What is the weather in Boston in Celsius?") is None
+    assert match_route(TEST_QUERIES[4]) is None
+
+
+def test_routed_answers_skip_the_agent():
+    """Test templated answers, fallback and history of the wrapped agent."""
+    agent = FastPathRouterAgent(NoFrameworkAgent(model=OFFLINE_MODEL))
+    agent.initialize()
+
+    routed = agent.process(UserMessage(content="Can you calculate 345 * 892?"))
+    fallback = agent.process(UserMessage(content="Search for information about black holes"))
+
+    assert routed.content == "345 * 892 = 307740"
+    assert [c.tool_name for c in fallback.tool_calls] == ["search_knowledge_base"]
+    assert agent.get_metrics().tool_calls_count == 1
+    assert agent.agent.messages[2] == {"role": "assistant", "content": routed.content}
+    assert agent.stats()["routed"] == 1 and agent.stats()["fallbacks"] == 1
+
+
+def test_routed_answers_are_counted():
+    """Test that fast-path answers are recorded under the wrapped agent's labels."""
+    from common import metrics
+
+    agent = FastPathRouterAgent(NoFrameworkAgent(model=OFFLINE_MODEL))
+    agent.initialize()
+    labels = {"framework": "no_framework", "model": OFFLINE_MODEL}
+    before = metrics.AGENT_REQUESTS.value(status="fast_path", **labels)
+    ok_before = metrics.AGENT_REQUESTS.value(status="ok", **labels)
+
+    agent.process(UserMessage(content="Can you calculate 345 * 892?"))
+    agent.process(UserMessage(content="Search for information about black holes"))
+
+    assert metrics.AGENT_REQUESTS.value(status="fast_path", **labels) == before + 1
+    assert metrics.AGENT_REQUESTS.value(status="ok", **labels) == ok_before + 1
+
+
+def test_precision_on_compare_all_queries():
+    """Test the router evaluation on the compare_all queries."""
+    items = [WorkloadItem(query=q) for q in TEST_QUERIES]
+
+    report = evaluate_router(items, lambda: NoFrameworkAgent(model=OFFLINE_MODEL))
+
+    assert report["routed"] == 3
+    assert report["precision"] == 1.0
+    assert [r["routed"] for r in report["rows"]] == [True, True, False, True, False]
+
+
+def test_wrong_arguments_are_not_correct():
+    """Test that a routed call counts as correct only with the reference's arguments."""
+    routed = ToolCall(tool_name="get_weather", tool_input={"location": "Boston tomorrow"})
+
+    assert not same_call(routed, ToolCall(tool_name="get_weather", tool_input={"location": "Boston"}))
+    assert same_call(ToolCall(tool_name="get_weather", tool_input={"location": "new  york"}),
+                     ToolCall(tool_name="get_weather", tool_input={"location": "New York"}))
+    assert same_call(ToolCall(tool_name="calculate", tool_input={"expression": "25 / 100 * 840"}),
+                     ToolCall(tool_name="calculate", tool_input={"expression": "0.25 * 840"}))
@@ -0,0 +1,199 @@
+"""Tests for fair-share scheduling across tenants."""
+import asyncio
+import json
+
+import pytest
+
+from agents.no_framework.agent import NoFrameworkAgent
+from common import metrics
+from common import scheduler as scheduling
+from common.deadline import Deadline, DeadlineExceeded
+from common.llm import LLMClient
+from common.offline_llm import OFFLINE_MODEL
+from common.scheduler import FairScheduler, TenantPolicy, AdmissionRejected
+from common.schema import UserMessage
+from tests.test_serving import _request, _service
+
+
+def _run_jobs(scheduler, jobs, now):
+    """Queue jobs behind a held slot, then run them one second each; return the grant order."""
+    order = []
+
+    async def job(tenant, priority):
+        ticket = await scheduler.acquire_async(tenant, priority)
+        order.append(tenant if priority == "interactive" else f"{tenant}:batch")
+        now[0] += 1.0
+        ticket.release()
+
+    async def run():
+        holder = await scheduler.acquire_async("holder")
+        tasks = [asyncio.create_task(job(tenant, priority)) for tenant, priority in jobs]
+        await asyncio.sleep(0)
+        now[0] += 1.0
+        holder.release()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    return order
+
+
+def test_light_tenant_is_not_starved_by_a_burst():
+    """Test that a burst of one tenant interleaves with another tenant's requests."""
+    now = [0.0]
+    scheduler = FairScheduler(1, name="test", clock=lambda: now[0])
+
+    order = _run_jobs(scheduler, [("a", "interactive")] * 4 + [("b", "interactive")] * 2, now)
+
+    assert order == ["a", "b", "a", "b", "a", "a"]
+    assert scheduler.stats()["b"]["mean_queue_time"] < scheduler.stats()["a"]["mean_queue_time"]
+
+
+def test_weights_and_priorities():
+    """Test weighted shares and that interactive work goes before batch work."""
+    now = [0.0]
+    scheduler = FairScheduler(1, name="test", policies={"a": TenantPolicy(weight=3.0)},
+                              clock=lambda: now[0])
+
+    order = _run_jobs(scheduler, [("c", "batch")] + [("a", "interactive")] * 6 + [("b", "interactive")] * 2, now)
+
+    assert order[-1] == "c:batch"
+    assert order[:4].count("a") == 3
+    assert order.index("b") < 4
+
+
+def test_concurrency_cap_and_admission_control():
+    """Test per-tenant caps, queue limits and deadline-based rejection."""
+    scheduler = FairScheduler(3, name="test", default_policy=TenantPolicy(max_concurrency=1, max_queued=1))
+
+    first = scheduler.acquire("a")
+    other = scheduler.acquire("b")
+
+    async def queued_behind_cap():
+        waiter = asyncio.create_task(scheduler.acquire_async("a"))
+        await asyncio.sleep(0)
+        assert scheduler.stats()["a"]["queued"] == 1
+        with pytest.raises(AdmissionRejected) as rejected:
+            scheduler.acquire("a")
+        first.release()
+        return await waiter, rejected.value
+
+    second, rejected = asyncio.run(queued_behind_cap())
+    assert rejected.reason == "tenant_queue_full"
+    assert second.granted and scheduler.in_use == 2
+
+    scheduler.acquire("c")
+    with pytest.raises(AdmissionRejected) as rejected:
+        scheduler.acquire("d", deadline=Deadline(0.001))
+    assert rejected.value.reason == "deadline"
+
+    with pytest.raises(DeadlineExceeded):
+        scheduler.acquire("d", deadline=Deadline(0.5))
+    assert scheduler.stats()["d"] == {"queued": 0, "running": 0, "admitted": 0, "rejected": 2,
+                                      "mean_queue_time": 0.0, "service_time": 0.0}
+    other.release()
+
+
+def test_deadline_admission_follows_the_fair_position():
+    """Test that a light tenant behind another tenant's backlog is not rejected."""
+    now = [0.0]
+    scheduler = FairScheduler(1, name="test", clock=lambda: now[0])
+    holder = scheduler.acquire("heavy")
+
+    async def run():
+        backlog = [asyncio.create_task(scheduler.acquire_async("heavy")) for _ in range(10)]
+        await asyncio.sleep(0)
+        light = asyncio.create_task(scheduler.acquire_async("light", deadline=Deadline(5.0)))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await scheduler.acquire_async("heavy", deadline=Deadline(5.0))
+        now[0] += 1.0
+        holder.release()
+        ticket = await light
+        for task in backlog:
+            task.cancel()
+        return ticket, rejected.value
+
+    ticket, rejected = asyncio.run(run())
+
+    assert ticket.granted
+    assert rejected.reason == "deadline"
+
+
+def test_llm_calls_take_slots_of_the_current_tenant(monkeypatch):
+    """Test that LLMClient.complete is scheduled on behalf of the tenant context."""
+    llm_scheduler = FairScheduler(1, name="llm-test")
+    monkeypatch.setattr(scheduling, "LLM_SCHEDULER", llm_scheduler)
+
+    with scheduling.tenant_context("acme", "batch"):
+        response = LLMClient(model=OFFLINE_MODEL).complete([{"role": "user", "content": "hello"}])
+
+    assert response.choices[0].message.content
+    assert llm_scheduler.stats()["acme"]["admitted"] == 1
+    assert llm_scheduler.in_use == 0
+
+
+def test_llm_rejections_reach_the_caller(monkeypatch):
+    """Test that a shed LLM call raises instead of returning an LLM error response."""
+    llm_scheduler = FairScheduler(1, name="llm-shed", default_policy=TenantPolicy(max_queued=0))
+    monkeypatch.setattr(scheduling, "LLM_SCHEDULER", llm_scheduler)
+    holder = llm_scheduler.acquire("acme")
+    before = metrics.LLM_REQUESTS.value(model=OFFLINE_MODEL, status="rejected")
+    agent = NoFrameworkAgent(model=OFFLINE_MODEL)
+    agent.initialize()
+
+    with scheduling.tenant_context("acme"):
+        with pytest.raises(AdmissionRejected):
+            agent.process(UserMessage(content="hello"))
+    holder.release()
+
+    assert metrics.LLM_REQUESTS.value(model=OFFLINE_MODEL, status="rejected") == before + 1
+    assert agent.error_count == 0
+
+
+def test_service_sheds_tenant_over_its_queue_limit():
+    """Test 429 for a tenant over its limit while other tenants are served."""
+    scheduler = FairScheduler(1, name="serving-test", default_policy=TenantPolicy(max_queued=0))
+    service = _service(scheduler=scheduler)
+    holder = scheduler.acquire("acme")
+
+    async def run():
+        shed = await _request(service, "POST", "/messages", {"content": "hi"},
+                              headers=[(b"x-tenant-id", b"acme")])
+        holder.release()
+        served = await _request(service, "POST", "/messages", {"content": "hi"},
+                                headers=[(b"x-tenant-id", b"other")])
+        bad = await _request(service, "POST", "/messages", {"content": "hi"},
+                             headers=[(b"x-priority", b"urgent")])
+        return shed, served, bad
+
+    shed, served, bad = asyncio.run(run())
+
+    assert shed[0] == 429 and b"retry-after" in shed[1]
+    assert json.loads(shed[2])["reason"] == "tenant_queue_full"
+    assert served[0] == 200
+    assert bad[0] == 400
+    assert scheduler.stats()["other"]["admitted"] == 1
+    service.close()
+
+
+def test_queued_burst_does_not_shed_other_tenants():
+    """Test that requests waiting in the fair queue do not count against max_pending."""
+    scheduler = FairScheduler(1, name="serving-burst")
+    service = _service(scheduler=scheduler, max_pending=1)
+    holder = scheduler.acquire("acme")
+
+    async def run():
+        burst = [asyncio.create_task(_request(service, "POST", "/messages", {"content": "hi"},
+                                              headers=[(b"x-tenant-id", b"acme")])) for _ in range(3)]
+        other = asyncio.create_task(_request(service, "POST", "/messages", {"content": "hi"},
+                                             headers=[(b"x-tenant-id", b"other")]))
+        await asyncio.sleep(0.05)
+        holder.release()
+        return await asyncio.gather(*burst), await other
+
+    burst, other = asyncio.run(run())
+
+    assert [status for status, _, _ in burst] == [200, 200, 200]
+    assert other[0] == 200
+    assert service.rejected == 0
+    service.close()
@@ -0,0 +1,112 @@
+"""Tests for the semantic near-duplicate answer cache."""
+import time
+
+from agents.no_framework.agent import NoFrameworkAgent
+from agents.semantic_cache import SemanticAnswerCache, SemanticCacheAgent
+from common.embedding import embed
+from common.offline_llm import OFFLINE_MODEL
+from common.schema import UserMessage, AgentResponse, ToolCall
+
+
+def _session(cache):
+    agent = SemanticCacheAgent(NoFrameworkAgent(model=OFFLINE_MODEL), cache)
+    agent.initialize()
+    return agent
+
+
+def test_paraphrases_embed_alike():
+    """Test that reworded queries are near neighbours and different cities are not."""
+    boston = embed("weather in Boston?")
+
+    assert float(boston @ embed("what's Boston's weather like")) > 0.99
+    assert float(boston @ embed("weather in Austin?")) < 0.9
+
+
+def test_paraphrase_is_served_from_cache():
+    """Test that a paraphrased first message skips the agent."""
+    cache = SemanticAnswerCache()
+    first = _session(cache).process(UserMessage(content="What's the weather like in Boston?"))
+
+    second_session = _session(cache)
+    second = second_session.process(UserMessage(content="weather in Boston please"))
+
+    assert second == first
+    assert second_session.agent.get_metrics().tool_calls_count == 0
+    assert second_session.agent.messages[-1] == {"role": "assistant", "content": first.content}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert stats["latency_saved"] > 0
+
+
+def test_cache_hits_are_counted():
+    """Test that answers served from the cache are recorded as cache hits."""
+    from common import metrics
+
+    labels = {"framework": "no_framework", "model": OFFLINE_MODEL}
+    cache = SemanticAnswerCache()
+    _session(cache).process(UserMessage(content="What's the weather like in Paris?"))
+    before = metrics.AGENT_REQUESTS.value(status="cache_hit", **labels)
+
+    _session(cache).process(UserMessage(content="weather in Paris please"))
+
+    assert metrics.AGENT_REQUESTS.value(status="cache_hit", **labels) == before + 1
+
+
+def test_numbers_must_match():
+    """Test that queries differing only in numbers are not conflated."""
+    cache = SemanticAnswerCache()
+    _session(cache).process(UserMessage(content="Can you calculate 2 * 3?"))
+
+    response = _session(cache).process(UserMessage(content="Can you calculate 2 * 4?"))
+
+    assert "8" in response.content
+    assert cache.stats()["hits"] == 0
+
+
+def test_operators_must_match():
+    """Test that queries differing only in an operator are not conflated."""
+    cache = SemanticAnswerCache()
+    _session(cache).process(UserMessage(content="calculate 2*3"))
+
+    response = _session(cache).process(UserMessage(content="calculate 2+3"))
+
+    assert "5" in response.content
+    assert cache.stats()["hits"] == 0
+
+
+def test_later_turns_bypass_cache():
+    """Test that only the first message of a session is looked up."""
+    cache = SemanticAnswerCache()
+    session = _session(cache)
+    session.process(UserMessage(content="Search for information about black holes"))
+    session.process(UserMessage(content="Search for information about black holes"))
+
+    assert cache.stats()["hits"] == 0
+    assert session.agent.get_metrics().tool_calls_count == 2
+
+
+def test_freshness_follows_tools():
+    """Test per-tool expiry of cached answers."""
+    cache = SemanticAnswerCache(tool_ttls={"get_weather": 0.01})
+    weather = AgentResponse(content="Sunny", tool_calls=[ToolCall(tool_name="get_weather", tool_input={})])
+    math = AgentResponse(content="6", tool_calls=[ToolCall(tool_name="calculate", tool_input={})])
+
+    assert cache.ttl_for(math) is None
+    assert cache.ttl_for(AgentResponse(content="?", tool_calls=[ToolCall(tool_name="unknown", tool_input={})])) == 0
+
+    cache.store("weather in Boston", weather, 1.0)
+    assert cache.lookup("Boston weather") is not None
+    time.sleep(0.02)
+    assert cache.lookup("Boston weather") is None
+
+
+def test_index_grows_geometrically():
+    """Test that inserts reuse preallocated rows and lookups ignore the unused ones."""
+    cache = SemanticAnswerCache(max_entries=40)
+    for i in range(40):
+        assert cache.store(f"tell me about topic{chr(97 + i % 26)}{i}", AgentResponse(content=str(i)), 0.1)
+
+    assert len(cache._vectors) == 40
+    assert cache.stats()["entries"] == 40
+    assert cache.lookup("tell me about topicc2")["response"].content == "2"
+    assert cache.lookup("tell me about topicz99") is None
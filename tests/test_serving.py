@@ -0,0 +1,129 @@
+"""Tests for the ASGI agent service against the offline LLM stand-in."""
+import asyncio
+import json
+
+from agents.no_framework.agent import NoFrameworkAgent
+from common.offline_llm import OFFLINE_MODEL
+from serving.app import AgentService
+
+
+async def _request(app, method, path, body=None, headers=None, query_string=b""):
+    messages = []
+    payload = json.dumps(body).encode() if body is not None else b""
+
+    async def receive():
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": method, "path": path,
+             "headers": headers or [], "query_string": query_string}
+    await app(scope, receive, send)
+    status = messages[0]["status"]
+    response_body = b"".join(m.get("body", b"") for m in messages[1:])
+    return status, dict(messages[0]["headers"]), response_body
+
+
+def _service(**kwargs):
+    return AgentService(lambda: NoFrameworkAgent(model=OFFLINE_MODEL), **kwargs)
+
+
+def test_sessions_keep_their_own_state():
+    """Test that turns of one session share an agent and sessions are isolated."""
+    service = _service(workers=2)
+
+    async def run():
+        await _request(service, "POST", "/sessions/a/messages", {"content": "Can you calculate 2 * 3?"})
+        await _request(service, "POST", "/sessions/a/messages", {"content": "hello"})
+        return await _request(service, "POST", "/sessions/b/messages", {"content": "hello"})
+
+    status, _, body = asyncio.run(run())
+
+    assert status == 200
+    assert json.loads(body)["session_id"] == "b"
+    user_turns = [m for m in service.sessions["a"].agent.messages if isinstance(m, dict) and m["role"] == "user"]
+    assert len(user_turns) == 2
+    service.close()
+
+
+def test_sse_stream_emits_tool_calls_and_done():
+    """Test server-sent event streaming of a response."""
+    service = _service()
+
+    status, headers, body = asyncio.run(_request(
+        service, "POST", "/sessions/s/messages", {"content": "What's the weather like in Boston?"},
+        headers=[(b"accept", b"text/event-stream")]
+    ))
+
+    events = [block.split("\n")[0] for block in body.decode().strip().split("\n\n")]
+    assert status == 200
+    assert headers[b"content-type"] == b"text/event-stream"
+    assert events[0] == "event: session"
+    assert "event: tool_call" in events
+    assert events[-1] == "event: done"
+    service.close()
+
+
+def test_saturated_service_sheds_load():
+    """Test that requests beyond max_pending get 503 with Retry-After."""
+    service = _service(max_pending=0)
+
+    status, headers, _ = asyncio.run(_request(service, "POST", "/messages", {"content": "hi"}))
+
+    assert status == 503
+    assert headers[b"retry-after"] == b"1"
+    service.close()
+
+
+def test_bad_requests():
+    """Test error statuses for malformed bodies and unknown routes."""
+    service = _service()
+
+    assert asyncio.run(_request(service, "POST", "/messages", {"text": "hi"}))[0] == 400
+    assert asyncio.run(_request(service, "POST", "/messages", {"content": ["hi"]}))[0] == 400
+    assert asyncio.run(_request(service, "POST", "/messages", {"content": None}))[0] == 400
+    assert asyncio.run(_request(service, "GET", "/nope"))[0] == 404
+    assert asyncio.run(_request(service, "GET", "/messages"))[0] == 405
+    service.close()
+
+
+def test_metrics_route_exposes_prometheus_text():
+    """Test that /metrics renders the live registry."""
+    service = _service()
+
+    async def run():
+        await _request(service, "POST", "/sessions/m/messages", {"content": "hello"})
+        return await _request(service, "GET", "/metrics")
+
+    status, headers, body = asyncio.run(run())
+
+    assert status == 200
+    assert headers[b"content-type"].startswith(b"text/plain")
+    assert "serving_sessions 1" in body.decode()
+    assert 'agent_requests_total{framework="no_framework"' in body.decode()
+    service.close()
+
+
+def test_agents_are_built_on_the_session_worker():
+    """Test that a new session's agent is built on its worker, not on the event loop."""
+    import threading
+
+    built_on = []
+
+    def factory():
+        built_on.append(threading.current_thread().name)
+        return NoFrameworkAgent(model=OFFLINE_MODEL)
+
+    service = AgentService(factory, workers=2)
+
+    async def run():
+        first = _request(service, "POST", "/sessions/a/messages", {"content": "hello"})
+        second = _request(service, "POST", "/sessions/a/messages", {"content": "hello"})
+        return await asyncio.gather(first, second)
+
+    responses = asyncio.run(run())
+
+    assert [status for status, _, _ in responses] == [200, 200]
+    assert len(built_on) == 1 and built_on[0].startswith("agent-worker-")
+    service.close()
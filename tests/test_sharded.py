@@ -0,0 +1,61 @@
+"""Tests for sharded evaluation planning and shard claims."""
+import os
+import time
+
+from evaluation import sharded
+
+
+def test_shards_cover_every_unit_once(tmp_path):
+    """Test that shards partition frameworks x queries x trials."""
+    plan = sharded.create_plan(str(tmp_path), ["q1", "q2", "q3"], ["A", "B"], trials=3, shard_size=4)
+
+    units = [u for s in range(plan["shard_count"]) for u in sharded.shard_units(plan, s)]
+
+    assert plan["shard_count"] == 5
+    assert len(units) == len(set(units)) == 18
+    assert sharded.load_plan(str(tmp_path)) == plan
+
+
+def test_claims_are_exclusive_until_released(tmp_path):
+    """Test that only one worker can hold a shard claim."""
+    sharded.create_plan(str(tmp_path), ["q1"], ["A"])
+
+    assert sharded.claim_shard(str(tmp_path), 0)
+    assert not sharded.claim_shard(str(tmp_path), 0)
+    sharded.release_shard(str(tmp_path), 0)
+    assert sharded.claim_shard(str(tmp_path), 0)
+
+
+def test_stale_claims_are_taken_over(tmp_path):
+    """Test that an expired claim from a crashed worker can be reclaimed."""
+    sharded.create_plan(str(tmp_path), ["q1"], ["A"])
+
+    assert sharded.claim_shard(str(tmp_path), 0)
+    assert sharded.claim_shard(str(tmp_path), 0, lease=-1)
+
+
+def test_resumed_plans_reject_different_settings(tmp_path):
+    """Test that settings given for an existing plan are checked against it."""
+    plan = sharded.create_plan(str(tmp_path), ["q1"], ["A"], trials=3)
+
+    assert sharded.plan_conflicts(plan, {"trials": 3, "frameworks": ["A"]}) == []
+    assert sharded.plan_conflicts(plan, {"trials": 5, "queries": ["q1", "q2"]}) == ["trials", "queries"]
+
+
+def test_only_running_shards_count_a_pool_crash(tmp_path, monkeypatch):
+    """Test that a crashed worker costs an attempt only for shards that were running."""
+    def run_shard(work_dir, shard_id):
+        if shard_id == 0:
+            os._exit(1)
+        time.sleep(0.3)
+        return 1
+
+    # Worker processes are forked, so they see the patched run_shard
+    monkeypatch.setattr(sharded, "run_shard", run_shard)
+    work_dir = str(tmp_path)
+    sharded.create_plan(work_dir, ["q1", "q2", "q3", "q4"], ["A"], shard_size=1)
+
+    failed = sharded.run_local(work_dir, workers=2, retries=0)
+
+    assert 0 in failed and 2 not in failed and 3 not in failed
+    assert sharded.failure_count(work_dir, 3) == 0
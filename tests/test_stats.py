@@ -0,0 +1,52 @@
+"""Tests for the benchmark statistics helpers."""
+import pytest
+
+from evaluation import stats
+
+
+def test_quantiles_interpolate():
+    """Test median and IQR on a small sample."""
+    values = [1.0, 2.0, 3.0, 4.0]
+
+    assert stats.median(values) == 2.5
+    assert stats.iqr(values) == pytest.approx(1.5)
+
+
+def test_outliers_use_tukey_fences():
+    """Test that a single extreme sample is counted as an outlier."""
+    assert stats.count_outliers([1.0, 1.1, 0.9, 1.0, 10.0]) == 1
+
+
+def test_linear_slope_of_turn_latencies():
+    """Test the slope of growing and flat series."""
+    assert stats.linear_slope([1.0, 3.0, 5.0, 7.0]) == pytest.approx(2.0)
+    assert stats.linear_slope([2.0, 2.0, 2.0]) == 0.0
+    assert stats.linear_slope([4.0]) == 0.0
+
+
+def test_bootstrap_ci_contains_median():
+    """Test that the bootstrap interval brackets the sample median."""
+    values = [1.0, 1.2, 0.8, 1.1, 0.9, 1.05, 0.95]
+    low, high = stats.bootstrap_ci(values, seed=0)
+
+    assert low <= stats.median(values) <= high
+
+
+def test_compare_paired_detects_faster_set():
+    """Test that a consistently faster set wins the verdict."""
+    fast = [1.0, 1.1, 0.9, 1.0, 1.05, 0.95, 1.0, 1.02]
+    slow = [v + 0.5 for v in fast]
+
+    result = stats.compare_paired("A", fast, "B", slow, seed=0)
+
+    assert result["faster"] == "A"
+    assert result["verdict"] == "A is faster than B at 95% confidence"
+
+
+def test_compare_paired_reports_no_difference():
+    """Test that identical sets are not declared different."""
+    values = [1.0, 1.1, 0.9, 1.0]
+
+    result = stats.compare_paired("A", values, "B", values, seed=0)
+
+    assert result["faster"] is None
@@ -0,0 +1,58 @@
+"""Tests for tool result caching in execute_tool."""
+import time
+
+from common import tools
+from common.tool_cache import TOOL_CACHE, CachePolicy, ToolResultCache, canonical_key
+
+
+def test_pure_tool_results_are_reused(monkeypatch):
+    """Test that repeat calls of a pure tool are served from the cache."""
+    TOOL_CACHE.clear()
+    calls = []
+    original = tools.calculate
+
+    def counting_calculate(expression):
+        calls.append(expression)
+        return original(expression)
+
+    counting_calculate.cache_policy = original.cache_policy
+    monkeypatch.setitem(tools.TOOLS, "calculate", counting_calculate)
+
+    first = tools.execute_tool("calculate", {"expression": "2 + 3"})
+    first["result"]["result"] = "mutated"
+    second = tools.execute_tool("calculate", {"expression": "2 + 3"})
+
+    assert calls == ["2 + 3"]
+    assert second == {"error": None, "result": {"expression": "2 + 3", "result": 5, "error": None}}
+    assert TOOL_CACHE.stats()["calculate"] == {"hits": 1, "misses": 1, "hit_rate": 0.5, "entries": 1}
+
+
+def test_argument_order_does_not_matter():
+    """Test that keys are canonical."""
+    assert canonical_key({"query": "x", "max_results": 2}) == canonical_key({"max_results": 2, "query": "x"})
+    assert canonical_key({"value": object()}) is None
+
+
+def test_ttl_expiry_and_lru_bound():
+    """Test that ttl entries expire and the LRU bound holds."""
+    cache = ToolResultCache()
+    ttl = CachePolicy("ttl", ttl=0.01)
+    cache.put("get_weather", "a", ttl, {"temperature": 72})
+    assert cache.get("get_weather", "a", ttl) == (True, {"temperature": 72})
+    time.sleep(0.02)
+    assert cache.get("get_weather", "a", ttl) == (False, None)
+
+    bounded = CachePolicy("pure", max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put("calculate", key, bounded, key)
+    assert cache.get("calculate", "a", bounded)[0] is False
+    assert cache.get("calculate", "c", bounded) == (True, "c")
+
+
+def test_failed_calls_are_not_cached():
+    """Test that tool exceptions are not memoized."""
+    TOOL_CACHE.clear()
+    result = tools.execute_tool("calculate", {"wrong_argument": "1"})
+
+    assert result["error"] is not None
+    assert TOOL_CACHE.stats()["calculate"]["entries"] == 0
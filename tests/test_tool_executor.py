@@ -0,0 +1,75 @@
+"""Tests for isolated tool execution in the worker pool."""
+import threading
+import time
+
+import pytest
+
+from common.tool_executor import ToolExecutor, IsolationPolicy
+
+
+@pytest.fixture(scope="module")
+def executor():
+    pool = ToolExecutor(workers=1)
+    yield pool
+    pool.shutdown()
+
+
+def test_results_keep_execute_tool_shape(executor):
+    """Test that isolated results and tool errors use the {"error", "result"} shape."""
+    policy = IsolationPolicy(timeout=10.0)
+
+    ok = executor.execute("calculate", {"expression": "2 ** 10"}, policy)
+    bad = executor.execute("calculate", {"wrong_argument": "1"}, policy)
+
+    assert ok == {"error": None, "result": {"expression": "2 ** 10", "result": 1024, "error": None}}
+    assert bad["result"] is None and "wrong_argument" in bad["error"]
+
+
+def test_runaway_tool_is_killed_and_replaced(executor):
+    """Test that a timed-out worker is replaced and the pool keeps serving."""
+    start = time.monotonic()
+    result = executor.execute("calculate", {"expression": "9 ** 9 ** 9"}, IsolationPolicy(timeout=0.5))
+
+    assert time.monotonic() - start < 5
+    assert result == {"error": "Tool calculate timed out after 0.5s", "result": None}
+    assert executor.execute("calculate", {"expression": "1 + 1"}, IsolationPolicy(timeout=10.0))["result"]["result"] == 2
+    assert executor.stats()["timeouts"] == 1
+
+
+def test_cancellation(executor):
+    """Test that setting the cancel event aborts a running call."""
+    cancel = threading.Event()
+    threading.Timer(0.2, cancel.set).start()
+
+    result = executor.execute("calculate", {"expression": "9 ** 9 ** 9"}, IsolationPolicy(timeout=30.0), cancel)
+
+    assert result["error"] == "Tool calculate was cancelled"
+    assert executor.stats()["cancelled"] == 1
+
+
+def test_memory_limit(executor):
+    """Test that allocations beyond the call's memory limit fail inside the worker."""
+    policy = IsolationPolicy(timeout=10.0, memory_mb=64)
+
+    big = executor.execute("calculate", {"expression": "max([0] * 10 ** 8)"}, policy)
+    small = executor.execute("calculate", {"expression": "max([0] * 10 ** 5)"}, policy)
+
+    assert big["result"]["result"] is None
+    assert small["result"]["result"] == 0
+
+
+def test_waiting_for_a_worker_counts_towards_the_timeout(executor):
+    """Test that a call times out instead of blocking while every worker is busy."""
+    busy = threading.Thread(target=executor.execute,
+                            args=("calculate", {"expression": "9 ** 9 ** 9"}, IsolationPolicy(timeout=2.0)))
+    busy.start()
+    time.sleep(0.2)
+    timeouts = executor.stats()["timeouts"]
+
+    start = time.monotonic()
+    result = executor.execute("calculate", {"expression": "1 + 1"}, IsolationPolicy(timeout=0.3))
+
+    assert time.monotonic() - start < 1.0
+    assert result == {"error": "Tool calculate timed out after 0.3s", "result": None}
+    assert executor.stats()["timeouts"] == timeouts + 1
+    busy.join()
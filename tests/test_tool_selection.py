@@ -0,0 +1,66 @@
+"""Tests for relevance-based tool selection."""
+from agents.no_framework.agent import NoFrameworkAgent
+from common.offline_llm import OFFLINE_MODEL
+from common.schema import UserMessage
+from common.tool_selection import ToolSelector, selection_terms, recent_user_text
+from evaluation.tool_selection_eval import evaluate_selection, synthetic_catalog
+from evaluation.workload import generate_workload
+
+
+def _names(definitions):
+    return [d["function"]["name"] for d in definitions]
+
+
+def test_arithmetic_is_indexed_without_shared_words():
+    """Test that numbers and operators select the calculator."""
+    assert selection_terms("What's 25% of 840?") == ["#num", "#num", "#op"]
+
+    selector = ToolSelector(NoFrameworkAgent().tool_definitions, k=1)
+    assert _names(selector.select("What's 25% of 840?")) == ["calculate"]
+
+    # Nothing matches: the model gets the whole catalog rather than no tools
+    assert len(selector.select("Hello!")) == len(selector.names)
+
+
+def test_pinned_and_used_tools_are_always_sent():
+    """Test that pinned and already called tools survive the top-k cut."""
+    selector = ToolSelector(NoFrameworkAgent().tool_definitions, k=1, pinned=["expand_result"])
+    selected = _names(selector.select("What's the weather like in Boston?", used={"calculate"}))
+
+    assert selected == ["get_weather", "calculate", "expand_result"]
+    assert selector.stats()["tokens_saved"] > 0
+
+
+def test_recall_on_a_large_catalog():
+    """Test that the real tools are found among hundreds of distractors."""
+    catalog = NoFrameworkAgent().tool_definitions + synthetic_catalog(300)
+    assert len({d["function"]["name"] for d in catalog}) == len(catalog)
+
+    report = evaluate_selection(generate_workload(200, seed=1, long_context_words=100), ToolSelector(catalog, k=5))
+    assert report["recall"] >= 0.95
+    assert report["saved_share"] > 0.9
+
+
+def test_agent_sends_only_selected_tools(monkeypatch):
+    """Test the agent with AGENT_TOOL_TOP_K set against the offline LLM."""
+    monkeypatch.setenv("AGENT_TOOL_TOP_K", "1")
+    agent = NoFrameworkAgent(model=OFFLINE_MODEL)
+    agent.initialize()
+
+    response = agent.process(UserMessage(content="What's the weather in Tokyo and can you calculate 3 * 4?"))
+
+    assert sorted(call.tool_name for call in response.tool_calls) == ["calculate"]
+    assert agent.tool_selector.stats()["selections"] >= 1
+
+
+def test_follow_ups_are_ranked_with_recent_turns():
+    """Test that a follow-up without tool words keeps the earlier turn's tool."""
+    messages = [
+        {"role": "user", "content": "What's the weather like in Boston?"},
+        {"role": "assistant", "content": "It is sunny in Boston."},
+        {"role": "user", "content": "And Paris?"},
+    ]
+    selector = ToolSelector(NoFrameworkAgent().tool_definitions, k=1)
+
+    assert recent_user_text(messages, turns=1) == "And Paris?"
+    assert _names(selector.select(recent_user_text(messages))) == ["get_weather"]
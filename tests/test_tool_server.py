@@ -0,0 +1,53 @@
+"""Tests for the shared tool server and its batching client."""
+import concurrent.futures
+import threading
+
+import pytest
+
+from common import tools
+from common.tool_server import ToolServer, ToolClient
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = ToolServer(str(tmp_path / "tools.sock"), workers=4)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_execute_tool_forwards_to_server(server, monkeypatch):
+    """Test that execute_tool is transparent when AGENT_TOOL_SERVER is set."""
+    monkeypatch.setenv("AGENT_TOOL_SERVER", server.socket_path)
+
+    result = tools.execute_tool("search_knowledge_base", {"query": "agents", "max_results": 1})
+    missing = tools.execute_tool("nope", {})
+
+    assert result == tools.execute_local("search_knowledge_base", {"query": "agents", "max_results": 1})
+    assert missing == {"error": "Tool not found: nope", "result": None}
+
+
+def test_concurrent_calls_are_batched(server):
+    """Test that concurrent calls share batches and keep their own results."""
+    client = ToolClient(server.socket_path, pool_size=1, batch_window=0.05)
+    queries = [f"topic {i}" for i in range(16)]
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(lambda q: client.call("search_knowledge_base", {"query": q, "max_results": 1}), queries))
+
+    assert [r["result"][0]["content"] for r in results] == [f"This is a sample article about {q}" for q in queries]
+    assert client.batches < len(queries)
+    assert client.call_many([("get_weather", {"location": "Paris"}), ("nope", {})])[1]["error"] == "Tool not found: nope"
+    client.close()
+
+
+def test_unavailable_server_returns_error(tmp_path):
+    """Test that connection failures surface as tool errors."""
+    client = ToolClient(str(tmp_path / "missing.sock"))
+
+    result = client.call("calculate", {"expression": "1 + 1"})
+
+    assert result["result"] is None
+    assert result["error"].startswith("Tool server unavailable")
@@ -0,0 +1,44 @@
+"""Tests for span tracing and Chrome trace export."""
+import json
+
+from common import tracing
+
+
+def test_disabled_tracing_returns_shared_noop():
+    """Test that spans cost nothing when tracing is off."""
+    tracing.shutdown()
+
+    with tracing.span("agent.process") as span:
+        span.set_attribute("ignored", True)
+
+    assert span is tracing.span("tool.execute")
+
+
+def test_nested_spans_are_exported(tmp_path):
+    """Test that nested spans are written as Chrome complete events."""
+    path = tmp_path / "trace.json"
+    tracing.configure(str(path))
+    with tracing.span("agent.process", framework="test"):
+        with tracing.span("tool.execute", tool="calculate") as span:
+            span.set_attribute("tokens", 3)
+    tracing.shutdown()
+
+    events = json.loads(path.read_text())
+    child, parent = events
+    assert [e["ph"] for e in events] == ["X", "X"]
+    assert child["args"] == {"tool": "calculate", "tokens": 3}
+    assert parent["args"] == {"framework": "test"}
+    assert parent["ts"] <= child["ts"]
+    assert child["ts"] + child["dur"] <= parent["ts"] + parent["dur"]
+
+
+def test_unsampled_traces_drop_children(tmp_path):
+    """Test that sampling applies to whole traces."""
+    path = tmp_path / "trace.json"
+    tracing.configure(str(path), sample_rate=0.0)
+    with tracing.span("agent.process"):
+        with tracing.span("llm.complete"):
+            pass
+    tracing.shutdown()
+
+    assert json.loads(path.read_text()) == []
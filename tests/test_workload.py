@@ -0,0 +1,43 @@
+"""Tests for workload loading and synthetic generation."""
+from evaluation.workload import generate_workload, iter_workload, write_workload, parse_mix
+
+
+def test_generation_is_seeded():
+    """Test that the same seed yields the same workload."""
+    first = [item.query for item in generate_workload(50, seed=7)]
+    second = [item.query for item in generate_workload(50, seed=7)]
+
+    assert first == second
+
+
+def test_mix_controls_categories():
+    """Test that only categories in the mix are generated."""
+    items = list(generate_workload(200, mix=parse_mix("chat=1,multi_tool=1"), seed=0))
+
+    assert {item.category for item in items} == {"chat", "multi_tool"}
+    assert all(item.expected_tools == ["get_weather", "calculate"]
+               for item in items if item.category == "multi_tool")
+
+
+def test_jsonl_roundtrip_streams_with_limit(tmp_path):
+    """Test that written workloads stream back lazily."""
+    path = str(tmp_path / "workload.jsonl")
+    write_workload(generate_workload(20, seed=1), path)
+
+    items = iter_workload(path, limit=5)
+
+    assert next(items).category is not None
+    assert len(list(items)) == 4
+
+
+def test_csv_and_text_workloads(tmp_path):
+    """Test CSV columns and plain text lines."""
+    csv_path = tmp_path / "workload.csv"
+    csv_path.write_text("content,expected_tools\nWeather in Rome?,get_weather|calculate\n")
+    text_path = tmp_path / "workload.txt"
+    text_path.write_text("first query\n\nsecond query\n")
+
+    item = next(iter_workload(str(csv_path)))
+    assert item.query == "Weather in Rome?"
+    assert item.expected_tools == ["get_weather", "calculate"]
+    assert [i.query for i in iter_workload(str(text_path))] == ["first query", "second query"]